@@ -21,7 +21,9 @@ CREATE OR REPLACE TABLE `openclaw.ai_analysis` (
   token_count_input INT64,
   token_count_output INT64,
   latency_ms INT64,
-  error STRING
+  error STRING,
+  cache_hit BOOL,  -- served from the Gemini response cache (no tokens spent)
+  prompt_version STRING  -- prompt layout (full-v0 = untrimmed, budgeted-v1 = token-budgeted)
 )
 PARTITION BY DATE(timestamp)
 CLUSTER BY analysis_type, agent_id
@@ -55,6 +57,21 @@ OPTIONS (
   description="AI-powered decisions with full reasoning chain"
 );
 
+-- Append-only execution log. GeminiAnalyzer.mark_decision_executed streams a
+-- row here instead of UPDATEing ai_decisions (DML is slow, quota-limited and
+-- fails while the decision row is still in the streaming buffer).
+-- Read executed state from the ai_decisions_current view.
+CREATE OR REPLACE TABLE `openclaw.ai_decision_executions` (
+  decision_id STRING NOT NULL,
+  execution_timestamp TIMESTAMP NOT NULL,
+  execution_result STRING
+)
+PARTITION BY DATE(execution_timestamp)
+CLUSTER BY decision_id
+OPTIONS (
+  description="Executions of ai_decisions (append-only; latest row per decision wins)"
+);
+
 -- ===========================================================================
 -- 3. VIEWS
 -- ===========================================================================
@@ -78,6 +95,24 @@ LEFT JOIN `openclaw.events` e ON a.event_id = e.event_id
 WHERE a.timestamp > TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL 7 DAY)
 ORDER BY a.timestamp DESC;
 
+-- Decisions with executed state from the append-only execution log (falls
+-- back to the legacy in-row columns for decisions executed before the log)
+CREATE OR REPLACE VIEW `openclaw.ai_decisions_current` AS
+WITH latest_execution AS (
+  SELECT
+    decision_id,
+    ARRAY_AGG(STRUCT(execution_timestamp, execution_result) ORDER BY execution_timestamp DESC LIMIT 1)[OFFSET(0)] AS x
+  FROM `openclaw.ai_decision_executions`
+  GROUP BY decision_id
+)
+SELECT
+  d.* EXCEPT (executed, execution_result, execution_timestamp),
+  (x.execution_timestamp IS NOT NULL OR IFNULL(d.executed, FALSE)) AS executed,
+  COALESCE(x.execution_result, d.execution_result) AS execution_result,
+  COALESCE(x.execution_timestamp, d.execution_timestamp) AS execution_timestamp
+FROM `openclaw.ai_decisions` d
+LEFT JOIN latest_execution USING (decision_id);
+
 -- AI decision audit trail
 CREATE OR REPLACE VIEW `openclaw.ai_decision_audit` AS
 SELECT
@@ -93,7 +128,77 @@ SELECT
   a.analysis_type,
   a.model_id,
   e.source as trigger_source
-FROM `openclaw.ai_decisions` d
+FROM `openclaw.ai_decisions_current` d
 LEFT JOIN `openclaw.ai_analysis` a ON d.analysis_id = a.analysis_id
 LEFT JOIN `openclaw.events` e ON d.trigger_event_id = e.event_id
 ORDER BY d.timestamp DESC;
+
+-- Gemini response cache effectiveness (saved tokens = tokens of the original call)
+-- Existing tables: ALTER TABLE `openclaw.ai_analysis` ADD COLUMN IF NOT EXISTS cache_hit BOOL;
+CREATE OR REPLACE VIEW `openclaw.ai_cache_stats` AS
+WITH originals AS (
+  SELECT
+    model_id,
+    prompt_hash,
+    ANY_VALUE(token_count_input) AS token_count_input,
+    ANY_VALUE(token_count_output) AS token_count_output
+  FROM `openclaw.ai_analysis`
+  WHERE NOT IFNULL(cache_hit, FALSE) AND error IS NULL
+  GROUP BY model_id, prompt_hash
+)
+SELECT
+  DATE(a.timestamp) AS day,
+  a.analysis_type,
+  COUNT(*) AS analyses,
+  COUNTIF(IFNULL(a.cache_hit, FALSE)) AS cache_hits,
+  SAFE_DIVIDE(COUNTIF(IFNULL(a.cache_hit, FALSE)), COUNT(*)) AS hit_rate,
+  SUM(IF(IFNULL(a.cache_hit, FALSE), o.token_count_input, 0)) AS saved_input_tokens,
+  SUM(IF(IFNULL(a.cache_hit, FALSE), o.token_count_output, 0)) AS saved_output_tokens
+FROM `openclaw.ai_analysis` a
+LEFT JOIN originals o USING (model_id, prompt_hash)
+WHERE a.timestamp > TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL 30 DAY)
+GROUP BY day, a.analysis_type
+ORDER BY day DESC, a.analysis_type;
+
+-- Orchestrator pre-classifier: share of pipelines decided without Gemini, and
+-- agreement with the LLM on the shadow-sampled share that ran both paths
+CREATE OR REPLACE VIEW `openclaw.preclassifier_stats` AS
+SELECT
+  DATE(timestamp) AS day,
+  COUNT(*) AS pipelines,
+  COUNTIF(JSON_VALUE(payload, '$.preclassifier.bypassed') = 'true') AS bypassed,
+  SAFE_DIVIDE(COUNTIF(JSON_VALUE(payload, '$.preclassifier.bypassed') = 'true'), COUNT(*)) AS bypass_rate,
+  COUNTIF(JSON_VALUE(payload, '$.preclassifier.shadow') = 'true') AS shadow_samples,
+  SAFE_DIVIDE(
+    COUNTIF(JSON_VALUE(payload, '$.preclassifier.agree') = 'true'),
+    COUNTIF(JSON_VALUE(payload, '$.preclassifier.shadow') = 'true')
+  ) AS shadow_agreement_rate
+FROM `openclaw.events`
+WHERE event_type = 'pipeline_executed'
+  AND source = 'orchestrator'
+  AND timestamp > TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL 30 DAY)
+GROUP BY day
+ORDER BY day DESC;
+
+-- Prompt size and latency by prompt layout, for comparing the token-budgeted
+-- prompts against the untrimmed ones (rows written before the column existed
+-- count as full-v0). Cache hits are excluded: they spend no tokens.
+-- Existing tables: ALTER TABLE `openclaw.ai_analysis` ADD COLUMN IF NOT EXISTS prompt_version STRING;
+CREATE OR REPLACE VIEW `openclaw.ai_prompt_stats` AS
+SELECT
+  analysis_type,
+  IFNULL(prompt_version, 'full-v0') AS prompt_version,
+  COUNT(*) AS analyses,
+  AVG(token_count_input) AS avg_input_tokens,
+  AVG(token_count_output) AS avg_output_tokens,
+  APPROX_QUANTILES(latency_ms, 100)[OFFSET(50)] AS p50_latency_ms,
+  APPROX_QUANTILES(latency_ms, 100)[OFFSET(95)] AS p95_latency_ms,
+  MIN(timestamp) AS first_seen,
+  MAX(timestamp) AS last_seen
+FROM `openclaw.ai_analysis`
+WHERE timestamp > TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL 30 DAY)
+  AND NOT IFNULL(cache_hit, FALSE)
+  AND error IS NULL
+  AND analysis_type != 'gmail_enrichment'
+GROUP BY analysis_type, prompt_version
+ORDER BY analysis_type, prompt_version;
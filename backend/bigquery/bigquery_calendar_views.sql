@@ -1,6 +1,48 @@
 -- OpenClaw: Calendar Analytics Views
 -- Companion to execution/bigquery_setup.sql
 
+-- ===========================================================================
+-- 0. CALENDAR FEATURES TABLE
+-- Per-day aggregates of calendar events, parsed from the JSON payload once.
+-- Maintained incrementally by CalendarPatternDetector.refresh_features():
+-- only days with new calendar events are recomputed. The detectors and the
+-- views below read this table instead of scanning openclaw.events.
+--   occupancy    day_of_week x hour_of_day meeting counts (timed events)
+--   series       per (recurring_id, title, organizer) occurrences and starts
+--   attendee     per attendee (self excluded) meeting counts
+--   day_summary  daily totals; last_seen is the refresh watermark
+-- ===========================================================================
+
+CREATE TABLE IF NOT EXISTS `openclaw.calendar_features_daily` (
+  day DATE NOT NULL,
+  feature STRING NOT NULL,
+  day_of_week INT64,
+  hour_of_day INT64,
+  recurring_id STRING,
+  title STRING,
+  organizer STRING,
+  attendee_email STRING,
+  attendee_name STRING,
+  event_count INT64,
+  timed_count INT64,
+  all_day_count INT64,
+  recurring_count INT64,
+  virtual_count INT64,
+  attendee_count_sum INT64,
+  attendee_count_n INT64,
+  start_times ARRAY<STRING>,
+  start_ts ARRAY<TIMESTAMP>,
+  organizers ARRAY<STRING>,
+  first_seen TIMESTAMP,
+  last_seen TIMESTAMP,
+  refreshed_at TIMESTAMP
+)
+PARTITION BY day
+CLUSTER BY feature
+OPTIONS (
+  description="Daily calendar feature aggregates (occupancy, series, attendees) for pattern detection"
+);
+
 -- ===========================================================================
 -- 1. CALENDAR PATTERNS VIEW
 -- Aggregated calendar event analytics for pattern detection
@@ -62,20 +104,17 @@ ORDER BY timestamp DESC;
 
 CREATE OR REPLACE VIEW `openclaw.calendar_weekly_summary` AS
 SELECT
-  DATE_TRUNC(timestamp, WEEK) as week_start,
-  COUNT(*) as total_events,
-  COUNTIF(CAST(JSON_VALUE(payload, '$.all_day') AS BOOL) = FALSE) as timed_meetings,
-  COUNTIF(CAST(JSON_VALUE(payload, '$.all_day') AS BOOL) = TRUE) as all_day_events,
-  COUNTIF(JSON_VALUE(payload, '$.recurring_event_id') IS NOT NULL
-    AND JSON_VALUE(payload, '$.recurring_event_id') != '') as recurring_events,
-  COUNTIF(JSON_VALUE(payload, '$.meeting_link') IS NOT NULL
-    AND JSON_VALUE(payload, '$.meeting_link') != '') as virtual_meetings,
-  AVG(CAST(JSON_VALUE(payload, '$.attendee_count') AS INT64)) as avg_attendees,
-  COUNT(DISTINCT JSON_VALUE(payload, '$.organizer_email')) as unique_organizers
-FROM `openclaw.events`
-WHERE source = 'calendar'
-  AND JSON_VALUE(payload, '$.change_type') != 'deleted'
-  AND timestamp > TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL 90 DAY)
+  TIMESTAMP(DATE_TRUNC(day, WEEK)) as week_start,
+  SUM(event_count) as total_events,
+  SUM(timed_count) as timed_meetings,
+  SUM(all_day_count) as all_day_events,
+  SUM(recurring_count) as recurring_events,
+  SUM(virtual_count) as virtual_meetings,
+  SAFE_DIVIDE(SUM(attendee_count_sum), SUM(attendee_count_n)) as avg_attendees,
+  (SELECT COUNT(DISTINCT o) FROM UNNEST(ARRAY_CONCAT_AGG(organizers)) o) as unique_organizers
+FROM `openclaw.calendar_features_daily`
+WHERE feature = 'day_summary'
+  AND day > DATE_SUB(CURRENT_DATE(), INTERVAL 90 DAY)
 GROUP BY week_start
 ORDER BY week_start DESC;
 
@@ -88,23 +127,12 @@ CREATE OR REPLACE VIEW `openclaw.calendar_top_contacts` AS
 SELECT
   attendee_email,
   attendee_name,
-  COUNT(DISTINCT event_id) as meeting_count,
-  MIN(timestamp) as first_meeting,
-  MAX(timestamp) as last_meeting
-FROM (
-  SELECT
-    e.event_id,
-    e.timestamp,
-    JSON_VALUE(a, '$.email') as attendee_email,
-    JSON_VALUE(a, '$.display_name') as attendee_name,
-    JSON_VALUE(a, '$.self') as is_self
-  FROM `openclaw.events` e,
-  UNNEST(JSON_QUERY_ARRAY(payload, '$.attendees')) as a
-  WHERE e.source = 'calendar'
-    AND JSON_VALUE(payload, '$.change_type') != 'deleted'
-)
-WHERE is_self = 'false'
+  SUM(event_count) as meeting_count,
+  MIN(first_seen) as first_meeting,
+  MAX(last_seen) as last_meeting
+FROM `openclaw.calendar_features_daily`
+WHERE feature = 'attendee'
   AND attendee_email IS NOT NULL
 GROUP BY attendee_email, attendee_name
-HAVING COUNT(DISTINCT event_id) >= 2
+HAVING SUM(event_count) >= 2
 ORDER BY meeting_count DESC;
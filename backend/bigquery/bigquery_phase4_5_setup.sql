@@ -176,15 +176,23 @@ WHERE prediction_type = 'busy_week'
 ORDER BY target_date ASC, confidence DESC;
 
 -- Events joined with their most recent tags.
+-- auto_organizer appends a cluster tag when an event's cluster changes, so
+-- only the newest cluster tag per event is current.
 CREATE OR REPLACE VIEW `openclaw.v_event_with_tags` AS
-WITH tags AS (
+WITH current_tags AS (
+  SELECT *
+  FROM `openclaw.event_tags`
+  WHERE timestamp > TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL 90 DAY)
+  QUALIFY tag_type != 'cluster'
+    OR ROW_NUMBER() OVER (PARTITION BY event_id, tag_type, source ORDER BY timestamp DESC) = 1
+),
+tags AS (
   SELECT
     event_id,
     ARRAY_AGG(STRUCT(tag_type, tag_value, cluster_id, confidence, source, timestamp)
       ORDER BY timestamp DESC
       LIMIT 50) AS tag_rows
-  FROM `openclaw.event_tags`
-  WHERE timestamp > TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL 90 DAY)
+  FROM current_tags
   GROUP BY event_id
 )
 SELECT
@@ -35,11 +35,22 @@ CREATE OR REPLACE TABLE `openclaw.semantic_clusters` (
   centroid ARRAY<FLOAT64>,
   member_count INT64,
   sample_event_ids ARRAY<STRING>,
-  last_updated TIMESTAMP
+  last_updated TIMESTAMP,
+  -- 'gemini' or 'keywords'; only Gemini labels are reused by the label cache
+  label_source STRING,
+  -- Incremental auto_organizer state (clu-inc-* rows; one row appended per change)
+  status STRING,
+  mean_distance FLOAT64,
+  watermark TIMESTAMP
 )
 OPTIONS (
   description="Semantic clusters grouping similar events"
 );
+-- Existing tables:
+--   ALTER TABLE `openclaw.semantic_clusters` ADD COLUMN IF NOT EXISTS label_source STRING;
+--   ALTER TABLE `openclaw.semantic_clusters` ADD COLUMN IF NOT EXISTS status STRING;
+--   ALTER TABLE `openclaw.semantic_clusters` ADD COLUMN IF NOT EXISTS mean_distance FLOAT64;
+--   ALTER TABLE `openclaw.semantic_clusters` ADD COLUMN IF NOT EXISTS watermark TIMESTAMP;
 
 -- ===========================================================================
 -- 3. SEMANTIC LINKS TABLE
@@ -81,6 +92,13 @@ LEFT JOIN `openclaw.events` e ON emb.event_id = e.event_id
 WHERE emb.timestamp > TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL 7 DAY)
 ORDER BY emb.timestamp DESC;
 
+-- Current state of each cluster (latest row per cluster_id; incremental
+-- clusters that were merged away have status = 'retired')
+CREATE OR REPLACE VIEW `openclaw.semantic_clusters_current` AS
+SELECT *
+FROM `openclaw.semantic_clusters`
+QUALIFY ROW_NUMBER() OVER (PARTITION BY cluster_id ORDER BY last_updated DESC) = 1;
+
 -- Strongest semantic links
 CREATE OR REPLACE VIEW `openclaw.strong_semantic_links` AS
 SELECT
@@ -0,0 +1,25 @@
+-- Fold the append-only execution log back into ai_decisions
+-- Schedule as a BigQuery scheduled query (e.g. hourly). Readers that need
+-- up-to-the-second state should use the openclaw.ai_decisions_current view;
+-- this keeps the in-row executed columns useful for ad-hoc queries.
+-- Only decisions older than 2 hours are touched, so their rows have left the
+-- streaming buffer and the MERGE cannot fail on them.
+-- Run: bq query --use_legacy_sql=false < merge_decision_executions.sql
+
+MERGE `openclaw.ai_decisions` d
+USING (
+  SELECT
+    decision_id,
+    ARRAY_AGG(STRUCT(execution_timestamp, execution_result) ORDER BY execution_timestamp DESC LIMIT 1)[OFFSET(0)] AS x
+  FROM `openclaw.ai_decision_executions`
+  WHERE execution_timestamp > TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL 7 DAY)
+  GROUP BY decision_id
+) e
+ON d.decision_id = e.decision_id
+  AND d.timestamp > TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL 8 DAY)
+  AND d.timestamp < TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL 2 HOUR)
+WHEN MATCHED AND (NOT IFNULL(d.executed, FALSE) OR d.execution_timestamp IS DISTINCT FROM e.x.execution_timestamp) THEN
+  UPDATE SET
+    executed = TRUE,
+    execution_result = e.x.execution_result,
+    execution_timestamp = e.x.execution_timestamp;
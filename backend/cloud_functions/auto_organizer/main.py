@@ -3,18 +3,22 @@ import logging
 import math
 import os
 import re
+import threading
+import time
 import uuid
 from collections import Counter
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
 from google.cloud import bigquery
 
 try:
-    from sklearn.cluster import KMeans
+    from sklearn.cluster import KMeans, MiniBatchKMeans
 except Exception:  # pragma: no cover
     KMeans = None
+    MiniBatchKMeans = None
 
 try:
     import vertexai
@@ -40,6 +44,34 @@ CLUSTERS_TABLE = os.environ.get("BQ_CLUSTERS_TABLE") or (
 REGION = os.environ.get("VERTEX_REGION", "us-central1")
 VERTEX_MODEL = os.environ.get("VERTEX_MODEL", "gemini-2.0-flash")
 CLUSTER_LABELS_WITH_GEMINI = os.environ.get("CLUSTER_LABELS_WITH_GEMINI", "false").lower() == "true"
+CLUSTER_LABEL_CONCURRENCY = int(os.environ.get("CLUSTER_LABEL_CONCURRENCY", "8"))
+# A Gemini label from the last LABEL_CACHE_DAYS is reused when the centroid's
+# signature is within LABEL_MAX_HAMMING bits and at least LABEL_MIN_OVERLAP of
+# that cluster's sample events are still members.
+LABEL_CACHE_DAYS = int(os.environ.get("LABEL_CACHE_DAYS", "14"))
+LABEL_SIGNATURE_BITS = 64
+LABEL_MAX_HAMMING = int(os.environ.get("LABEL_MAX_HAMMING", "6"))
+LABEL_MIN_OVERLAP = float(os.environ.get("LABEL_MIN_OVERLAP", "0.5"))
+
+# "incremental" keeps one long-lived set of clusters (ids prefixed clu-inc-)
+# and only assigns new embeddings; "full" is the original daily recluster.
+CLUSTER_MODE = os.environ.get("CLUSTER_MODE", "incremental").lower()
+CLUSTER_WINDOW_DAYS = int(os.environ.get("CLUSTER_WINDOW_DAYS", "30"))
+# Embeddings read for bootstrap / split-merge passes (newest first).
+CLUSTER_SAMPLE_SIZE = int(os.environ.get("CLUSTER_SAMPLE_SIZE", "20000"))
+# New embeddings assigned per run; the rest are picked up by the next run.
+CLUSTER_MAX_BATCH = int(os.environ.get("CLUSTER_MAX_BATCH", "100000"))
+# Caps a centroid's weight in mini-batch updates so it keeps following new data.
+CLUSTER_COUNT_CAP = int(os.environ.get("CLUSTER_COUNT_CAP", "5000"))
+# Mean distance of new members vs the cluster's baseline; above this, split/merge.
+CLUSTER_DRIFT_THRESHOLD = float(os.environ.get("CLUSTER_DRIFT_THRESHOLD", "0.25"))
+# Centroids closer than this fraction of their mean member distance are merged.
+CLUSTER_MERGE_RATIO = float(os.environ.get("CLUSTER_MERGE_RATIO", "0.5"))
+CLUSTER_MIN_SPLIT_SIZE = int(os.environ.get("CLUSTER_MIN_SPLIT_SIZE", "40"))
+CLUSTER_MAX_K = int(os.environ.get("CLUSTER_MAX_K", "40"))
+# Re-read embeddings this far behind the watermark (streaming-insert latency).
+CLUSTER_WATERMARK_OVERLAP_H = 6
+INCREMENTAL_PREFIX = "clu-inc-"
 
 
 WORD_RE = re.compile(r"[A-Za-z][A-Za-z0-9_\\-]{2,}")
@@ -70,6 +102,17 @@ def auto_organizer(request):
     """
     Scheduled HTTP Cloud Function: zero-click warehousing.
 
+    Incremental mode (CLUSTER_MODE=incremental, default):
+    - First run fits MiniBatchKMeans on the newest CLUSTER_SAMPLE_SIZE embeddings.
+    - Later runs assign embeddings newer than the model watermark to the nearest
+      centroid and move centroids with a mini-batch step.
+    - When new members drift away from their centroids (CLUSTER_DRIFT_THRESHOLD),
+      a split/merge pass runs over the recent window.
+    - Cluster rows are appended to openclaw.semantic_clusters when they change
+      (current state: openclaw.semantic_clusters_current); cluster tags are
+      appended to openclaw.event_tags only for events whose cluster changed.
+
+    Full mode (CLUSTER_MODE=full):
     - Clusters recent embeddings (last 30 days) using KMeans.
     - Updates openclaw.semantic_clusters (daily rolling replacement).
     - Writes per-event cluster tags to openclaw.event_tags.
@@ -87,6 +130,13 @@ def auto_organizer(request):
     now_iso = now.isoformat() + "Z"
     today_key = now.strftime("%Y%m%d")
 
+    labeler = ClusterLabeler(bq)
+
+    if CLUSTER_MODE == "incremental":
+        result = _run_incremental(bq=bq, now_iso=now_iso, labeler=labeler)
+        result["labeling"] = labeler.report()
+        return (json.dumps(result), 200, {"Content-Type": "application/json"})
+
     embeddings = _load_recent_embeddings(bq=bq, days_back=30, limit=1000)
     if len(embeddings) < 20:
         return (json.dumps({"status": "ok", "message": "not enough embeddings", "count": len(embeddings)}), 200, {"Content-Type": "application/json"})
@@ -107,6 +157,7 @@ def auto_organizer(request):
         labels=labels,
         centers=centers,
         previews=previews,
+        labeler=labeler,
     )
 
     # Replace today's auto clusters (idempotent-ish).
@@ -119,7 +170,12 @@ def auto_organizer(request):
     _insert_event_tags(bq=bq, tag_rows=tag_rows)
 
     return (
-        json.dumps({"status": "ok", "clusters": len(clusters), "tagged_events": len(tag_rows)}),
+        json.dumps({
+            "status": "ok",
+            "clusters": len(clusters),
+            "tagged_events": len(tag_rows),
+            "labeling": labeler.report(),
+        }),
         200,
         {"Content-Type": "application/json"},
     )
@@ -180,6 +236,7 @@ def _build_clusters(
     labels: np.ndarray,
     centers: np.ndarray,
     previews: List[str],
+    labeler: "ClusterLabeler",
 ) -> List[Dict[str, Any]]:
     # Map cluster -> member event indices
     members: Dict[int, List[int]] = {i: [] for i in range(k)}
@@ -194,39 +251,155 @@ def _build_clusters(
 
         sample_idxs = idxs[:10]
         sample_event_ids = [event_ids[j] for j in sample_idxs]
-        sample_texts = [previews[j] for j in sample_idxs if previews[j]]
-
-        label, description = _label_cluster(i, sample_texts)
 
         clusters.append(
             {
                 "cluster_id": f"clu-{today_key}-{k}-{i}",
                 "timestamp": now_iso,
-                "label": label,
-                "description": description,
                 "centroid": [float(x) for x in centers[i].tolist()],
                 "member_count": len(idxs),
                 "sample_event_ids": sample_event_ids,
                 "last_updated": now_iso,
                 "_member_event_ids": [event_ids[j] for j in idxs],
+                "_sample_texts": [previews[j] for j in sample_idxs if previews[j]],
+                "_index": i,
             }
         )
 
+    labels = labeler.label([
+        {"index": c["_index"], "texts": c["_sample_texts"], "centroid": centers[c["_index"]], "members": c["_member_event_ids"]}
+        for c in clusters
+    ])
+    for c, (label, description, source) in zip(clusters, labels):
+        c["label"], c["description"], c["label_source"] = label, description, source
+
     return clusters
 
 
-def _label_cluster(cluster_index: int, sample_texts: List[str]) -> Tuple[str, str]:
-    if CLUSTER_LABELS_WITH_GEMINI and vertexai and GenerativeModel and default:
+class ClusterLabeler:
+    """
+    Labels clusters, reusing a recent Gemini label when the cluster has not moved.
+
+    Cached labels are the label_source = 'gemini' rows of semantic_clusters.
+    A cluster matches one when their centroids' random-hyperplane signatures
+    differ in at most LABEL_MAX_HAMMING bits and enough of the old sample
+    events are still members. Remaining clusters are sent to Gemini
+    concurrently; anything Gemini does not label gets a keyword label.
+    """
+
+    def __init__(self, bq: bigquery.Client):
+        self.bq = bq
+        self._candidates: Optional[List[Dict[str, Any]]] = None
+        self._lock = threading.Lock()
+        self.stats = {
+            "clusters": 0,
+            "cache_hits": 0,
+            "gemini_calls": 0,
+            "gemini_failures": 0,
+            "input_tokens": 0,
+            "output_tokens": 0,
+            "seconds": 0.0,
+        }
+
+    def label(self, items: List[Dict[str, Any]]) -> List[Tuple[str, str, str]]:
+        """items: {index, texts, centroid, members}. Returns (label, description, label_source) per item."""
+        started = time.time()
+        results: List[Optional[Tuple[str, str, str]]] = [None] * len(items)
+        self.stats["clusters"] += len(items)
+
+        todo: List[int] = []
+        if CLUSTER_LABELS_WITH_GEMINI and vertexai and GenerativeModel and default:
+            used: set = set()
+            for pos, item in enumerate(items):
+                hit = self._cached(item, used)
+                if hit:
+                    results[pos] = hit
+                    self.stats["cache_hits"] += 1
+                else:
+                    todo.append(pos)
+
+        if todo:
+            with ThreadPoolExecutor(max_workers=min(CLUSTER_LABEL_CONCURRENCY, len(todo))) as pool:
+                for pos, labeled in zip(todo, pool.map(lambda p: self._gemini_label(items[p]["texts"]), todo)):
+                    results[pos] = labeled
+
+        for pos, item in enumerate(items):
+            if results[pos] is None:
+                results[pos] = (*_keyword_label(item["index"], item["texts"]), "keywords")
+
+        self.stats["seconds"] += time.time() - started
+        return results
+
+    def report(self) -> Dict[str, Any]:
+        report = dict(self.stats)
+        report["seconds"] = round(report["seconds"], 3)
+        return report
+
+    def _cached(self, item: Dict[str, Any], used: set) -> Optional[Tuple[str, str, str]]:
+        centroid = np.asarray(item["centroid"], dtype=np.float64)
+        signature = _centroid_signature(centroid)
+        members = set(item.get("members") or [])
+        best = None
+        for n, cand in enumerate(self._load_candidates()):
+            if n in used or cand["dims"] != len(centroid):
+                continue
+            distance = (signature ^ cand["signature"]).bit_count()
+            if distance > LABEL_MAX_HAMMING:
+                continue
+            samples = cand["samples"]
+            overlap = len(samples & members) / len(samples) if samples else 0.0
+            if overlap < LABEL_MIN_OVERLAP:
+                continue
+            if best is None or distance < best[0]:
+                best = (distance, n)
+        if best is None:
+            return None
+        used.add(best[1])
+        cand = self._candidates[best[1]]
+        return cand["label"], cand["description"], "gemini"
+
+    def _load_candidates(self) -> List[Dict[str, Any]]:
+        if self._candidates is not None:
+            return self._candidates
+        query = f"""
+        SELECT label, description, centroid, sample_event_ids
+        FROM `{CLUSTERS_TABLE}`
+        WHERE last_updated > TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL @days DAY)
+        QUALIFY ROW_NUMBER() OVER (PARTITION BY cluster_id ORDER BY last_updated DESC) = 1
+          AND label_source = 'gemini'
+        """
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[bigquery.ScalarQueryParameter("days", "INT64", LABEL_CACHE_DAYS)]
+        )
+        self._candidates = []
+        try:
+            for row in self.bq.query(query, job_config=job_config):
+                if not row.label or not row.centroid:
+                    continue
+                centroid = np.asarray(list(row.centroid), dtype=np.float64)
+                self._candidates.append(
+                    {
+                        "label": row.label,
+                        "description": row.description or "",
+                        "dims": len(centroid),
+                        "signature": _centroid_signature(centroid),
+                        "samples": set(row.sample_event_ids or []),
+                    }
+                )
+        except Exception as exc:
+            logger.warning(f"Cluster label cache load failed: {exc}")
+        return self._candidates
+
+    def _gemini_label(self, sample_texts: List[str]) -> Optional[Tuple[str, str, str]]:
+        with self._lock:
+            self.stats["gemini_calls"] += 1
         try:
-            credentials, _ = default()
-            vertexai.init(project=PROJECT_ID, location=REGION, credentials=credentials)
-            model = GenerativeModel(VERTEX_MODEL)
             prompt = (
                 "You are naming a cluster of personal events. "
                 "Return JSON with keys: label (<=5 words), description (<=20 words). "
                 "Texts:\n\n" + "\n---\n".join(sample_texts[:5])
             )
-            resp = model.generate_content(
+            resp = _gemini_model().generate_content(
                 prompt,
                 generation_config={
                     "temperature": 0.2,
@@ -234,15 +407,49 @@ def _label_cluster(cluster_index: int, sample_texts: List[str]) -> Tuple[str, st
                     "response_mime_type": "application/json",
                 },
             )
+            usage = getattr(resp, "usage_metadata", None)
+            with self._lock:
+                self.stats["input_tokens"] += int(getattr(usage, "prompt_token_count", 0) or 0)
+                self.stats["output_tokens"] += int(getattr(usage, "candidates_token_count", 0) or 0)
             data = json.loads(resp.text)
             label = (data.get("label") or "").strip()
             desc = (data.get("description") or "").strip()
             if label:
-                return label[:60], desc[:200]
+                return label[:60], desc[:200], "gemini"
         except Exception as exc:
             logger.warning(f"Gemini cluster labeling failed: {exc}")
+        with self._lock:
+            self.stats["gemini_failures"] += 1
+        return None
+
+
+_GEMINI_MODEL = None
+_GEMINI_LOCK = threading.Lock()
+_SIGNATURE_PLANES: Dict[int, np.ndarray] = {}
+
+
+def _gemini_model():
+    """One vertexai.init / GenerativeModel per process."""
+    global _GEMINI_MODEL
+    with _GEMINI_LOCK:
+        if _GEMINI_MODEL is None:
+            credentials, _ = default()
+            vertexai.init(project=PROJECT_ID, location=REGION, credentials=credentials)
+            _GEMINI_MODEL = GenerativeModel(VERTEX_MODEL)
+        return _GEMINI_MODEL
+
 
-    # Fallback: keyword label from previews
+def _centroid_signature(centroid: np.ndarray) -> int:
+    """Sign pattern of the centroid against fixed random hyperplanes, as an int."""
+    dims = len(centroid)
+    planes = _SIGNATURE_PLANES.get(dims)
+    if planes is None:
+        planes = _SIGNATURE_PLANES[dims] = np.random.default_rng(dims).standard_normal((LABEL_SIGNATURE_BITS, dims))
+    bits = (planes @ centroid) > 0
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def _keyword_label(cluster_index: int, sample_texts: List[str]) -> Tuple[str, str]:
     tokens = []
     for t in sample_texts:
         for w in WORD_RE.findall(t.lower()):
@@ -274,18 +481,23 @@ def _delete_existing_today_clusters(*, bq: bigquery.Client, today_key: str) -> N
 def _insert_clusters(*, bq: bigquery.Client, clusters: List[Dict[str, Any]]) -> None:
     rows = []
     for c in clusters:
-        rows.append(
-            {
-                "cluster_id": c["cluster_id"],
-                "timestamp": c["timestamp"],
-                "label": c["label"],
-                "description": c["description"],
-                "centroid": c["centroid"],
-                "member_count": c["member_count"],
-                "sample_event_ids": c["sample_event_ids"],
-                "last_updated": c["last_updated"],
-            }
-        )
+        row = {
+            "cluster_id": c["cluster_id"],
+            "timestamp": c["timestamp"],
+            "label": c["label"],
+            "description": c["description"],
+            "centroid": c["centroid"],
+            "member_count": c["member_count"],
+            "sample_event_ids": c["sample_event_ids"],
+            "last_updated": c["last_updated"],
+        }
+        # Incremental-mode state columns.
+        for key in ("label_source", "status", "mean_distance", "watermark"):
+            if key in c:
+                row[key] = c[key]
+        rows.append(row)
+    if not rows:
+        return
     errors = bq.insert_rows_json(f"{PROJECT_ID}.openclaw.semantic_clusters", rows)
     if errors:
         logger.warning(f"Cluster insert errors: {errors}")
@@ -334,3 +546,410 @@ def _insert_event_tags(*, bq: bigquery.Client, tag_rows: List[Dict[str, Any]]) -
     if errors:
         logger.warning(f"Event tag insert errors: {errors}")
 
+
+
+# ---------------------------------------------------------------------------
+# Incremental mode
+# ---------------------------------------------------------------------------
+
+
+def _run_incremental(*, bq: bigquery.Client, now_iso: str, labeler: ClusterLabeler) -> Dict[str, Any]:
+    model = _load_cluster_model(bq=bq)
+    if model is None:
+        return _bootstrap_clusters(bq=bq, now_iso=now_iso, labeler=labeler)
+
+    since = model["watermark"] - timedelta(hours=CLUSTER_WATERMARK_OVERLAP_H)
+    batch = _load_embeddings(bq=bq, since=since, limit=CLUSTER_MAX_BATCH, newest_first=False)
+    model["watermark"] = max(model["watermark"], batch["max_ts"])
+    # The overlap re-reads embeddings already assigned to a live cluster; skip those.
+    known = set(model["ids"])
+    batch = _subset(batch, [i for i, c in enumerate(batch["current"]) if c not in known])
+    if not batch["event_ids"]:
+        return {"status": "ok", "mode": "incremental", "new_embeddings": 0, "clusters": len(model["ids"])}
+
+    assign, dist = _nearest(batch["X"], model["centroids"])
+    drift = _minibatch_update(model, batch["X"], assign, dist)
+
+    changed_clusters = set(np.unique(assign).tolist())
+    tag_rows = _changed_tags(model, batch, assign, now_iso)
+
+    reclustered = False
+    if drift["overall"] > CLUSTER_DRIFT_THRESHOLD or drift["split"]:
+        logger.info(f"Cluster drift {drift['overall']:.2f} (split candidates {drift['split']}); running split/merge")
+        sample = _load_embeddings(
+            bq=bq, since=datetime.utcnow() - timedelta(days=CLUSTER_WINDOW_DAYS), limit=CLUSTER_SAMPLE_SIZE
+        )
+        if sample["event_ids"]:
+            # Tags written by this run are already current for these events.
+            written = {t["event_id"]: t["cluster_id"] for t in tag_rows}
+            sample["current"] = [written.get(e, c) for e, c in zip(sample["event_ids"], sample["current"])]
+            changed_clusters |= _split_merge(model, sample, drift["split"], now_iso)
+            _, sample_assign = _rebaseline(model, sample)
+            retired = _retire_empty_clusters(model)
+            if retired:
+                changed_clusters |= retired
+                # Batch events outside the sample may still be tagged with a retired cluster.
+                retired_ids = {model["ids"][c] for c in retired}
+                stale_events = {t["event_id"] for t in tag_rows if t["cluster_id"] in retired_ids}
+                stale = _subset(batch, [i for i, e in enumerate(batch["event_ids"]) if e in stale_events])
+                if stale["event_ids"]:
+                    live = np.flatnonzero(model["active"])
+                    stale_assign = live[_nearest(stale["X"], model["centroids"][live])[0]]
+                    tag_rows += _changed_tags(model, stale, stale_assign, now_iso)
+            _label_new_clusters(model, sample, sample_assign, labeler)
+            tag_rows += _changed_tags(model, sample, sample_assign, now_iso)
+            reclustered = True
+
+    # One row per event: a split/merge reassignment supersedes this run's first tag.
+    tag_rows = list({t["event_id"]: t for t in tag_rows}.values())
+    _insert_clusters(bq=bq, clusters=_model_rows(model, changed_clusters, now_iso))
+    _insert_event_tags(bq=bq, tag_rows=tag_rows)
+
+    return {
+        "status": "ok",
+        "mode": "incremental",
+        "new_embeddings": len(batch["event_ids"]),
+        "clusters": int(np.sum(model["active"])),
+        "drift": round(drift["overall"], 3),
+        "split_merge": reclustered,
+        "tagged_events": len(tag_rows),
+    }
+
+
+def _bootstrap_clusters(*, bq: bigquery.Client, now_iso: str, labeler: ClusterLabeler) -> Dict[str, Any]:
+    if MiniBatchKMeans is None:
+        raise RuntimeError("scikit-learn not available (MiniBatchKMeans import failed)")
+
+    sample = _load_embeddings(
+        bq=bq, since=datetime.utcnow() - timedelta(days=CLUSTER_WINDOW_DAYS), limit=CLUSTER_SAMPLE_SIZE
+    )
+    n = len(sample["event_ids"])
+    if n < 20:
+        return {"status": "ok", "message": "not enough embeddings", "count": n}
+
+    k = _choose_k(n)
+    km = MiniBatchKMeans(n_clusters=k, n_init=3, batch_size=1024, random_state=42)
+    km.fit(sample["X"])
+
+    model = {
+        "ids": [f"{INCREMENTAL_PREFIX}{uuid.uuid4().hex[:12]}" for _ in range(k)],
+        "created": [now_iso] * k,
+        "labels": [""] * k,
+        "descriptions": [""] * k,
+        "label_sources": [""] * k,
+        "samples": [[] for _ in range(k)],
+        "centroids": km.cluster_centers_.astype(np.float32),
+        "counts": np.zeros(k, dtype=np.int64),
+        "mean_dist": np.zeros(k, dtype=np.float64),
+        "active": np.ones(k, dtype=bool),
+        "watermark": sample["max_ts"],
+    }
+    assign = _rebaseline(model, sample)[1]
+    _label_new_clusters(model, sample, assign, labeler)
+
+    tag_rows = _changed_tags(model, sample, assign, now_iso)
+    _insert_clusters(bq=bq, clusters=_model_rows(model, set(range(k)), now_iso))
+    _insert_event_tags(bq=bq, tag_rows=tag_rows)
+    return {"status": "ok", "mode": "incremental", "bootstrapped": True, "clusters": k, "tagged_events": len(tag_rows)}
+
+
+def _load_cluster_model(*, bq: bigquery.Client) -> Optional[Dict[str, Any]]:
+    """Latest row per incremental cluster; None if there is no active cluster yet."""
+    query = f"""
+    SELECT
+      cluster_id,
+      timestamp,
+      label,
+      description,
+      centroid,
+      member_count,
+      sample_event_ids,
+      label_source,
+      mean_distance,
+      watermark,
+      status
+    FROM `{CLUSTERS_TABLE}`
+    WHERE STARTS_WITH(cluster_id, @prefix)
+    QUALIFY ROW_NUMBER() OVER (PARTITION BY cluster_id ORDER BY last_updated DESC) = 1
+    """
+    job_config = bigquery.QueryJobConfig(
+        query_parameters=[bigquery.ScalarQueryParameter("prefix", "STRING", INCREMENTAL_PREFIX)]
+    )
+    rows = list(bq.query(query, job_config=job_config))
+    watermarks = [r.watermark for r in rows if r.watermark]
+    rows = [r for r in rows if (r.status or "active") == "active" and r.centroid]
+    if not rows:
+        return None
+
+    return {
+        "ids": [r.cluster_id for r in rows],
+        "created": [r.timestamp.isoformat() for r in rows],
+        "labels": [r.label or "" for r in rows],
+        "descriptions": [r.description or "" for r in rows],
+        "label_sources": [r.label_source or "" for r in rows],
+        "samples": [list(r.sample_event_ids or []) for r in rows],
+        "centroids": np.array([list(r.centroid) for r in rows], dtype=np.float32),
+        "counts": np.array([int(r.member_count or 0) for r in rows], dtype=np.int64),
+        "mean_dist": np.array([float(r.mean_distance or 0.0) for r in rows], dtype=np.float64),
+        "active": np.ones(len(rows), dtype=bool),
+        "watermark": max(watermarks).replace(tzinfo=None) if watermarks else datetime.utcnow(),
+    }
+
+
+def _load_embeddings(
+    *, bq: bigquery.Client, since: datetime, limit: int, newest_first: bool = True
+) -> Dict[str, Any]:
+    """Embeddings newer than `since` with each event's current auto_organizer cluster."""
+    query = f"""
+    WITH current_tags AS (
+      SELECT event_id, cluster_id
+      FROM `{PROJECT_ID}.openclaw.event_tags`
+      WHERE source = 'auto_organizer'
+        AND tag_type = 'cluster'
+        AND timestamp > @since
+      QUALIFY ROW_NUMBER() OVER (PARTITION BY event_id ORDER BY timestamp DESC) = 1
+    )
+    SELECT
+      e.event_id,
+      e.embedding,
+      e.content_preview,
+      e.timestamp,
+      t.cluster_id AS current_cluster_id
+    FROM `{PROJECT_ID}.openclaw.embeddings` e
+    LEFT JOIN current_tags t USING (event_id)
+    WHERE e.timestamp > @since
+      AND e.embedding IS NOT NULL
+    QUALIFY ROW_NUMBER() OVER (PARTITION BY e.event_id ORDER BY e.timestamp DESC) = 1
+    ORDER BY e.timestamp {"DESC" if newest_first else "ASC"}
+    LIMIT @limit
+    """
+    job_config = bigquery.QueryJobConfig(
+        query_parameters=[
+            bigquery.ScalarQueryParameter("since", "TIMESTAMP", since),
+            bigquery.ScalarQueryParameter("limit", "INT64", limit),
+        ]
+    )
+
+    event_ids: List[str] = []
+    vectors: List[np.ndarray] = []
+    previews: List[str] = []
+    current: List[Optional[str]] = []
+    max_ts = since
+    for row in bq.query(query, job_config=job_config).result(page_size=5000):
+        if not row.embedding:
+            continue
+        event_ids.append(row.event_id)
+        vectors.append(np.asarray(row.embedding, dtype=np.float32))
+        previews.append((row.content_preview or "")[:300])
+        current.append(row.current_cluster_id)
+        ts = row.timestamp.replace(tzinfo=None)
+        if ts > max_ts:
+            max_ts = ts
+
+    return {
+        "event_ids": event_ids,
+        "X": np.vstack(vectors) if vectors else np.zeros((0, 0), dtype=np.float32),
+        "previews": previews,
+        "current": current,
+        "max_ts": max_ts,
+    }
+
+
+def _subset(batch: Dict[str, Any], keep: List[int]) -> Dict[str, Any]:
+    return {
+        "event_ids": [batch["event_ids"][i] for i in keep],
+        "X": batch["X"][keep] if keep else batch["X"][:0],
+        "previews": [batch["previews"][i] for i in keep],
+        "current": [batch["current"][i] for i in keep],
+        "max_ts": batch["max_ts"],
+    }
+
+
+def _nearest(X: np.ndarray, centroids: np.ndarray, chunk: int = 4096) -> Tuple[np.ndarray, np.ndarray]:
+    """Index of and Euclidean distance to the nearest centroid for each row of X."""
+    c_sq = np.einsum("ij,ij->i", centroids, centroids)
+    idx = np.empty(len(X), dtype=np.int64)
+    dist = np.empty(len(X), dtype=np.float64)
+    for start in range(0, len(X), chunk):
+        block = X[start : start + chunk]
+        d2 = np.einsum("ij,ij->i", block, block)[:, None] - 2.0 * block @ centroids.T + c_sq[None, :]
+        best = np.argmin(d2, axis=1)
+        idx[start : start + chunk] = best
+        dist[start : start + chunk] = np.sqrt(np.maximum(d2[np.arange(len(block)), best], 0.0))
+    return idx, dist
+
+
+def _minibatch_update(model: Dict[str, Any], X: np.ndarray, assign: np.ndarray, dist: np.ndarray) -> Dict[str, Any]:
+    """
+    Move each centroid toward its new members (weighted running mean, weight
+    capped at CLUSTER_COUNT_CAP) and fold their distances into mean_dist.
+
+    Returns {"overall": weighted relative drift, "split": [clusters to split]}.
+    """
+    drift_sum = 0.0
+    split: List[int] = []
+    for c in np.unique(assign).tolist():
+        mask = assign == c
+        m = int(mask.sum())
+        weight = min(int(model["counts"][c]), CLUSTER_COUNT_CAP)
+        new_mean = float(dist[mask].mean())
+        baseline = float(model["mean_dist"][c])
+
+        if baseline > 0:
+            cluster_drift = new_mean / baseline - 1.0
+            drift_sum += max(0.0, cluster_drift) * m
+            if cluster_drift > 2 * CLUSTER_DRIFT_THRESHOLD and m >= CLUSTER_MIN_SPLIT_SIZE:
+                split.append(c)
+
+        total = weight + m
+        model["centroids"][c] = (model["centroids"][c] * weight + X[mask].sum(axis=0)) / total
+        model["mean_dist"][c] = (baseline * weight + float(dist[mask].sum())) / total
+        model["counts"][c] += m
+
+    return {"overall": drift_sum / max(1, len(assign)), "split": split}
+
+
+def _split_merge(model: Dict[str, Any], sample: Dict[str, Any], split: List[int], now_iso: str) -> set:
+    """Split drifting clusters in two and merge near-duplicate centroids. Returns touched indexes."""
+    touched = set()
+    assign, dist = _nearest(sample["X"], model["centroids"])
+
+    for c in split:
+        if int(np.sum(model["active"])) >= CLUSTER_MAX_K:
+            break
+        mask = assign == c
+        if int(mask.sum()) < 2 * CLUSTER_MIN_SPLIT_SIZE:
+            continue
+        members = sample["X"][mask]
+        # Seed the second half with the member farthest from the current centroid.
+        init = np.vstack([model["centroids"][c], members[int(np.argmax(dist[mask]))]])
+        km = KMeans(n_clusters=2, init=init, n_init=1).fit(members)
+        sizes = np.bincount(km.labels_, minlength=2)
+        keep, new = (0, 1) if sizes[0] >= sizes[1] else (1, 0)
+
+        model["centroids"][c] = km.cluster_centers_[keep]
+        model["counts"][c] = int(sizes[keep])
+        j = _add_cluster(model, km.cluster_centers_[new], int(sizes[new]), now_iso)
+        touched |= {c, j}
+
+    active = np.flatnonzero(model["active"])
+    spread = np.maximum(model["mean_dist"], 1e-9)
+    for a_pos, a in enumerate(active):
+        for b in active[a_pos + 1 :]:
+            if not (model["active"][a] and model["active"][b]):
+                continue
+            gap = float(np.linalg.norm(model["centroids"][a] - model["centroids"][b]))
+            if gap >= CLUSTER_MERGE_RATIO * min(spread[a], spread[b]):
+                continue
+            keep, drop = (a, b) if model["counts"][a] >= model["counts"][b] else (b, a)
+            wk, wd = max(1, int(model["counts"][keep])), max(1, int(model["counts"][drop]))
+            model["centroids"][keep] = (model["centroids"][keep] * wk + model["centroids"][drop] * wd) / (wk + wd)
+            model["counts"][keep] += model["counts"][drop]
+            model["active"][drop] = False
+            touched |= {int(keep), int(drop)}
+
+    return touched
+
+
+def _add_cluster(model: Dict[str, Any], centroid: np.ndarray, count: int, now_iso: str) -> int:
+    model["ids"].append(f"{INCREMENTAL_PREFIX}{uuid.uuid4().hex[:12]}")
+    model["created"].append(now_iso)
+    model["labels"].append("")
+    model["descriptions"].append("")
+    model["label_sources"].append("")
+    model["samples"].append([])
+    model["centroids"] = np.vstack([model["centroids"], centroid[None, :].astype(np.float32)])
+    model["counts"] = np.append(model["counts"], count)
+    model["mean_dist"] = np.append(model["mean_dist"], 0.0)
+    model["active"] = np.append(model["active"], True)
+    return len(model["ids"]) - 1
+
+
+def _rebaseline(model: Dict[str, Any], sample: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """Assign the sample to active clusters; reset counts, mean_dist and samples from it."""
+    active = np.flatnonzero(model["active"])
+    local, dist = _nearest(sample["X"], model["centroids"][active])
+    assign = active[local]
+    for c in active.tolist():
+        mask = assign == c
+        m = int(mask.sum())
+        model["counts"][c] = m
+        model["mean_dist"][c] = float(dist[mask].mean()) if m else 0.0
+        model["samples"][c] = [sample["event_ids"][i] for i in np.flatnonzero(mask)[:10]]
+    return dist, assign
+
+
+def _retire_empty_clusters(model: Dict[str, Any]) -> set:
+    """Retire active clusters left without members by _rebaseline. Returns their indexes."""
+    empty = {c for c in np.flatnonzero(model["active"]).tolist() if int(model["counts"][c]) == 0}
+    for c in empty:
+        model["active"][c] = False
+    return empty
+
+
+def _label_new_clusters(
+    model: Dict[str, Any], sample: Dict[str, Any], assign: np.ndarray, labeler: ClusterLabeler
+) -> None:
+    """Label active clusters that have no label yet (bootstrap, split halves)."""
+    new = [c for c in np.flatnonzero(model["active"]).tolist() if not model["labels"][c]]
+    if not new:
+        return
+    items = []
+    for c in new:
+        idx = np.flatnonzero(assign == c)
+        items.append(
+            {
+                "index": c,
+                "texts": [sample["previews"][i] for i in idx[:10] if sample["previews"][i]],
+                "centroid": model["centroids"][c],
+                "members": [sample["event_ids"][i] for i in idx],
+            }
+        )
+    for c, (label, description, source) in zip(new, labeler.label(items)):
+        model["labels"][c], model["descriptions"][c], model["label_sources"][c] = label, description, source
+
+
+def _changed_tags(
+    model: Dict[str, Any], batch: Dict[str, Any], assign: np.ndarray, now_iso: str
+) -> List[Dict[str, Any]]:
+    """Cluster tags for events whose assignment differs from their current tag."""
+    tags: List[Dict[str, Any]] = []
+    for i, c in enumerate(assign.tolist()):
+        cluster_id = model["ids"][c]
+        event_id = batch["event_ids"][i]
+        if batch["current"][i] == cluster_id:
+            continue
+        tags.append(
+            {
+                "tag_id": f"tag-{uuid.uuid5(uuid.NAMESPACE_URL, event_id + '|' + cluster_id).hex[:12]}",
+                "event_id": event_id,
+                "timestamp": now_iso,
+                "tag_type": "cluster",
+                "tag_value": model["labels"][c],
+                "cluster_id": cluster_id,
+                "confidence": 0.6,
+                "source": "auto_organizer",
+            }
+        )
+    return tags
+
+
+def _model_rows(model: Dict[str, Any], indexes: set, now_iso: str) -> List[Dict[str, Any]]:
+    watermark = model["watermark"].isoformat() + "Z"
+    return [
+        {
+            "cluster_id": model["ids"][c],
+            "timestamp": model["created"][c],
+            "label": model["labels"][c],
+            "description": model["descriptions"][c],
+            "label_source": model["label_sources"][c],
+            "centroid": [float(x) for x in model["centroids"][c].tolist()],
+            "member_count": int(model["counts"][c]),
+            "sample_event_ids": model["samples"][c],
+            "last_updated": now_iso,
+            "status": "active" if model["active"][c] else "retired",
+            "mean_distance": float(model["mean_dist"][c]),
+            "watermark": watermark,
+        }
+        for c in sorted(indexes)
+    ]
@@ -1,12 +1,14 @@
 import base64
 import json
 import os
+import re
 from datetime import datetime
 import logging
 
-from google.auth import default
 from google.cloud import bigquery, tasks_v2, language_v1
-from googleapiclient.discovery import build
+
+from sheets_appender import get_sheets_appender
+from spike_detector import SPIKE_DETECTION_ENABLED, get_spike_detector
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +18,11 @@ SHEET_ID = os.environ.get("SHEET_ID") or os.environ.get("GOOGLE_SHEET_ID")
 NLP_TABLE_ID = (
     os.environ.get("BQ_NLP_TABLE") or f"{PROJECT_ID}.openclaw.nlp_enrichment"
 )
+PREDICTIONS_TABLE = (
+    os.environ.get("BQ_PREDICTIONS_TABLE") or f"{PROJECT_ID}.openclaw.predictions"
+)
+
+EMAIL_RE = re.compile(r"([a-z0-9._%+-]+@[a-z0-9.-]+\.[a-z]{2,})")
 
 
 def insert_events_idempotent(table_id, rows):
@@ -32,6 +39,7 @@ def route_event(event, context):
     Writes to: openclaw.events BigQuery table
     Routes to: Agent Cloud Functions via Cloud Tasks
     Writes to: agent_log sheet
+    Writes to: openclaw.predictions (comm_spike / topic_trend, when a spike is detected)
     """
     try:
         data = json.loads(base64.b64decode(event["data"]).decode())
@@ -50,6 +58,7 @@ def route_event(event, context):
             logger.info(f"Inserted event {event_id} into BigQuery")
 
         # Best-effort NLP enrichment (non-blocking for routing)
+        enrichment = None
         try:
             raw_text = extract_event_text(data)
             if raw_text:
@@ -80,6 +89,13 @@ def route_event(event, context):
         except Exception as nlp_exc:
             logger.error(f"NLP enrichment failed for {event_id}: {nlp_exc}")
 
+        # Online spike detection on sender / entity rates (best-effort)
+        if SPIKE_DETECTION_ENABLED:
+            try:
+                detect_spikes(data, enrichment)
+            except Exception as spike_exc:
+                logger.error(f"Spike detection failed for {event_id}: {spike_exc}")
+
         # Route to agent triggers based on event type
         if source == "gmail" and event_type == "webhook_received":
             logger.info(f"Triggering triage agent for {event_id}")
@@ -104,7 +120,7 @@ def route_event(event, context):
                         "",
                     ],
                 )
-                logger.info(f"Logged routing decision for {event_id} to Sheets")
+                logger.info(f"Queued routing decision for {event_id} for Sheets")
             except Exception as sheet_error:
                 logger.error(f"Failed to log to Sheets: {sheet_error}")
         else:
@@ -145,24 +161,35 @@ def trigger_agent(agent_id, event_data):
         logger.error(f"Failed to trigger agent {agent_id}: {exc}")
 
 
+def detect_spikes(event_data, enrichment):
+    """Feed the event's sender and NLP entities to the spike detector; insert any alerts."""
+    detector = get_spike_detector()
+    event_id = event_data.get("event_id")
+    rows = []
+
+    if event_data.get("source") == "gmail":
+        sender = EMAIL_RE.search((parse_payload(event_data.get("payload")).get("from") or "").lower())
+        if sender:
+            rows.append(detector.observe("sender", sender.group(1), event_id=event_id))
+
+    names = {e.get("name") for e in (enrichment or {}).get("entities", []) if e.get("name")}
+    for name in names:
+        rows.append(detector.observe("entity", name, event_id=event_id))
+
+    detector.maybe_checkpoint()
+
+    rows = [r for r in rows if r]
+    if rows:
+        errors = bq.insert_rows_json(PREDICTIONS_TABLE, rows)
+        if errors:
+            logger.error(f"BigQuery prediction insert errors for {event_id}: {errors}")
+        else:
+            logger.info(f"Detected {len(rows)} spikes on {event_id}")
+
+
 def append_to_sheet(sheet_id, sheet_name, values):
-    """Append a row to a Google Sheet tab."""
-    try:
-        credentials, _ = default()
-        service = build("sheets", "v4", credentials=credentials)
-
-        body = {"values": [values]}
-        response = service.spreadsheets().values().append(
-            spreadsheetId=sheet_id,
-            range=f"{sheet_name}!A:J",
-            valueInputOption="USER_ENTERED",
-            body=body,
-        ).execute()
-
-        logger.debug(f"Appended row to {sheet_name}: {response.get('updates', {}).get('updatedRows', 0)} rows")
-    except Exception as exc:
-        logger.error(f"Failed to append to Sheet {sheet_name}: {exc}")
-        raise
+    """Queue a row for a Google Sheet tab (written in batches by the shared appender)."""
+    get_sheets_appender().append(sheet_id, f"{sheet_name}!A:J", values)
 
 
 def extract_event_text(event_data):
@@ -0,0 +1,286 @@
+"""
+Online communication-spike detection for event_router.
+
+Keeps two exponentially-decayed event counts per key ("sender:<email>",
+"entity:<name>"): a short one (half-life SPIKE_SHORT_HALFLIFE_H) and a long
+baseline (half-life SPIKE_LONG_HALFLIFE_D). When an event arrives, the short
+rate is compared with the baseline rate from before the event. If the ratio
+reaches SPIKE_RATIO, a prediction row is returned for the caller to insert:
+`comm_spike` for senders and `topic_trend` for entities, the same types the
+scheduled pattern_predictor writes. Rates are bias-corrected for keys
+younger than their half-life, so a sender first seen an hour ago is not
+measured against an empty baseline. Keys younger than SPIKE_MIN_HISTORY_H
+never alert, and a key alerts at most once per SPIKE_COOLDOWN_H.
+
+State lives in memory and is checkpointed to GCS (SPIKE_STATE_BUCKET, or
+GCS_STAGING_BUCKET) as SPIKE_STATE_SHARDS JSON objects under
+`openclaw/spike-state/`. Each instance tracks only the increments it has
+observed since its last checkpoint. Every SPIKE_CHECKPOINT_S (and at exit)
+it re-reads the dirty shards, adds its increments, and writes them back
+with a generation precondition. Decayed counts are additive, so concurrent
+instances merge exactly, and a recycled instance picks its baselines back
+up from GCS. Without a bucket, state is per-instance and is lost on
+recycle.
+
+Usage:
+    detector = get_spike_detector()
+    row = detector.observe("sender", "alice@example.com")   # -> prediction row or None
+    detector.maybe_checkpoint()
+"""
+
+import atexit
+import hashlib
+import json
+import logging
+import math
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+
+SPIKE_DETECTION_ENABLED = os.environ.get("SPIKE_DETECTION_ENABLED", "true").lower() not in ("0", "false", "no")
+SPIKE_STATE_BUCKET = os.environ.get("SPIKE_STATE_BUCKET") or os.environ.get("GCS_STAGING_BUCKET")
+SPIKE_STATE_PREFIX = "openclaw/spike-state"
+SPIKE_STATE_SHARDS = int(os.environ.get("SPIKE_STATE_SHARDS", "64"))
+SPIKE_CHECKPOINT_S = int(os.environ.get("SPIKE_CHECKPOINT_S", "60"))
+# Re-read a clean shard this often so other instances' increments show up.
+SPIKE_STATE_REFRESH_S = int(os.environ.get("SPIKE_STATE_REFRESH_S", "300"))
+
+SPIKE_SHORT_HALFLIFE_H = float(os.environ.get("SPIKE_SHORT_HALFLIFE_H", "24"))
+SPIKE_LONG_HALFLIFE_D = float(os.environ.get("SPIKE_LONG_HALFLIFE_D", "14"))
+SPIKE_RATIO = float(os.environ.get("SPIKE_RATIO", "3.0"))
+SPIKE_MIN_HISTORY_H = float(os.environ.get("SPIKE_MIN_HISTORY_H", "24"))
+SPIKE_COOLDOWN_H = float(os.environ.get("SPIKE_COOLDOWN_H", "24"))
+# Same floor as pattern_predictor: at least one event per week of baseline.
+SPIKE_BASELINE_FLOOR_PER_DAY = 1.0 / 7.0
+
+MIN_SHORT_COUNT = {"sender": 5, "entity": 10}
+PREDICTION_TYPES = {"sender": "comm_spike", "entity": "topic_trend"}
+
+DAY_S = 86400.0
+TAU_SHORT_S = SPIKE_SHORT_HALFLIFE_H * 3600 / math.log(2)
+TAU_LONG_S = SPIKE_LONG_HALFLIFE_D * DAY_S / math.log(2)
+# Keys whose baseline has decayed below this are dropped from checkpoints.
+PRUNE_BELOW = 0.01
+SEEN_EVENT_IDS = 10000
+
+# State per key: [short, long, updated_at, first_seen, last_alert]
+SHORT, LONG, UPDATED, FIRST_SEEN, LAST_ALERT = range(5)
+
+
+def _decay(state, now):
+    """Decay a state's counts in place to `now`."""
+    dt = now - state[UPDATED]
+    if dt > 0:
+        state[SHORT] *= math.exp(-dt / TAU_SHORT_S)
+        state[LONG] *= math.exp(-dt / TAU_LONG_S)
+        state[UPDATED] = now
+    return state
+
+
+def _merge(remote, pending, now):
+    """Remote state plus this instance's increments, both decayed to now."""
+    if remote is None:
+        return _decay(list(pending), now)
+    merged = _decay(list(remote), now)
+    inc = _decay(list(pending), now)
+    merged[SHORT] += inc[SHORT]
+    merged[LONG] += inc[LONG]
+    merged[FIRST_SEEN] = min(merged[FIRST_SEEN], inc[FIRST_SEEN])
+    merged[LAST_ALERT] = max(merged[LAST_ALERT], inc[LAST_ALERT])
+    return merged
+
+
+def _rate_per_day(count, tau_s, age_s):
+    """Decayed count -> events/day, corrected for keys younger than the window."""
+    window = tau_s * (1.0 - math.exp(-max(age_s, 3600.0) / tau_s))
+    return count / window * DAY_S
+
+
+class SpikeDetector:
+    """Per-key short/long EWMA rates with sharded GCS checkpoints."""
+
+    def __init__(self, bucket_name=SPIKE_STATE_BUCKET, storage_client=None):
+        self.bucket_name = bucket_name
+        self._storage_client = storage_client
+        self._lock = threading.RLock()
+        self._state = {}
+        self._pending = {}
+        self._shard_loaded_at = {}
+        self._seen = OrderedDict()
+        self._last_checkpoint = time.time()
+        self.stats = {"observed": 0, "alerts": 0, "checkpoints": 0, "conflicts": 0}
+        atexit.register(self.checkpoint)
+
+    def observe(self, kind, name, event_id=None, now=None):
+        """Count one event for (kind, name); return a prediction row if it is a spike."""
+        now = now or time.time()
+        key = f"{kind}:{name}"
+        with self._lock:
+            if event_id:
+                seen_key = (event_id, key)
+                if seen_key in self._seen:
+                    return None
+                self._seen[seen_key] = True
+                if len(self._seen) > SEEN_EVENT_IDS:
+                    self._seen.popitem(last=False)
+
+            shard = self._shard_of(key)
+            if now - self._shard_loaded_at.get(shard, 0.0) >= SPIKE_STATE_REFRESH_S:
+                self._sync_shard(shard, now, write=False)
+
+            state = _decay(self._state.setdefault(key, [0.0, 0.0, now, now, 0.0]), now)
+            pending = _decay(self._pending.setdefault(key, [0.0, 0.0, now, now, 0.0]), now)
+
+            age = now - state[FIRST_SEEN]
+            baseline = max(_rate_per_day(state[LONG], TAU_LONG_S, age), SPIKE_BASELINE_FLOOR_PER_DAY)
+            for s in (state, pending):
+                s[SHORT] += 1.0
+                s[LONG] += 1.0
+            self.stats["observed"] += 1
+
+            recent = _rate_per_day(state[SHORT], TAU_SHORT_S, age)
+            ratio = recent / baseline
+            if (
+                age < SPIKE_MIN_HISTORY_H * 3600
+                or state[SHORT] < MIN_SHORT_COUNT.get(kind, 5)
+                or ratio < SPIKE_RATIO
+                or now - state[LAST_ALERT] < SPIKE_COOLDOWN_H * 3600
+            ):
+                return None
+
+            state[LAST_ALERT] = pending[LAST_ALERT] = now
+            self.stats["alerts"] += 1
+            return self._prediction_row(kind, name, state, recent, baseline, ratio, now)
+
+    def maybe_checkpoint(self):
+        if time.time() - self._last_checkpoint >= SPIKE_CHECKPOINT_S:
+            self.checkpoint()
+
+    def checkpoint(self):
+        """Merge this instance's increments into the GCS shards."""
+        with self._lock:
+            now = self._last_checkpoint = time.time()
+            if self._bucket() is None:
+                # Nothing to persist to; the in-memory state is all there is.
+                self._pending.clear()
+            else:
+                shards = {self._shard_of(key) for key in self._pending}
+                for shard in shards:
+                    self._sync_shard(shard, now, write=True)
+                if shards:
+                    self.stats["checkpoints"] += 1
+            for key in [k for k, v in self._state.items() if k not in self._pending and _decay(list(v), now)[LONG] < PRUNE_BELOW]:
+                del self._state[key]
+
+    def _prediction_row(self, kind, name, state, recent, baseline, ratio, now):
+        ts = datetime.utcfromtimestamp(now)
+        return {
+            "prediction_id": f"pred-{uuid.uuid4().hex[:12]}",
+            "timestamp": ts.isoformat() + "Z",
+            "agent_id": "event_router",
+            "prediction_type": PREDICTION_TYPES.get(kind, "comm_spike"),
+            "target_date": None,
+            "target_entity": name,
+            "prediction_value": {
+                "detector": "ewma",
+                "recent_rate_per_day": round(recent, 2),
+                "baseline_rate_per_day": round(baseline, 2),
+                "ratio_vs_baseline": round(ratio, 2),
+                "recent_count_est": round(state[SHORT], 1),
+                "window": {
+                    "short_halflife_hours": SPIKE_SHORT_HALFLIFE_H,
+                    "long_halflife_days": SPIKE_LONG_HALFLIFE_D,
+                },
+            },
+            "confidence": 0.6,
+            "expires_at": (ts + timedelta(days=8)).isoformat() + "Z",
+            "outcome": None,
+        }
+
+    def _shard_of(self, key):
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return int(digest[:8], 16) % SPIKE_STATE_SHARDS
+
+    def _sync_shard(self, shard, now, write, attempts=3):
+        """Reload a shard; with write=True also fold in and persist pending increments."""
+        self._shard_loaded_at[shard] = now
+        bucket = self._bucket()
+        if bucket is None:
+            return
+        blob_name = f"{SPIKE_STATE_PREFIX}/shard-{shard:03d}.json"
+        dirty = [k for k in self._pending if self._shard_of(k) == shard]
+
+        for _ in range(attempts):
+            try:
+                remote, generation = self._read_shard(bucket, blob_name)
+            except Exception as exc:
+                logger.warning(f"Spike state read failed for shard {shard}: {exc}")
+                return
+
+            merged = dict(remote)
+            for key in dirty:
+                merged[key] = _merge(remote.get(key), self._pending[key], now)
+
+            if write and dirty:
+                body = {k: v for k, v in merged.items() if _decay(list(v), now)[LONG] >= PRUNE_BELOW}
+                try:
+                    bucket.blob(blob_name).upload_from_string(
+                        json.dumps(body, separators=(",", ":")),
+                        content_type="application/json",
+                        if_generation_match=generation,
+                    )
+                except Exception as exc:
+                    if getattr(exc, "code", None) == 412:
+                        self.stats["conflicts"] += 1
+                        continue
+                    logger.warning(f"Spike state write failed for shard {shard}: {exc}")
+                    return
+                for key in dirty:
+                    del self._pending[key]
+
+            for key in [k for k in self._state if self._shard_of(k) == shard]:
+                if key not in merged:
+                    del self._state[key]
+            self._state.update({k: list(v) for k, v in merged.items()})
+            return
+        logger.warning(f"Spike state shard {shard} kept conflicting; keeping increments for next checkpoint")
+
+    def _read_shard(self, bucket, blob_name):
+        """(state dict, generation); generation 0 means the object does not exist yet."""
+        blob = bucket.get_blob(blob_name)
+        if blob is None:
+            return {}, 0
+        # If the object changes after get_blob, the conditional write below fails and retries.
+        data = json.loads(blob.download_as_bytes().decode("utf-8"))
+        return (data if isinstance(data, dict) else {}), blob.generation
+
+    def _bucket(self):
+        if not self.bucket_name:
+            return None
+        if self._storage_client is None:
+            try:
+                from google.cloud import storage
+
+                self._storage_client = storage.Client()
+            except Exception as exc:
+                logger.warning(f"GCS unavailable for spike state: {exc}")
+                self.bucket_name = None
+                return None
+        return self._storage_client.bucket(self.bucket_name)
+
+
+_DETECTOR = None
+
+
+def get_spike_detector():
+    """Process-wide detector (state kept warm across invocations)."""
+    global _DETECTOR
+    if _DETECTOR is None:
+        _DETECTOR = SpikeDetector()
+    return _DETECTOR
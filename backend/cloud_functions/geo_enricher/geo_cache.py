@@ -0,0 +1,157 @@
+"""
+Two-tier cache for Maps geocode and place lookups used by geo_enricher.
+
+Tier 1 is a process-local LRU (survives across warm invocations of the same
+instance). Tier 2 is a GCS-backed key-value store shared by every instance:
+one small JSON object per key under `openclaw/geo-cache/`.
+
+Keys are namespaced strings built by the caller, e.g.:
+    geocode:<normalized address text>
+    place:<place_id>
+    nearby:<lat rounded>,<lng rounded>
+
+Unresolvable lookups are cached as negative entries (value None) with a
+shorter TTL so typos and free-text locations ("Zoom", "TBD") stop costing
+API calls without pinning a transient miss for the full positive TTL.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+CACHE_PREFIX = "openclaw/geo-cache"
+
+GEO_CACHE_TTL_S = int(os.environ.get("GEO_CACHE_TTL_S", str(30 * 24 * 3600)))
+GEO_CACHE_NEGATIVE_TTL_S = int(os.environ.get("GEO_CACHE_NEGATIVE_TTL_S", str(24 * 3600)))
+GEO_CACHE_MAX_ENTRIES = int(os.environ.get("GEO_CACHE_MAX_ENTRIES", "4096"))
+
+# 4 decimal places is ~11m; close enough to share a places_nearby result.
+COORD_PRECISION = 4
+
+_PUNCT_RE = re.compile(r"[^\w\s#\-/]")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_address(raw: str) -> str:
+    """Lowercase, drop punctuation, and collapse whitespace so trivially different strings share a key."""
+    text = _PUNCT_RE.sub(" ", raw.lower())
+    return _SPACE_RE.sub(" ", text).strip()
+
+
+def coords_key(lat: float, lng: float) -> str:
+    return f"{round(lat, COORD_PRECISION):.{COORD_PRECISION}f},{round(lng, COORD_PRECISION):.{COORD_PRECISION}f}"
+
+
+class GeoCache:
+    """In-process LRU in front of a shared GCS key-value tier, with TTL and negative caching."""
+
+    def __init__(
+        self,
+        bucket_name: Optional[str] = None,
+        storage_client=None,
+        max_entries: int = GEO_CACHE_MAX_ENTRIES,
+        ttl_s: int = GEO_CACHE_TTL_S,
+        negative_ttl_s: int = GEO_CACHE_NEGATIVE_TTL_S,
+    ):
+        self.bucket_name = bucket_name
+        self._storage_client = storage_client
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.negative_ttl_s = negative_ttl_s
+
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.stats = {"memory_hits": 0, "gcs_hits": 0, "negative_hits": 0, "misses": 0}
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """Return (hit, value). A hit with value None is a cached negative result."""
+        now = time.time()
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                if value is None:
+                    self.stats["negative_hits"] += 1
+                return True, value
+            del self._entries[key]
+
+        stored = self._read_gcs(key)
+        if stored is not None and stored.get("expires_at", 0) > now:
+            value = stored.get("value")
+            self._remember(key, stored["expires_at"], value)
+            self.stats["gcs_hits"] += 1
+            if value is None:
+                self.stats["negative_hits"] += 1
+            return True, value
+
+        self.stats["misses"] += 1
+        return False, None
+
+    def put(self, key: str, value: Any) -> None:
+        """Store a value; pass None to record that the lookup resolved to nothing."""
+        ttl = self.negative_ttl_s if value is None else self.ttl_s
+        expires_at = time.time() + ttl
+        self._remember(key, expires_at, value)
+        self._write_gcs(key, expires_at, value)
+
+    def _remember(self, key: str, expires_at: float, value: Any) -> None:
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _object_name(self, key: str) -> str:
+        return f"{CACHE_PREFIX}/{hashlib.sha256(key.encode('utf-8')).hexdigest()}.json"
+
+    def _read_gcs(self, key: str) -> Optional[Dict[str, Any]]:
+        bucket = self._bucket()
+        if bucket is None:
+            return None
+        try:
+            blob = bucket.blob(self._object_name(key))
+            if not blob.exists():
+                return None
+            data = json.loads(blob.download_as_bytes().decode("utf-8"))
+        except Exception as exc:
+            logger.warning(f"Geo cache read failed key={key[:80]}: {exc}")
+            return None
+        # Guard against sha256 collisions / foreign objects.
+        if not isinstance(data, dict) or data.get("key") != key:
+            return None
+        return data
+
+    def _write_gcs(self, key: str, expires_at: float, value: Any) -> None:
+        bucket = self._bucket()
+        if bucket is None:
+            return
+        body = {"key": key, "cached_at": time.time(), "expires_at": expires_at, "value": value}
+        try:
+            bucket.blob(self._object_name(key)).upload_from_string(
+                json.dumps(body, default=str), content_type="application/json"
+            )
+        except Exception as exc:
+            logger.warning(f"Geo cache write failed key={key[:80]}: {exc}")
+
+    def _bucket(self):
+        if not self.bucket_name:
+            return None
+        if self._storage_client is None:
+            try:
+                from google.cloud import storage
+
+                self._storage_client = storage.Client()
+            except Exception as exc:
+                logger.warning(f"GCS unavailable for geo cache: {exc}")
+                self.bucket_name = None
+                return None
+        return self._storage_client.bucket(self.bucket_name)
@@ -10,6 +10,8 @@ from typing import Any, Dict, Optional, Tuple
 import googlemaps
 from google.cloud import bigquery
 
+from geo_cache import GeoCache, coords_key, normalize_address
+
 logger = logging.getLogger(__name__)
 
 
@@ -19,6 +21,13 @@ GEO_TABLE_ID = os.environ.get("BQ_GEO_TABLE") or (
 )
 GOOGLE_MAPS_API_KEY = os.environ.get("GOOGLE_MAPS_API_KEY")
 
+# Persistent tier of the geocode/place cache (shared across instances).
+GEO_CACHE_BUCKET = os.environ.get("GEO_CACHE_BUCKET") or os.environ.get("GCS_STAGING_BUCKET")
+
+# Module-level so warm instances keep the in-process LRU between invocations.
+_geo_cache = GeoCache(bucket_name=GEO_CACHE_BUCKET)
+_gmaps: Optional[googlemaps.Client] = None
+
 
 ADDRESS_HINT_RE = re.compile(
     r"(?P<addr>\d{1,6}\s+[\w\s.\-#]{3,},?\s+[\w\s.\-]{2,},?\s+[A-Z]{2}\s+\d{5}(-\d{4})?)"
@@ -64,10 +73,11 @@ def geo_enricher(event, context):
     if _geo_exists(bq, geo_id):
         return "OK"
 
-    gmaps = googlemaps.Client(key=GOOGLE_MAPS_API_KEY)
+    gmaps = _get_gmaps()
 
     lat, lng, formatted, place_id = _geocode_or_parse_coords(gmaps, raw_location)
     place_name, place_types, place_rating, metadata = _place_details(gmaps, place_id, lat, lng)
+    logger.info(f"Geo cache stats: {_geo_cache.stats}")
 
     row = {
         "geo_id": geo_id,
@@ -95,6 +105,13 @@ def geo_enricher(event, context):
     return "OK"
 
 
+def _get_gmaps() -> googlemaps.Client:
+    global _gmaps
+    if _gmaps is None:
+        _gmaps = googlemaps.Client(key=GOOGLE_MAPS_API_KEY)
+    return _gmaps
+
+
 def _geo_exists(bq: bigquery.Client, geo_id: str) -> bool:
     query = f"SELECT COUNT(*) AS cnt FROM `{GEO_TABLE_ID}` WHERE geo_id = @geo_id"
     job_config = bigquery.QueryJobConfig(
@@ -153,13 +170,22 @@ def _geocode_or_parse_coords(
         except Exception:
             pass
 
+    cache_key = f"geocode:{normalize_address(raw_location)}"
+    hit, cached = _geo_cache.get(cache_key)
+    if hit:
+        if cached is None:
+            return None, None, None, None
+        return cached["lat"], cached["lng"], cached["formatted"], cached["place_id"]
+
     try:
         results = gmaps.geocode(raw_location)
     except Exception as exc:
+        # Transient failures are not cached.
         logger.error(f"Geocoding failed for location='{raw_location}': {exc}")
         return None, None, None, None
 
     if not results:
+        _geo_cache.put(cache_key, None)
         return None, None, None, None
 
     top = results[0]
@@ -168,6 +194,7 @@ def _geocode_or_parse_coords(
     loc = (top.get("geometry") or {}).get("location") or {}
     lat = loc.get("lat")
     lng = loc.get("lng")
+    _geo_cache.put(cache_key, {"lat": lat, "lng": lng, "formatted": formatted, "place_id": place_id})
     return lat, lng, formatted, place_id
 
 
@@ -178,36 +205,34 @@ def _place_details(
     lng: Optional[float],
 ) -> Tuple[Optional[str], Any, Optional[float], Any]:
     if place_id:
+        cache_key = f"place:{place_id}"
+        hit, cached = _geo_cache.get(cache_key)
+        if hit:
+            return _place_tuple(cached)
         try:
             details = gmaps.place(
                 place_id=place_id,
                 fields=["name", "types", "rating", "url", "website", "formatted_phone_number"],
             )
-            result = details.get("result") or {}
-            return (
-                result.get("name"),
-                result.get("types"),
-                result.get("rating"),
-                result,
-            )
+            result = details.get("result") or None
+            _geo_cache.put(cache_key, result)
+            return _place_tuple(result)
         except Exception as exc:
             logger.warning(f"Place details failed place_id={place_id}: {exc}")
             return None, None, None, None
 
     # If we have coordinates but no place_id, try nearby search.
     if lat is not None and lng is not None:
+        cache_key = f"nearby:{coords_key(lat, lng)}"
+        hit, cached = _geo_cache.get(cache_key)
+        if hit:
+            return _place_tuple(cached)
         try:
             nearby = gmaps.places_nearby(location=(lat, lng), radius=50)
             results = nearby.get("results") or []
-            if not results:
-                return None, None, None, None
-            top = results[0]
-            return (
-                top.get("name"),
-                top.get("types"),
-                top.get("rating"),
-                top,
-            )
+            top = results[0] if results else None
+            _geo_cache.put(cache_key, top)
+            return _place_tuple(top)
         except Exception as exc:
             logger.warning(f"Places nearby failed lat={lat} lng={lng}: {exc}")
             return None, None, None, None
@@ -215,6 +240,17 @@ def _place_details(
     return None, None, None, None
 
 
+def _place_tuple(result: Optional[Dict[str, Any]]) -> Tuple[Optional[str], Any, Optional[float], Any]:
+    if not result:
+        return None, None, None, None
+    return (
+        result.get("name"),
+        result.get("types"),
+        result.get("rating"),
+        result,
+    )
+
+
 def _parse_payload(payload: Any) -> Dict[str, Any]:
     if payload is None:
         return {}
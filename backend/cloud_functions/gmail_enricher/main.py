@@ -9,6 +9,8 @@ from google.cloud import bigquery, language_v1
 import vertexai
 from vertexai.generative_models import GenerativeModel, GenerationConfig
 
+from llm_cache import get_llm_cache
+
 logger = logging.getLogger(__name__)
 
 bq = bigquery.Client()
@@ -224,31 +226,54 @@ def analyze_with_gemini(event_id, event_data, raw_text):
     confidence = 0.0
     input_tokens = 0
     output_tokens = 0
+    generation_config = {
+        "temperature": 0.2,
+        "max_output_tokens": 2048,
+        "response_mime_type": "application/json",
+    }
+    cache = get_llm_cache()
+    cache_key = cache.key(VERTEX_MODEL, full_prompt, generation_config) if cache else None
+    cached = None
 
     try:
-        model = GenerativeModel(VERTEX_MODEL)
-        response = model.generate_content(
-            full_prompt,
-            generation_config=GenerationConfig(
-                temperature=0.2,
-                max_output_tokens=2048,
-                response_mime_type="application/json",
-            ),
-        )
+        if cache_key:
+            try:
+                cached = cache.get(cache_key)
+            except Exception as exc:
+                # A broken cache must not cost the analysis; fall back to the model.
+                logger.warning(f"LLM cache lookup failed for {event_id}: {exc}")
+
+        if cached is not None:
+            raw_output = cached["text"]
+        else:
+            model = GenerativeModel(VERTEX_MODEL)
+            response = model.generate_content(
+                full_prompt,
+                generation_config=GenerationConfig(**generation_config),
+            )
+            raw_output = response.text
+
+            if hasattr(response, "usage_metadata") and response.usage_metadata:
+                input_tokens = getattr(response.usage_metadata, "prompt_token_count", 0)
+                output_tokens = getattr(response.usage_metadata, "candidates_token_count", 0)
 
-        raw_output = response.text
         structured_output = parse_json_response(raw_output)
         confidence = structured_output.get("confidence", 0.5)
 
-        if hasattr(response, "usage_metadata") and response.usage_metadata:
-            input_tokens = getattr(response.usage_metadata, "prompt_token_count", 0)
-            output_tokens = getattr(response.usage_metadata, "candidates_token_count", 0)
+        if cached is None and cache_key and raw_output and "raw_response" not in structured_output:
+            cache.put(
+                cache_key,
+                {"text": raw_output, "input_tokens": input_tokens, "output_tokens": output_tokens},
+                analysis_type="gmail_enrichment",
+            )
 
     except Exception as exc:
         error_msg = str(exc)
         logger.error(f"Gemini analysis failed for {event_id}: {exc}")
 
     latency_ms = int((time.time() - start_time) * 1000)
+    if cache:
+        logger.info(f"Gemini cache {'hit' if cached is not None else 'miss'} for {event_id}: {cache.report()}")
 
     return {
         "analysis_id": analysis_id,
@@ -266,6 +291,7 @@ def analyze_with_gemini(event_id, event_data, raw_text):
         "token_count_output": output_tokens,
         "latency_ms": latency_ms,
         "error": error_msg,
+        "cache_hit": cached is not None,
     }
 
 
@@ -1,15 +1,317 @@
 import json
+import logging
 import os
 import hashlib
+import threading
+import time
 from datetime import datetime, timedelta
+from email.utils import parseaddr
 
 from google.auth import default
 from google.cloud import bigquery
 from googleapiclient.discovery import build
 
+from sheets_appender import get_sheets_appender
+
 
 credentials, _ = default()
 
+logger = logging.getLogger(__name__)
+
+TASKS_RANGE = "tasks!A:L"
+AGENT_LOG_RANGE = "agent_log!A:J"
+CONTACTS_RANGE = "contacts!A:G"
+
+# Tasks/contacts snapshot shared by every AgentContextBuilder in the process.
+CONTEXT_SNAPSHOT_ENABLED = os.environ.get("CONTEXT_SNAPSHOT_ENABLED", "true").lower() not in ("0", "false", "no")
+CONTEXT_SNAPSHOT_TTL_S = int(os.environ.get("CONTEXT_SNAPSHOT_TTL_S", "60"))
+
+# Per-sender recent-email aggregates: how long a SQL seed is trusted before
+# re-reading (other instances see emails this one does not), and the widest
+# window kept in memory.
+RECENT_EMAIL_SEED_TTL_S = int(os.environ.get("RECENT_EMAIL_SEED_TTL_S", "300"))
+RECENT_EMAIL_MAX_HOURS = int(os.environ.get("RECENT_EMAIL_MAX_HOURS", "24"))
+RECENT_EMAIL_MAX_SENDERS = int(os.environ.get("RECENT_EMAIL_MAX_SENDERS", "20000"))
+RECENT_EMAIL_SEED_LIMIT = 1000
+
+OPEN_STATUSES = ("pending", "in_progress")
+PRIORITY_ORDER = {"P0": 0, "P1": 1, "P2": 2, "P3": 3, "P4": 4}
+
+
+def _rows_to_dicts(rows):
+    """Header row + data rows -> list of dicts (short rows padded with "")."""
+    if not rows:
+        return []
+    headers = rows[0]
+    return [dict(zip(headers, row + [""] * (len(headers) - len(row)))) for row in rows[1:]]
+
+
+class DataLakeSnapshot:
+    """
+    In-memory tasks + contacts tabs, indexed for per-event reads.
+
+    Both tabs are read in one batchGet. After CONTEXT_SNAPSHOT_TTL_S a
+    background thread checks the spreadsheet's Drive `modifiedTime` and
+    re-reads only if it changed; readers keep getting the current snapshot
+    meanwhile, so a read never waits on Sheets after the first load.
+    Use get_snapshot(sheet_id) to share one per spreadsheet.
+    """
+
+    def __init__(self, sheet_id, ttl_s=CONTEXT_SNAPSHOT_TTL_S):
+        self.sheet_id = sheet_id
+        self.ttl_s = ttl_s
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._loaded = False
+        self._checked_at = 0.0
+        self._modified_time = None
+        # Own API clients: googleapiclient objects are not thread-safe.
+        self._sheets = None
+        self._drive = None
+
+        self.tasks_by_id = {}
+        self.open_tasks = []
+        self.open_tasks_by_assignee = {}
+        self.contacts_by_email = {}
+        self._contacts_by_lower = {}
+
+        self.stats = {"loads": 0, "revalidations": 0, "load_failures": 0}
+
+    def ensure_fresh(self):
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._refresh(check_version=False)
+            return
+        if time.time() - self._checked_at < self.ttl_s:
+            return
+        with self._lock:
+            if self._refreshing or time.time() - self._checked_at < self.ttl_s:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._background_refresh, daemon=True).start()
+
+    def invalidate(self):
+        """Re-read (in the background) on the next access; called after this process writes the sheet."""
+        self._checked_at = 0.0
+        self._modified_time = None
+
+    def contact(self, email):
+        self.ensure_fresh()
+        if not email:
+            return None
+        contact = self.contacts_by_email.get(email)
+        return contact if contact is not None else self._contacts_by_lower.get(email.lower())
+
+    def task(self, task_id):
+        self.ensure_fresh()
+        return self.tasks_by_id.get(task_id)
+
+    def _background_refresh(self):
+        try:
+            with self._lock:
+                self._refresh(check_version=True)
+        finally:
+            self._refreshing = False
+
+    def _refresh(self, check_version):
+        self._checked_at = time.time()
+        modified_time = self._drive_modified_time()
+        if check_version and modified_time is not None and modified_time == self._modified_time:
+            self.stats["revalidations"] += 1
+            return
+        try:
+            if self._sheets is None:
+                self._sheets = build("sheets", "v4", credentials=credentials)
+            result = (
+                self._sheets.spreadsheets()
+                .values()
+                .batchGet(spreadsheetId=self.sheet_id, ranges=[TASKS_RANGE, CONTACTS_RANGE])
+                .execute()
+            )
+        except Exception as exc:
+            self.stats["load_failures"] += 1
+            logger.warning(f"Context snapshot load failed, keeping previous: {exc}")
+            return
+        value_ranges = result.get("valueRanges", [])
+        tasks = _rows_to_dicts(value_ranges[0].get("values", []) if value_ranges else [])
+        contacts = _rows_to_dicts(value_ranges[1].get("values", []) if len(value_ranges) > 1 else [])
+        self._index(tasks, contacts)
+        self._modified_time = modified_time
+        self._loaded = True
+        self.stats["loads"] += 1
+        logger.info(f"Context snapshot loaded: {len(tasks)} tasks, {len(contacts)} contacts")
+
+    def _drive_modified_time(self):
+        try:
+            if self._drive is None:
+                self._drive = build("drive", "v3", credentials=credentials)
+            meta = self._drive.files().get(fileId=self.sheet_id, fields="modifiedTime").execute()
+            return meta.get("modifiedTime")
+        except Exception as exc:
+            logger.info(f"Drive modifiedTime check unavailable: {exc}")
+            return None
+
+    def _index(self, tasks, contacts):
+        tasks_by_id = {}
+        open_tasks = []
+        for task in tasks:
+            task_id = task.get("task_id") or next(iter(task.values()), "")
+            if task_id:
+                tasks_by_id.setdefault(task_id, task)
+            if task.get("status") in OPEN_STATUSES:
+                open_tasks.append(task)
+        open_tasks.sort(key=lambda t: PRIORITY_ORDER.get(t.get("priority", "P2"), 2))
+
+        by_assignee = {}
+        for task in open_tasks:
+            by_assignee.setdefault(task.get("assigned_to"), []).append(task)
+
+        contacts_by_email = {}
+        for contact in contacts:
+            email = next(iter(contact.values()), "")
+            if email and email not in contacts_by_email:
+                contacts_by_email[email] = contact
+        by_lower = {}
+        for email, contact in contacts_by_email.items():
+            by_lower.setdefault(email.lower(), contact)
+
+        # Swap whole structures so concurrent readers never see a partial index.
+        self.tasks_by_id = tasks_by_id
+        self.open_tasks = open_tasks
+        self.open_tasks_by_assignee = by_assignee
+        self.contacts_by_email = contacts_by_email
+        self._contacts_by_lower = by_lower
+
+
+def _sender_address(from_header):
+    """'Name <a@b.com>' -> 'a@b.com' (lowercased); None when there is no address."""
+    if not from_header:
+        return None
+    return parseaddr(from_header)[1].lower() or None
+
+
+def _to_epoch(value):
+    if isinstance(value, datetime):
+        return value.timestamp() if value.tzinfo else (value - datetime(1970, 1, 1)).total_seconds()
+    if isinstance(value, str) and value:
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        return _to_epoch(parsed)
+    return None
+
+
+class RecentEmailWindow:
+    """
+    Per-sender sliding window over recent Gmail events.
+
+    Holds {event_id: (epoch seconds, thread_id)} per sender, so a SQL seed
+    and the same event arriving through observe() count once. Entries older
+    than RECENT_EMAIL_MAX_HOURS are dropped as senders are touched.
+    """
+
+    def __init__(self, max_hours=RECENT_EMAIL_MAX_HOURS, seed_ttl_s=RECENT_EMAIL_SEED_TTL_S):
+        self.max_age_s = max_hours * 3600
+        self.seed_ttl_s = seed_ttl_s
+        self._lock = threading.Lock()
+        self._events = {}
+        self._seeded_at = {}
+
+    def needs_seed(self, sender):
+        return time.time() - self._seeded_at.get(sender, 0.0) >= self.seed_ttl_s
+
+    def seed(self, sender, rows):
+        with self._lock:
+            events = self._events.setdefault(sender, {})
+            for row in rows:
+                ts = _to_epoch(row.timestamp)
+                if ts is not None:
+                    events[row.event_id] = (ts, row.thread_id)
+            self._seeded_at[sender] = time.time()
+            self._evict(sender)
+
+    def observe(self, event_data):
+        if event_data.get("source") != "gmail":
+            return
+        payload = event_data.get("payload")
+        if isinstance(payload, str):
+            try:
+                payload = json.loads(payload)
+            except json.JSONDecodeError:
+                return
+        if not isinstance(payload, dict):
+            return
+        sender = _sender_address(payload.get("from"))
+        ts = _to_epoch(event_data.get("timestamp")) or time.time()
+        if not sender:
+            return
+        with self._lock:
+            self._events.setdefault(sender, {})[event_data.get("event_id")] = (ts, payload.get("thread_id"))
+            self._evict(sender)
+            if len(self._events) > RECENT_EMAIL_MAX_SENDERS:
+                self._sweep()
+
+    def activity(self, sender, hours=24):
+        cutoff = time.time() - hours * 3600
+        with self._lock:
+            self._evict(sender)
+            recent = [v for v in self._events.get(sender, {}).values() if v[0] > cutoff]
+        threads = {}
+        for ts, thread_id in recent:
+            if thread_id and ts > threads.get(thread_id, 0.0):
+                threads[thread_id] = ts
+        return {
+            "count": len(recent),
+            "last_seen": _iso(max((ts for ts, _ in recent), default=None)),
+            "thread_last_activity": {t: _iso(ts) for t, ts in threads.items()},
+        }
+
+    def _evict(self, sender):
+        events = self._events.get(sender)
+        if not events:
+            return
+        cutoff = time.time() - self.max_age_s
+        for event_id in [k for k, (ts, _) in events.items() if ts <= cutoff]:
+            del events[event_id]
+
+    def _sweep(self):
+        """Forget senders with nothing left in the window."""
+        for sender in list(self._events):
+            self._evict(sender)
+            if not self._events[sender]:
+                del self._events[sender]
+                self._seeded_at.pop(sender, None)
+
+
+def _iso(epoch):
+    return datetime.utcfromtimestamp(epoch).isoformat() + "Z" if epoch is not None else None
+
+
+_RECENT_EMAILS = None
+
+
+def get_recent_email_window():
+    """Process-wide recent-email window (kept warm across invocations)."""
+    global _RECENT_EMAILS
+    if _RECENT_EMAILS is None:
+        _RECENT_EMAILS = RecentEmailWindow()
+    return _RECENT_EMAILS
+
+
+_SNAPSHOTS = {}
+_SNAPSHOTS_LOCK = threading.Lock()
+
+
+def get_snapshot(sheet_id):
+    """Process-wide snapshot for a spreadsheet (kept warm across invocations)."""
+    with _SNAPSHOTS_LOCK:
+        snapshot = _SNAPSHOTS.get(sheet_id)
+        if snapshot is None:
+            snapshot = _SNAPSHOTS[sheet_id] = DataLakeSnapshot(sheet_id)
+        return snapshot
+
 
 class AgentContextBuilder:
     """Read state from Google data lake."""
@@ -22,29 +324,29 @@ class AgentContextBuilder:
         self.drive = build("drive", "v3", credentials=credentials)
 
     def get_open_tasks(self, assigned_to=None, priority_filter=None):
-        """Get open tasks from Sheets."""
+        """Get open tasks (from the shared snapshot; treat the dicts as read-only)."""
+        if CONTEXT_SNAPSHOT_ENABLED:
+            snapshot = get_snapshot(self.sheet_id)
+            snapshot.ensure_fresh()
+            if assigned_to:
+                tasks = snapshot.open_tasks_by_assignee.get(assigned_to, [])
+            else:
+                tasks = snapshot.open_tasks
+            if priority_filter:
+                return [t for t in tasks if t.get("priority") == priority_filter]
+            return list(tasks)
+
         result = (
             self.sheets.spreadsheets()
             .values()
-            .get(spreadsheetId=self.sheet_id, range="tasks!A:L")
+            .get(spreadsheetId=self.sheet_id, range=TASKS_RANGE)
             .execute()
         )
 
-        rows = result.get("values", [])
-        if not rows:
-            return []
-
-        headers = rows[0]
         tasks = []
-
-        for row in rows[1:]:
-            if len(row) < len(headers):
-                row = row + [""] * (len(headers) - len(row))
-
-            task = dict(zip(headers, row))
-
+        for task in _rows_to_dicts(result.get("values", [])):
             # Filter
-            if task.get("status") not in ("pending", "in_progress"):
+            if task.get("status") not in OPEN_STATUSES:
                 continue
             if assigned_to and task.get("assigned_to") != assigned_to:
                 continue
@@ -53,19 +355,26 @@ class AgentContextBuilder:
 
             tasks.append(task)
 
-        return sorted(
-            tasks,
-            key=lambda t: {
-                "P0": 0,
-                "P1": 1,
-                "P2": 2,
-                "P3": 3,
-                "P4": 4,
-            }.get(t.get("priority", "P2"), 2),
+        return sorted(tasks, key=lambda t: PRIORITY_ORDER.get(t.get("priority", "P2"), 2))
+
+    def get_task(self, task_id):
+        """Get one task row by task_id (any status), or None."""
+        if CONTEXT_SNAPSHOT_ENABLED:
+            return get_snapshot(self.sheet_id).task(task_id)
+        result = (
+            self.sheets.spreadsheets()
+            .values()
+            .get(spreadsheetId=self.sheet_id, range=TASKS_RANGE)
+            .execute()
         )
+        for task in _rows_to_dicts(result.get("values", [])):
+            if next(iter(task.values()), "") == task_id:
+                return task
+        return None
 
-    def get_recent_emails(self, hours=24, from_email=None):
-        """Query BigQuery for recent Gmail activity."""
+    def get_recent_emails(self, hours=24, from_email=None, limit=50):
+        """Query BigQuery for recent Gmail activity, optionally from one sender."""
+        # The timestamp bound prunes partitions; the sender filter runs before LIMIT.
         query = """
         SELECT
           event_id,
@@ -78,40 +387,77 @@ class AgentContextBuilder:
         FROM `{project}.openclaw.events`
         WHERE source = 'gmail'
           AND timestamp > TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL @hours HOUR)
+          AND (
+            @sender IS NULL
+            OR LOWER(REGEXP_EXTRACT(JSON_VALUE(payload, '$.from'), r'[^<\\s]+@[^>\\s]+')) = @sender
+          )
         ORDER BY timestamp DESC
-        LIMIT 50
+        LIMIT @limit
         """.format(project=self.project_id)
 
         job_config = bigquery.QueryJobConfig(
             query_parameters=[
                 bigquery.ScalarQueryParameter("hours", "INT64", hours),
+                bigquery.ScalarQueryParameter("sender", "STRING", _sender_address(from_email)),
+                bigquery.ScalarQueryParameter("limit", "INT64", limit),
             ]
         )
 
-        rows = list(self.bq.query(query, job_config=job_config))
-        if from_email:
-            rows = [row for row in rows if row.from_email == from_email]
-        return rows
+        return list(self.bq.query(query, job_config=job_config))
+
+    def observe_event(self, event_data):
+        """Feed an event this process is handling into the recent-email window."""
+        get_recent_email_window().observe(event_data)
+
+    def get_sender_activity(self, from_email, hours=24):
+        """
+        Recent-email aggregates for a sender from the process-wide window.
+
+        Returns dict with count, last_seen and thread_last_activity
+        ({thread_id: timestamp}). The sender's window is seeded from
+        get_recent_emails() and re-seeded every RECENT_EMAIL_SEED_TTL_S;
+        in between it is kept current by observe_event().
+        """
+        window = get_recent_email_window()
+        sender = _sender_address(from_email)
+        if sender and window.needs_seed(sender):
+            rows = self.get_recent_emails(
+                hours=RECENT_EMAIL_MAX_HOURS, from_email=sender, limit=RECENT_EMAIL_SEED_LIMIT
+            )
+            window.seed(sender, rows)
+        return window.activity(sender, hours=hours)
 
     def get_contact_info(self, email):
-        """Get contact record from Sheets."""
+        """Get contact record by email (exact, then case-insensitive)."""
+        if CONTEXT_SNAPSHOT_ENABLED:
+            return get_snapshot(self.sheet_id).contact(email)
+        return self.get_contacts().get(email)
+
+    def get_contacts(self):
+        """Get all contact records, keyed by email (first row wins)."""
+        if CONTEXT_SNAPSHOT_ENABLED:
+            snapshot = get_snapshot(self.sheet_id)
+            snapshot.ensure_fresh()
+            return dict(snapshot.contacts_by_email)
+
         result = (
             self.sheets.spreadsheets()
             .values()
-            .get(spreadsheetId=self.sheet_id, range="contacts!A:G")
+            .get(spreadsheetId=self.sheet_id, range=CONTACTS_RANGE)
             .execute()
         )
 
         rows = result.get("values", [])
         if not rows:
-            return None
+            return {}
 
         headers = rows[0]
+        contacts = {}
         for row in rows[1:]:
-            if len(row) > 0 and row[0] == email:
-                return dict(zip(headers, row + [""] * (len(headers) - len(row))))
+            if len(row) > 0 and row[0] not in contacts:
+                contacts[row[0]] = dict(zip(headers, row + [""] * (len(headers) - len(row))))
 
-        return None
+        return contacts
 
 
 class AgentStateWriter:
@@ -143,28 +489,23 @@ class AgentStateWriter:
             f"{entity_type}{entity_id}{action_type}".encode()
         ).hexdigest()[:12]
 
-        # Write to Sheets
-        self.sheets.spreadsheets().values().append(
-            spreadsheetId=self.sheet_id,
-            range="agent_log!A:J",
-            valueInputOption="USER_ENTERED",
-            body={
-                "values": [
-                    [
-                        ts,
-                        agent_id,
-                        action_type,
-                        entity_type,
-                        entity_id,
-                        summary,
-                        input_hash,
-                        rationale,
-                        confidence,
-                        parent_id,
-                    ]
-                ]
-            },
-        ).execute()
+        # Write to Sheets (write-behind: batched with other rows for the tab)
+        get_sheets_appender().append(
+            self.sheet_id,
+            AGENT_LOG_RANGE,
+            [
+                ts,
+                agent_id,
+                action_type,
+                entity_type,
+                entity_id,
+                summary,
+                input_hash,
+                rationale,
+                confidence,
+                parent_id,
+            ],
+        )
 
         # Write to BigQuery
         self.bq.insert_rows_json(
@@ -204,38 +545,37 @@ class AgentStateWriter:
         if not due_date:
             due_date = (datetime.utcnow() + timedelta(days=3)).strftime("%Y-%m-%d")
 
-        self.sheets.spreadsheets().values().append(
-            spreadsheetId=self.sheet_id,
-            range="tasks!A:L",
-            valueInputOption="USER_ENTERED",
-            body={
-                "values": [
-                    [
-                        task_id,
-                        ts,
-                        "agent",
-                        title,
-                        "pending",
-                        priority,
-                        "unassigned",
-                        "agent",
-                        "",
-                        due_date,
-                        json.dumps(context_json or {}),
-                        ts,
-                    ]
-                ]
-            },
-        ).execute()
+        snapshot = get_snapshot(self.sheet_id) if CONTEXT_SNAPSHOT_ENABLED else None
+        get_sheets_appender().append(
+            self.sheet_id,
+            TASKS_RANGE,
+            [
+                task_id,
+                ts,
+                "agent",
+                title,
+                "pending",
+                priority,
+                "unassigned",
+                "agent",
+                "",
+                due_date,
+                json.dumps(context_json or {}),
+                ts,
+            ],
+            on_flushed=snapshot.invalidate if snapshot else None,
+        )
 
         return task_id
 
     def update_task(self, task_id, updates):
         """Update a task row in Sheets by task_id."""
+        # The task may still be in the write-behind buffer.
+        get_sheets_appender().flush()
         result = (
             self.sheets.spreadsheets()
             .values()
-            .get(spreadsheetId=self.sheet_id, range="tasks!A:L")
+            .get(spreadsheetId=self.sheet_id, range=TASKS_RANGE)
             .execute()
         )
 
@@ -255,6 +595,8 @@ class AgentStateWriter:
                     valueInputOption="USER_ENTERED",
                     body={"values": [new_row]},
                 ).execute()
+                if CONTEXT_SNAPSHOT_ENABLED:
+                    get_snapshot(self.sheet_id).invalidate()
                 return True
 
         return False
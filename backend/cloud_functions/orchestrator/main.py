@@ -5,7 +5,7 @@ Pub/Sub-triggered function that runs the full AI pipeline on incoming events.
 
 Triggered by: openclaw-events Pub/Sub topic
 Pipeline: Event -> Enrich -> Analyze -> Decide -> Act
-Writes to: BigQuery (ai_analysis, ai_decisions, events, nlp_enrichment), Sheets
+Writes to: BigQuery (ai_analysis, ai_decisions, ai_decision_executions, events, nlp_enrichment), Sheets
 
 Deploy:
     gcloud functions deploy openclaw-orchestrator \
@@ -22,13 +22,15 @@ import json
 import logging
 import os
 
-from openclaw_orchestrator import OpenClawOrchestrator
+from openclaw_orchestrator import AsyncOpenClawOrchestrator, OpenClawOrchestrator
 
 logger = logging.getLogger(__name__)
 
 PROJECT_ID = os.environ.get("PROJECT_ID") or os.environ.get("GOOGLE_PROJECT_ID")
 SHEET_ID = os.environ.get("SHEET_ID") or os.environ.get("GOOGLE_SHEET_ID")
 REGION = os.environ.get("VERTEX_REGION", "us-central1")
+# "async" runs independent stages concurrently and defers BigQuery writes.
+ORCHESTRATOR_MODE = os.environ.get("ORCHESTRATOR_MODE", "sync").lower()
 
 
 def orchestrate_event(event, context):
@@ -58,11 +60,15 @@ def orchestrate_event(event, context):
             logger.info(f"Skipping action event {event_id}")
             return "OK"
 
-        orchestrator = OpenClawOrchestrator(PROJECT_ID, SHEET_ID, region=REGION)
+        orchestrator_cls = (
+            AsyncOpenClawOrchestrator if ORCHESTRATOR_MODE == "async" else OpenClawOrchestrator
+        )
+        orchestrator = orchestrator_cls(PROJECT_ID, SHEET_ID, region=REGION)
         result = orchestrator.process_event(data)
 
         logger.info(
-            f"Pipeline completed for {event_id}: outcome={result.get('outcome')}"
+            f"Pipeline completed for {event_id}: outcome={result.get('outcome')} "
+            f"timings_ms={result.get('timings_ms')} llm_cache={orchestrator.analyzer.cache_report()}"
         )
         return "OK"
 
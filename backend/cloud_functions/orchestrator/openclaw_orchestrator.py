@@ -9,18 +9,36 @@ it reads context from Google (Sheets + BigQuery) and writes results back.
 Usage:
     orchestrator = OpenClawOrchestrator(project_id, sheet_id)
     result = orchestrator.process_event(event_data)
+
+    # Same pipeline as a dependency graph with concurrent I/O:
+    orchestrator = AsyncOpenClawOrchestrator(project_id, sheet_id)
+    result = orchestrator.process_event(event_data)
+
+    # From async code the BigQuery flush runs in the background; drain at batch end:
+    result = await orchestrator.process_event_async(event_data)
+    await orchestrator.drain_async()
+
+    # Backlogs: shared context snapshot, bounded concurrency, bulk writes:
+    summary = orchestrator.process_events(events)
 """
 
+import asyncio
 import json
 import logging
 import os
+import random
+import threading
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 from google.cloud import bigquery, language_v1
 from google.auth import default
 
 from agent_context import AgentContextBuilder, AgentStateWriter
+from preclassifier import PRECLASSIFY_MIN_CONFIDENCE, PRECLASSIFY_SHADOW_RATE, PreClassifier
+from sheets_appender import get_sheets_appender
 from vertex_ai import GeminiAnalyzer
 
 logger = logging.getLogger(__name__)
@@ -29,6 +47,16 @@ credentials, _ = default()
 
 AGENT_ID = "orchestrator"
 
+# Pipelines (and therefore Gemini calls) in flight at once in process_events().
+BATCH_CONCURRENCY = int(os.environ.get("ORCHESTRATOR_BATCH_CONCURRENCY", "8"))
+# Rows per streaming insert when flushing buffered writes.
+FLUSH_CHUNK_ROWS = int(os.environ.get("ORCHESTRATOR_FLUSH_CHUNK_ROWS", "500"))
+# Sources whose analyze + decide stages share one Gemini call (e.g. "gmail,calendar").
+FUSED_SOURCES = {
+    s.strip() for s in os.environ.get("ORCHESTRATOR_FUSED_SOURCES", "").split(",") if s.strip()
+}
+PRECLASSIFY_ENABLED = os.environ.get("PRECLASSIFY_ENABLED", "true").lower() not in ("0", "false", "no")
+
 
 class OpenClawOrchestrator:
     """
@@ -36,19 +64,31 @@ class OpenClawOrchestrator:
 
     Pipeline stages:
     1. Receive - Accept normalized event
+       (Pre-classify - obvious low-stakes events are decided locally and skip 2-4)
     2. Enrich  - Run NLP (entities, sentiment) on event text
     3. Analyze - Use Gemini to understand intent and extract structure
     4. Decide  - Use Gemini + context to choose an action
     5. Act     - Execute the chosen action (create task, label, etc.)
     """
 
-    def __init__(self, project_id, sheet_id, region="us-central1"):
+    def __init__(self, project_id, sheet_id, region="us-central1", writer=None, fused_sources=None):
         self.project_id = project_id
         self.sheet_id = sheet_id
         self.bq = bigquery.Client()
+        # BigQuery result rows go through the writer (the client itself, or a buffer).
+        self.writer = writer or self.bq
         self.context = AgentContextBuilder(project_id, sheet_id)
+        self.sender_context = self.context
         self.state = AgentStateWriter(project_id, sheet_id)
-        self.analyzer = GeminiAnalyzer(project_id, sheet_id, region=region)
+        self.analyzer = GeminiAnalyzer(project_id, sheet_id, region=region, writer=self.writer)
+
+        self.fused_sources = FUSED_SOURCES if fused_sources is None else set(fused_sources)
+        self.preclassifier = PreClassifier(project_id, self.bq) if PRECLASSIFY_ENABLED else None
+        self._language = None
+        # Shared tasks/contacts read while process_events() runs.
+        self._snapshot = None
+        # Sheets clients are not thread-safe; concurrent pipelines take turns acting.
+        self._sheets_lock = threading.Lock()
 
     def process_event(self, event_data):
         """
@@ -65,25 +105,35 @@ class OpenClawOrchestrator:
             "pipeline_id": pipeline_id,
             "event_id": event_id,
             "stages": {},
+            "timings_ms": {},
             "outcome": None,
             "error": None,
         }
+        timings = result["timings_ms"]
+        started = time.perf_counter()
 
-        try:
-            # Stage 1: Enrich
-            enrichment = self._stage_enrich(event_data)
-            result["stages"]["enrich"] = enrichment
-
-            # Stage 2: Analyze
-            analysis = self._stage_analyze(event_data, enrichment)
-            result["stages"]["analyze"] = analysis
+        def timed(name, fn, *args):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                timings[name] = int((time.perf_counter() - t0) * 1000)
 
-            # Stage 3: Decide
-            decision = self._stage_decide(event_data, enrichment, analysis)
-            result["stages"]["decide"] = decision
+        try:
+            verdict = timed("preclassify", self._stage_preclassify, event_data)
+            if verdict:
+                result["preclassifier"] = verdict
+
+            if verdict and verdict["bypassed"]:
+                decision = timed("decide", self._stage_fast_decide, event_data, verdict)
+                result["stages"]["decide"] = decision
+            else:
+                decision = self._run_llm_stages(event_data, result, timed)
+                if verdict:
+                    self._record_shadow(verdict, decision)
 
             # Stage 4: Act
-            action_result = self._stage_act(event_data, decision)
+            action_result = timed("act", self._stage_act_serialized, event_data, decision)
             result["stages"]["act"] = action_result
             result["outcome"] = action_result.get("action_taken", "none")
 
@@ -91,6 +141,8 @@ class OpenClawOrchestrator:
             result["error"] = str(exc)
             logger.exception(f"[{AGENT_ID}] Pipeline {pipeline_id} failed: {exc}")
 
+        timings["total"] = int((time.perf_counter() - started) * 1000)
+
         # Log pipeline execution to BigQuery
         self._log_pipeline(result)
 
@@ -99,6 +151,148 @@ class OpenClawOrchestrator:
         )
         return result
 
+    def _run_llm_stages(self, event_data, result, timed):
+        """Stages 1-3 (enrich, analyze, decide); returns the decision."""
+        # Stage 1: Enrich
+        enrichment = timed("enrich", self._stage_enrich, event_data)
+        result["stages"]["enrich"] = enrichment
+
+        if self._is_fused(event_data):
+            # Stages 2+3 in one Gemini call
+            workload = timed("workload", self._fetch_workload_context)
+            sender = timed("sender", self._fetch_sender_context, event_data)
+            analysis, decision = timed(
+                "analyze_decide", self._stage_analyze_decide, event_data, enrichment, workload, sender
+            )
+            result["stages"]["analyze"] = analysis
+            result["stages"]["decide"] = decision
+            return decision
+
+        # Stage 2: Analyze
+        analysis = timed("analyze", self._stage_analyze, event_data, enrichment)
+        result["stages"]["analyze"] = analysis
+
+        # Stage 3: Decide
+        workload = timed("workload", self._fetch_workload_context)
+        sender = timed("sender", self._fetch_sender_context, event_data)
+        decision = timed(
+            "decide", self._stage_decide, event_data, enrichment, analysis, workload, sender
+        )
+        result["stages"]["decide"] = decision
+        return decision
+
+    def process_events(self, events, max_concurrency=None):
+        """
+        Run the pipeline over a batch of events.
+
+        Open tasks and contacts are read once for the whole batch. Up to
+        max_concurrency pipelines (and so Gemini calls) run at a time, and
+        every BigQuery row (nlp_enrichment, ai_analysis, ai_decisions,
+        pipeline log) is buffered and written per table after the batch.
+
+        Returns:
+            dict with per-event results and throughput (events_per_sec)
+        """
+        events = list(events)
+        max_concurrency = max_concurrency or BATCH_CONCURRENCY
+        started = time.perf_counter()
+        logger.info(
+            f"[{AGENT_ID}] Starting batch of {len(events)} events, concurrency={max_concurrency}"
+        )
+
+        previous_writer = self.writer
+        batch_writer = DeferredWriter(self.bq)
+        self.writer = self.analyzer.writer = batch_writer
+        self._snapshot = self._load_context_snapshot()
+        try:
+            with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+                # Per-event stages run serially here; the batch supplies the concurrency.
+                results = list(
+                    pool.map(lambda ev: OpenClawOrchestrator.process_event(self, ev), events)
+                )
+            rows_written = batch_writer.flush()
+            get_sheets_appender().flush()
+        finally:
+            self.writer = self.analyzer.writer = previous_writer
+            self._snapshot = None
+
+        elapsed = time.perf_counter() - started
+        summary = {
+            "event_count": len(events),
+            "failed_count": sum(1 for r in results if r.get("error")),
+            "rows_written": rows_written,
+            "elapsed_s": round(elapsed, 3),
+            "events_per_sec": round(len(events) / elapsed, 2) if elapsed > 0 else None,
+            "llm_cache": self.analyzer.cache_report(),
+            "results": results,
+        }
+        logger.info(
+            f"[{AGENT_ID}] Batch completed: {summary['event_count']} events, "
+            f"{summary['failed_count']} failed, {summary['events_per_sec']} events/sec, "
+            f"llm_cache={summary['llm_cache']}"
+        )
+        return summary
+
+    def _load_context_snapshot(self):
+        """Read the context every pipeline in a batch needs, once."""
+        snapshot = {"workload": self._fetch_workload_context(), "contacts": {}}
+        try:
+            snapshot["contacts"] = self.context.get_contacts()
+        except Exception as exc:
+            logger.warning(f"[{AGENT_ID}] Failed to load contacts snapshot: {exc}")
+        return snapshot
+
+    def _language_client(self):
+        if self._language is None:
+            self._language = language_v1.LanguageServiceClient()
+        return self._language
+
+    def _stage_preclassify(self, event_data):
+        """
+        Local rules + sender reputation. Returns a verdict only when it is
+        confident enough to bypass the LLM; a PRECLASSIFY_SHADOW_RATE sample of
+        those still runs the full pipeline to measure agreement.
+        """
+        if self.preclassifier is None:
+            return None
+        try:
+            verdict = self.preclassifier.classify(event_data)
+        except Exception as exc:
+            logger.warning(f"[{AGENT_ID}] Pre-classifier failed: {exc}")
+            return None
+        if not verdict or verdict["confidence"] < PRECLASSIFY_MIN_CONFIDENCE:
+            return None
+        shadow = random.random() < PRECLASSIFY_SHADOW_RATE
+        verdict["shadow"] = shadow
+        verdict["bypassed"] = not shadow
+        return verdict
+
+    def _stage_fast_decide(self, event_data, verdict):
+        """Record the pre-classifier's verdict as the decision (no Gemini call)."""
+        logger.info(
+            f"[{AGENT_ID}] Fast path for event {event_data.get('event_id', 'unknown')}: "
+            f"{verdict['action']} ({verdict['reason']})"
+        )
+        return self.analyzer.record_decision(
+            event_data,
+            context={"preclassifier": verdict},
+            agent_id=AGENT_ID,
+            decision_type="event_response",
+            analysis={
+                "analysis_id": None,
+                "output_structured": {
+                    "recommended_action": verdict["action"],
+                    "reasoning": f"Pre-classifier: {verdict['reason']}",
+                    "alternatives": [],
+                },
+                "confidence": verdict["confidence"],
+            },
+        )
+
+    def _record_shadow(self, verdict, decision):
+        verdict["llm_action"] = decision.get("chosen_action")
+        verdict["agree"] = verdict["llm_action"] == verdict["action"]
+
     def _stage_enrich(self, event_data):
         """Stage 1: Extract text and run NLP enrichment."""
         event_id = event_data.get("event_id", "unknown")
@@ -109,7 +303,7 @@ class OpenClawOrchestrator:
             return {"text_found": False, "entities": [], "sentiment_score": None}
 
         try:
-            client = language_v1.LanguageServiceClient()
+            client = self._language_client()
             document = language_v1.Document(
                 content=raw_text, type_=language_v1.Document.Type.PLAIN_TEXT
             )
@@ -150,7 +344,7 @@ class OpenClawOrchestrator:
                 "language": enrichment["language"],
                 "raw_text": raw_text[:2000],
             }
-            self.bq.insert_rows_json(
+            self.writer.insert_rows_json(
                 f"{self.project_id}.openclaw.nlp_enrichment", [nlp_row]
             )
 
@@ -179,6 +373,18 @@ class OpenClawOrchestrator:
             "drive": "classify",
         }.get(source, "summarize")
 
+        context = self._analysis_context(enrichment)
+
+        result = self.analyzer.analyze_event(
+            event_data,
+            analysis_type=analysis_type,
+            agent_id=AGENT_ID,
+            context=context,
+        )
+
+        return result
+
+    def _analysis_context(self, enrichment):
         context = {}
         if enrichment.get("entities"):
             context["nlp_entities"] = enrichment["entities"][:10]
@@ -187,17 +393,72 @@ class OpenClawOrchestrator:
                 "score": enrichment["sentiment_score"],
                 "magnitude": enrichment.get("sentiment_magnitude"),
             }
+        return context
 
-        result = self.analyzer.analyze_event(
+    def _is_fused(self, event_data):
+        return event_data.get("source") in self.fused_sources
+
+    def _stage_analyze_decide(self, event_data, enrichment, workload, sender):
+        """Stages 2+3 fused: one structured Gemini call returns triage fields and the action."""
+        event_id = event_data.get("event_id", "unknown")
+        logger.info(f"[{AGENT_ID}] Analyzing and deciding event {event_id} in one call")
+
+        context = self._analysis_context(enrichment)
+        context["current_workload"] = workload
+        if sender:
+            context["sender"] = sender
+
+        return self.analyzer.analyze_and_decide(
             event_data,
-            analysis_type=analysis_type,
-            agent_id=AGENT_ID,
             context=context,
+            agent_id=AGENT_ID,
+            decision_type="event_response",
         )
 
-        return result
+    def _fetch_workload_context(self):
+        """Summarize open tasks for the decision prompt."""
+        if self._snapshot is not None:
+            return self._snapshot["workload"]
+        try:
+            open_tasks = self.context.get_open_tasks()
+            return {
+                "open_task_count": len(open_tasks),
+                "high_priority_count": sum(
+                    1 for t in open_tasks if t.get("priority") in ("P0", "P1")
+                ),
+            }
+        except Exception:
+            return {"open_task_count": 0}
 
-    def _stage_decide(self, event_data, enrichment, analysis):
+    def _fetch_sender_context(self, event_data):
+        """Look up the sender of an email event in contacts; None if unknown."""
+        if event_data.get("source") != "gmail":
+            return None
+        payload = event_data.get("payload", "{}")
+        if isinstance(payload, str):
+            try:
+                payload = json.loads(payload)
+            except json.JSONDecodeError:
+                payload = {}
+        from_email = payload.get("from", "")
+        if not from_email:
+            return None
+        try:
+            if self._snapshot is not None:
+                contact = self._snapshot["contacts"].get(from_email)
+            else:
+                contact = self.sender_context.get_contact_info(from_email)
+        except Exception:
+            return None
+        if not contact:
+            return None
+        return {
+            "known": True,
+            "priority_score": contact.get("priority_score"),
+            "relationship": contact.get("relationship"),
+        }
+
+    def _stage_decide(self, event_data, enrichment, analysis, workload, sender):
         """Stage 3: Use Gemini + context to make a decision."""
         event_id = event_data.get("event_id", "unknown")
         logger.info(f"[{AGENT_ID}] Making decision for event {event_id}")
@@ -211,41 +472,10 @@ class OpenClawOrchestrator:
                 ],
             },
             "analysis_summary": analysis.get("output_structured", {}),
+            "current_workload": workload,
         }
-
-        # Add task workload context
-        try:
-            open_tasks = self.context.get_open_tasks()
-            decision_context["current_workload"] = {
-                "open_task_count": len(open_tasks),
-                "high_priority_count": sum(
-                    1 for t in open_tasks if t.get("priority") in ("P0", "P1")
-                ),
-            }
-        except Exception:
-            decision_context["current_workload"] = {"open_task_count": 0}
-
-        # Add sender context for email events
-        source = event_data.get("source")
-        if source == "gmail":
-            payload = event_data.get("payload", "{}")
-            if isinstance(payload, str):
-                try:
-                    payload = json.loads(payload)
-                except json.JSONDecodeError:
-                    payload = {}
-            from_email = payload.get("from", "")
-            if from_email:
-                try:
-                    contact = self.context.get_contact_info(from_email)
-                    if contact:
-                        decision_context["sender"] = {
-                            "known": True,
-                            "priority_score": contact.get("priority_score"),
-                            "relationship": contact.get("relationship"),
-                        }
-                except Exception:
-                    pass
+        if sender:
+            decision_context["sender"] = sender
 
         decision = self.analyzer.make_decision(
             event_data,
@@ -256,6 +486,10 @@ class OpenClawOrchestrator:
 
         return decision
 
+    def _stage_act_serialized(self, event_data, decision):
+        with self._sheets_lock:
+            return self._stage_act(event_data, decision)
+
     def _stage_act(self, event_data, decision):
         """Stage 4: Execute the chosen action."""
         event_id = event_data.get("event_id", "unknown")
@@ -295,12 +529,14 @@ class OpenClawOrchestrator:
         # Mark decision as executed
         decision_id = decision.get("decision_id")
         if decision_id:
-            self.analyzer.mark_decision_executed(
-                decision_id, json.dumps(result, default=str)
-            )
+            self._record_execution(decision_id, json.dumps(result, default=str))
 
         return result
 
+    def _record_execution(self, decision_id, result_summary):
+        # Append-only execution row; buffered with everything else when batching.
+        self.analyzer.mark_decision_executed(decision_id, result_summary)
+
     def _act_create_task(self, event_data, decision):
         """Create a task based on the AI decision."""
         analysis = decision.get("output_structured", {}) if "output_structured" in decision else {}
@@ -427,6 +663,8 @@ class OpenClawOrchestrator:
                         "event_id": result["event_id"],
                         "outcome": result["outcome"],
                         "error": result["error"],
+                        "timings_ms": result.get("timings_ms", {}),
+                        "preclassifier": result.get("preclassifier"),
                         "stages": {
                             k: {
                                 "completed": v is not None,
@@ -439,8 +677,205 @@ class OpenClawOrchestrator:
                 ),
                 "processed": True,
             }
-            self.bq.insert_rows_json(
+            self.writer.insert_rows_json(
                 f"{self.project_id}.openclaw.events", [row]
             )
         except Exception as exc:
             logger.error(f"[{AGENT_ID}] Failed to log pipeline: {exc}")
+
+
+class DeferredWriter:
+    """
+    Buffers BigQuery streaming inserts until flush().
+
+    Drop-in for the `insert_rows_json` calls made by the pipeline; rows are
+    grouped per table so a flush issues one insert per table.
+    """
+
+    def __init__(self, bq=None):
+        self.bq = bq or bigquery.Client()
+        self._lock = threading.Lock()
+        self._rows = {}
+
+    def insert_rows_json(self, table, rows):
+        with self._lock:
+            self._rows.setdefault(table, []).extend(rows)
+        return []
+
+    def flush(self):
+        """Write everything buffered so far. Returns the number of rows inserted."""
+        with self._lock:
+            pending_rows, self._rows = self._rows, {}
+
+        written = 0
+        for table, rows in pending_rows.items():
+            for i in range(0, len(rows), FLUSH_CHUNK_ROWS):
+                chunk = rows[i : i + FLUSH_CHUNK_ROWS]
+                try:
+                    errors = self.bq.insert_rows_json(table, chunk)
+                    if errors:
+                        logger.error(f"[{AGENT_ID}] Deferred insert errors for {table}: {errors}")
+                    else:
+                        written += len(chunk)
+                except Exception as exc:
+                    logger.error(f"[{AGENT_ID}] Deferred insert failed for {table}: {exc}")
+
+        return written
+
+
+class AsyncOpenClawOrchestrator(OpenClawOrchestrator):
+    """
+    Same stages as OpenClawOrchestrator, run as a dependency graph on asyncio.
+
+    Independent stages (NLP enrichment, Gemini analysis, the tasks read and
+    the sender lookup) run concurrently in worker threads; decide waits for
+    all four and act waits for decide. Analysis does not wait for NLP, so its
+    prompt carries no NLP context; the decision still sees both.
+
+    BigQuery result rows and the executed-decision update are buffered; once
+    the graph finishes the flush is scheduled as a background task, so an
+    async caller can start the next event while it runs. Call drain_async()
+    at batch end or shutdown to wait for outstanding flushes (process_event
+    does this for you). Per-stage latency is reported in result["timings_ms"].
+    For fused sources the graph is enrich/workload/sender -> analyze_decide -> act.
+    """
+
+    def __init__(self, project_id, sheet_id, region="us-central1", fused_sources=None):
+        super().__init__(
+            project_id, sheet_id, region=region, writer=DeferredWriter(), fused_sources=fused_sources
+        )
+        # googleapiclient services are not thread-safe; give the concurrent
+        # sender lookup its own Sheets client.
+        self.sender_context = AgentContextBuilder(project_id, sheet_id)
+        self._flushes = set()
+
+    def _stage_graph(self, event_data, verdict=None):
+        """name -> (dependencies, fn(event_data, upstream_results)), in topological order."""
+        if verdict and verdict["bypassed"]:
+            return {
+                "decide": ((), lambda ev, up: self._stage_fast_decide(ev, verdict)),
+                "act": (("decide",), lambda ev, up: self._stage_act(ev, up["decide"])),
+            }
+        if self._is_fused(event_data):
+            return {
+                "enrich": ((), lambda ev, up: self._stage_enrich(ev)),
+                "workload": ((), lambda ev, up: self._fetch_workload_context()),
+                "sender": ((), lambda ev, up: self._fetch_sender_context(ev)),
+                "analyze_decide": (
+                    ("enrich", "workload", "sender"),
+                    lambda ev, up: self._stage_analyze_decide(
+                        ev, up["enrich"], up["workload"], up["sender"]
+                    ),
+                ),
+                "act": (("analyze_decide",), lambda ev, up: self._stage_act(ev, up["analyze_decide"][1])),
+            }
+        return {
+            "enrich": ((), lambda ev, up: self._stage_enrich(ev)),
+            "analyze": ((), lambda ev, up: self._stage_analyze(ev, {})),
+            "workload": ((), lambda ev, up: self._fetch_workload_context()),
+            "sender": ((), lambda ev, up: self._fetch_sender_context(ev)),
+            "decide": (
+                ("enrich", "analyze", "workload", "sender"),
+                lambda ev, up: self._stage_decide(
+                    ev, up["enrich"], up["analyze"], up["workload"], up["sender"]
+                ),
+            ),
+            "act": (("decide",), lambda ev, up: self._stage_act(ev, up["decide"])),
+        }
+
+    def process_event(self, event_data):
+        async def run_and_drain():
+            try:
+                return await self.process_event_async(event_data)
+            finally:
+                await self.drain_async()
+
+        return asyncio.run(run_and_drain())
+
+    async def drain_async(self):
+        """Wait for scheduled flushes, then write anything still buffered. Returns rows written."""
+        written = 0
+        while self._flushes:
+            pending = list(self._flushes)
+            self._flushes.difference_update(pending)
+            for outcome in await asyncio.gather(*pending, return_exceptions=True):
+                if isinstance(outcome, BaseException):
+                    logger.error(f"[{AGENT_ID}] Background flush failed: {outcome}")
+                else:
+                    written += outcome
+        written += await asyncio.to_thread(self.writer.flush)
+        return written
+
+    def _schedule_flush(self):
+        task = asyncio.ensure_future(asyncio.to_thread(self.writer.flush))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def process_event_async(self, event_data):
+        event_id = event_data.get("event_id", "unknown")
+        pipeline_id = f"pipe-{uuid.uuid4().hex[:12]}"
+        logger.info(f"[{AGENT_ID}] Starting async pipeline {pipeline_id} for event {event_id}")
+
+        result = {
+            "pipeline_id": pipeline_id,
+            "event_id": event_id,
+            "stages": {},
+            "timings_ms": {},
+            "outcome": None,
+            "error": None,
+        }
+        started = time.perf_counter()
+
+        t0 = time.perf_counter()
+        verdict = await asyncio.to_thread(self._stage_preclassify, event_data)
+        result["timings_ms"]["preclassify"] = int((time.perf_counter() - t0) * 1000)
+        if verdict:
+            result["preclassifier"] = verdict
+
+        outputs = await self._run_graph(
+            event_data, self._stage_graph(event_data, verdict), result["timings_ms"]
+        )
+        for name, value in outputs.items():
+            if isinstance(value, BaseException):
+                if result["error"] is None:
+                    result["error"] = str(value)
+                    logger.error(f"[{AGENT_ID}] Pipeline {pipeline_id} failed in {name}: {value}")
+            elif name == "analyze_decide":
+                result["stages"]["analyze"], result["stages"]["decide"] = value
+            elif name in ("enrich", "analyze", "decide", "act"):
+                result["stages"][name] = value
+
+        if verdict and verdict["shadow"] and result["stages"].get("decide"):
+            self._record_shadow(verdict, result["stages"]["decide"])
+
+        act = result["stages"].get("act")
+        if act:
+            result["outcome"] = act.get("action_taken", "none")
+        result["timings_ms"]["total"] = int((time.perf_counter() - started) * 1000)
+
+        self._log_pipeline(result)
+        self._schedule_flush()
+
+        logger.info(
+            f"[{AGENT_ID}] Pipeline {pipeline_id} completed: outcome={result['outcome']} "
+            f"timings_ms={result['timings_ms']}"
+        )
+        return result
+
+    async def _run_graph(self, event_data, graph, timings):
+        """Run each stage as soon as its dependencies resolve; failures propagate downstream."""
+        tasks = {}
+
+        async def run_stage(name, deps, fn):
+            upstream = {dep: await tasks[dep] for dep in deps}
+            t0 = time.perf_counter()
+            try:
+                return await asyncio.to_thread(fn, event_data, upstream)
+            finally:
+                timings[name] = int((time.perf_counter() - t0) * 1000)
+
+        for name, (deps, fn) in graph.items():
+            tasks[name] = asyncio.ensure_future(run_stage(name, deps, fn))
+
+        outputs = await asyncio.gather(*tasks.values(), return_exceptions=True)
+        return dict(zip(tasks.keys(), outputs))
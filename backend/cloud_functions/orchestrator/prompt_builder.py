@@ -0,0 +1,213 @@
+"""
+Token-budgeted prompt assembly for GeminiAnalyzer.
+
+Every prompt is laid out as
+
+    <analysis prompt>            static per analysis type (prefix-cacheable)
+    ---
+    Event Data: ...              headers, then the cleaned body
+    Context: {...}               compact JSON, low-salience entities dropped
+
+so the leading bytes are identical across calls of the same type and the
+provider's prefix cache can apply. The body is what gets cut to fit the
+per-type budget (PROMPT_TOKEN_BUDGETS): quoted replies and signatures are
+stripped first, then the remainder is truncated to whatever the headers
+and context leave over. Triage-style prompts get a small budget;
+summarize/extract keep more of the body. The body is taken from one payload
+field (snippet, body and body_text usually repeat each other).
+
+PROMPT_BUDGET_ENABLED=false falls back to the previous full-dump layout;
+rows record which layout produced them (ai_analysis.prompt_version).
+
+Usage:
+    prompt, version = build_prompt(system_prompt, event_data, "triage", context)
+"""
+
+import json
+import logging
+import os
+import re
+
+logger = logging.getLogger(__name__)
+
+
+PROMPT_BUDGET_ENABLED = os.environ.get("PROMPT_BUDGET_ENABLED", "true").lower() not in ("0", "false", "no")
+PROMPT_VERSION = "budgeted-v1"
+LEGACY_PROMPT_VERSION = "full-v0"
+
+# Approximate input tokens per analysis type (whole prompt, instructions included).
+PROMPT_TOKEN_BUDGETS = {
+    "triage": 250,
+    "classify": 200,
+    "decide": 350,
+    "triage_decide": 400,
+    "summarize": 600,
+    "extract": 600,
+}
+PROMPT_TOKEN_BUDGETS.update(json.loads(os.environ.get("PROMPT_TOKEN_BUDGET_OVERRIDES", "{}") or "{}"))
+DEFAULT_TOKEN_BUDGET = int(os.environ.get("PROMPT_DEFAULT_TOKEN_BUDGET", "400"))
+
+# NLP entities below this salience carry almost no signal for the model.
+MIN_ENTITY_SALIENCE = float(os.environ.get("PROMPT_MIN_ENTITY_SALIENCE", "0.02"))
+MAX_ENTITIES = int(os.environ.get("PROMPT_MAX_ENTITIES", "8"))
+
+# Rough chars-per-token for English text with the Gemini tokenizer.
+CHARS_PER_TOKEN = 4
+MIN_BODY_CHARS = 200
+
+HEADER_FIELDS = ("subject", "from", "to", "title")
+BODY_FIELDS = ("body_text", "body", "text", "content", "description", "snippet")
+
+_QUOTE_MARKERS = [
+    re.compile(r"^\s*On .{0,200}wrote:\s*$", re.MULTILINE),
+    re.compile(r"^\s*-{2,}\s*Original Message\s*-{2,}", re.MULTILINE | re.IGNORECASE),
+    re.compile(r"^\s*-{2,}\s*Forwarded message\s*-{2,}", re.MULTILINE | re.IGNORECASE),
+    re.compile(r"^\s*From:\s.+\n\s*(Sent|Date):\s", re.MULTILINE),
+    re.compile(r"^_{10,}\s*$", re.MULTILINE),
+]
+_SIGNATURE_MARKERS = [
+    re.compile(r"^-- ?$", re.MULTILINE),
+    re.compile(r"^\s*Sent from my \w+", re.MULTILINE | re.IGNORECASE),
+    re.compile(r"^\s*Get Outlook for \w+", re.MULTILINE | re.IGNORECASE),
+]
+_QUOTED_LINE_RE = re.compile(r"^\s*>.*$\n?", re.MULTILINE)
+_BLANK_RUN_RE = re.compile(r"\n{3,}")
+
+
+def estimate_tokens(text):
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def budget_for(analysis_type):
+    return int(PROMPT_TOKEN_BUDGETS.get(analysis_type, DEFAULT_TOKEN_BUDGET))
+
+
+def clean_body(text):
+    """Drop quoted reply history, '>' quoted lines and the signature block."""
+    cut = len(text)
+    for marker in _QUOTE_MARKERS + _SIGNATURE_MARKERS:
+        m = marker.search(text)
+        # A marker at the very top means the whole message is a forward; keep it.
+        if m and 0 < m.start() < cut:
+            cut = m.start()
+    text = _QUOTED_LINE_RE.sub("", text[:cut])
+    return _BLANK_RUN_RE.sub("\n\n", text).strip()
+
+
+def compact_json(value):
+    return json.dumps(value, separators=(",", ":"), sort_keys=True, default=str)
+
+
+def prune_context(context):
+    """Copy of context with low-salience / excess NLP entities removed."""
+    pruned = dict(context)
+    entities = pruned.get("nlp_entities")
+    if isinstance(entities, list):
+        kept = [
+            {"name": e.get("name"), "type": e.get("type")}
+            for e in sorted(entities, key=lambda e: -(e.get("salience") or 0))
+            if isinstance(e, dict) and (e.get("salience") or 0) >= MIN_ENTITY_SALIENCE
+        ][:MAX_ENTITIES]
+        if kept:
+            pruned["nlp_entities"] = kept
+        else:
+            pruned.pop("nlp_entities")
+    return pruned
+
+
+def build_prompt(system_prompt, event_data, analysis_type, context=None):
+    """Return (prompt, prompt_version) for one Gemini call."""
+    if not PROMPT_BUDGET_ENABLED:
+        return legacy_prompt(system_prompt, event_data, context), LEGACY_PROMPT_VERSION
+
+    headers, body = _event_parts(event_data)
+    prefix = f"{system_prompt}\n\n---\nEvent Data:\n" + "\n".join(headers)
+    suffix = f"\n\nContext: {compact_json(prune_context(context))}" if context else ""
+
+    budget_chars = budget_for(analysis_type) * CHARS_PER_TOKEN
+    room = max(MIN_BODY_CHARS, budget_chars - len(prefix) - len(suffix) - len("\nBody: "))
+    if body:
+        if len(body) > room:
+            body = body[:room].rsplit(" ", 1)[0] + " [...]"
+        prefix += f"\nBody: {body}"
+
+    return prefix + suffix, PROMPT_VERSION
+
+
+def legacy_prompt(system_prompt, event_data, context=None):
+    """The pre-budget layout: fixed 500-char field slices, indented context JSON."""
+    prompt = f"{system_prompt}\n\n---\nEvent Data:\n{format_event_full(event_data)}"
+    if context:
+        prompt += f"\n\nAdditional Context:\n{json.dumps(context, indent=2, default=str)}"
+    return prompt
+
+
+def format_event_full(event_data):
+    """Format event data into readable text for the LLM prompt."""
+    parts = []
+
+    source = event_data.get("source", "unknown")
+    event_type = event_data.get("event_type", "unknown")
+    parts.append(f"Source: {source}")
+    parts.append(f"Type: {event_type}")
+
+    timestamp = event_data.get("timestamp")
+    if timestamp:
+        parts.append(f"Time: {timestamp}")
+
+    payload = event_data.get("payload")
+    if payload:
+        if isinstance(payload, str):
+            try:
+                payload = json.loads(payload)
+            except json.JSONDecodeError:
+                parts.append(f"Content: {payload[:1000]}")
+                return "\n".join(parts)
+
+        if isinstance(payload, dict):
+            for key in ["subject", "from", "to", "snippet", "body", "body_text",
+                        "text", "content", "title", "description"]:
+                value = payload.get(key)
+                if value:
+                    parts.append(f"{key.title()}: {str(value)[:500]}")
+
+            # Include labels if present
+            labels = payload.get("labels")
+            if labels:
+                parts.append(f"Labels: {', '.join(labels) if isinstance(labels, list) else labels}")
+
+    return "\n".join(parts)
+
+
+def _event_parts(event_data):
+    """(header lines, cleaned body text) for an event."""
+    headers = [
+        f"Source: {event_data.get('source', 'unknown')}",
+        f"Type: {event_data.get('event_type', 'unknown')}",
+    ]
+    if event_data.get("timestamp"):
+        headers.append(f"Time: {event_data['timestamp']}")
+
+    payload = event_data.get("payload")
+    if isinstance(payload, str):
+        try:
+            payload = json.loads(payload)
+        except json.JSONDecodeError:
+            return headers, clean_body(payload)
+    if not isinstance(payload, dict):
+        return headers, ""
+
+    for key in HEADER_FIELDS:
+        value = payload.get(key)
+        if value:
+            headers.append(f"{key.title()}: {str(value)[:300]}")
+    labels = payload.get("labels")
+    if labels:
+        headers.append(f"Labels: {', '.join(labels) if isinstance(labels, list) else labels}")
+
+    # First populated body field only: snippet/text/body usually repeat each other.
+    for key in BODY_FIELDS:
+        value = payload.get(key)
+        if value and isinstance(value, str):
+            return headers, clean_body(value)
+    return headers, ""
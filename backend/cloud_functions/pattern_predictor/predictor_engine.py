@@ -0,0 +1,187 @@
+"""
+Shared inputs for pattern_predictor: compact daily count tables, loaded once.
+
+Every prediction used to run its own scan over `events` / `nlp_enrichment`,
+re-parsing the JSON payloads and recomputing its own baseline. Instead the
+raw tables are scanned once per run, each by one grouped query, and the
+queries run concurrently:
+
+    calendar   (activity_day, start_day, n)   non-deleted calendar events
+    senders    (day, from_email, n)           gmail events per sender
+    entities   (day, entity_name, n)          NLP entity mentions
+
+All of these are a few thousand rows at most. The predictions are then
+vectorized pandas/NumPy operations over the frames, so adding a prediction
+that needs the same counts costs no extra scan.
+
+Windows are whole days (UTC): "recent" is today and the RECENT_DAYS - 1
+days before it, "baseline" the BASELINE_DAYS before that.
+
+Usage:
+    tables = load_daily_tables(bq, project_id)
+    spikes = spike_frame(tables.senders, "from_email", tables.today, min_recent=5, limit=50)
+"""
+
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from google.cloud import bigquery
+
+logger = logging.getLogger(__name__)
+
+
+RECENT_DAYS = 7
+BASELINE_DAYS = 30
+BUSY_WEEK_HORIZON_DAYS = 7
+BUSY_WEEK_BASELINE_DAYS = 14
+
+PREDICTOR_QUERY_WORKERS = int(os.environ.get("PREDICTOR_QUERY_WORKERS", "3"))
+
+# Upcoming meetings (by start day, timed only) and recent calendar activity
+# (by ingest day) come out of the same scan; rows outside both windows are dropped.
+CALENDAR_QUERY = """
+WITH parsed AS (
+  SELECT
+    timestamp,
+    JSON_VALUE(payload, '$.all_day') AS all_day,
+    DATE(SAFE.PARSE_TIMESTAMP('%Y-%m-%dT%H:%M:%S', SPLIT(JSON_VALUE(payload, '$.start_time'), '+')[OFFSET(0)])) AS start_day
+  FROM `{project}.openclaw.events`
+  WHERE source = 'calendar'
+    AND JSON_VALUE(payload, '$.change_type') != 'deleted'
+)
+SELECT
+  IF(timestamp > TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL @baseline_days DAY), DATE(timestamp), NULL) AS activity_day,
+  IF(all_day = 'false' AND start_day BETWEEN @today AND DATE_ADD(@today, INTERVAL @horizon_days DAY), start_day, NULL) AS start_day,
+  COUNT(*) AS n
+FROM parsed
+GROUP BY activity_day, start_day
+HAVING activity_day IS NOT NULL OR start_day IS NOT NULL
+"""
+
+SENDERS_QUERY = """
+SELECT
+  DATE(timestamp) AS day,
+  REGEXP_EXTRACT(LOWER(JSON_VALUE(payload, '$.from')), r'([a-z0-9._%+-]+@[a-z0-9.-]+\\.[a-z]{{2,}})') AS from_email,
+  COUNT(*) AS n
+FROM `{project}.openclaw.events`
+WHERE source = 'gmail'
+  AND timestamp >= TIMESTAMP(@since)
+GROUP BY day, from_email
+HAVING from_email IS NOT NULL
+"""
+
+ENTITIES_QUERY = """
+SELECT
+  DATE(timestamp) AS day,
+  JSON_VALUE(entity_json, '$.name') AS entity_name,
+  COUNT(*) AS n
+FROM `{project}.openclaw.nlp_enrichment`,
+UNNEST(JSON_QUERY_ARRAY(entities)) AS entity_json
+WHERE timestamp >= TIMESTAMP(@since)
+GROUP BY day, entity_name
+HAVING entity_name IS NOT NULL
+"""
+
+
+@dataclass
+class DailyTables:
+    today: date
+    calendar: Optional[pd.DataFrame] = None
+    senders: Optional[pd.DataFrame] = None
+    entities: Optional[pd.DataFrame] = None
+    bytes_processed: int = 0
+    errors: Dict[str, str] = field(default_factory=dict)
+
+
+def load_daily_tables(bq: bigquery.Client, project_id: str, today: Optional[date] = None) -> DailyTables:
+    """Run the three count queries concurrently. A failed query leaves its frame None."""
+    today = today or date.today()
+    since = today - timedelta(days=RECENT_DAYS + BASELINE_DAYS - 1)
+    jobs = {
+        "calendar": (CALENDAR_QUERY, ["activity_day", "start_day", "n"], [
+            bigquery.ScalarQueryParameter("today", "DATE", today),
+            bigquery.ScalarQueryParameter("horizon_days", "INT64", BUSY_WEEK_HORIZON_DAYS),
+            bigquery.ScalarQueryParameter("baseline_days", "INT64", BUSY_WEEK_BASELINE_DAYS),
+        ]),
+        "senders": (SENDERS_QUERY, ["day", "from_email", "n"], [
+            bigquery.ScalarQueryParameter("since", "DATE", since),
+        ]),
+        "entities": (ENTITIES_QUERY, ["day", "entity_name", "n"], [
+            bigquery.ScalarQueryParameter("since", "DATE", since),
+        ]),
+    }
+
+    def run(name):
+        sql, columns, params = jobs[name]
+        job = bq.query(sql.format(project=project_id), job_config=bigquery.QueryJobConfig(query_parameters=params))
+        rows = [tuple(row.values()) for row in job.result()]
+        return pd.DataFrame.from_records(rows, columns=columns), int(job.total_bytes_processed or 0)
+
+    tables = DailyTables(today=today)
+    with ThreadPoolExecutor(max_workers=PREDICTOR_QUERY_WORKERS) as pool:
+        futures = {name: pool.submit(run, name) for name in jobs}
+        for name, future in futures.items():
+            try:
+                frame, processed = future.result()
+                setattr(tables, name, frame)
+                tables.bytes_processed += processed
+            except Exception as exc:
+                logger.error(f"{name} daily counts failed: {exc}")
+                tables.errors[name] = str(exc)
+
+    logger.info(f"Loaded predictor inputs, {tables.bytes_processed} bytes processed")
+    return tables
+
+
+def busy_days_frame(calendar: pd.DataFrame, today: date) -> pd.DataFrame:
+    """One row per day of the busy-week horizon: day, meeting_count, baseline_avg."""
+    days = pd.Index([today + timedelta(days=i) for i in range(BUSY_WEEK_HORIZON_DAYS + 1)], name="day")
+    upcoming = calendar.dropna(subset=["start_day"]).groupby("start_day")["n"].sum()
+    activity = calendar.dropna(subset=["activity_day"]).groupby("activity_day")["n"].sum()
+
+    frame = pd.DataFrame(index=days)
+    frame["meeting_count"] = upcoming.reindex(days, fill_value=0).to_numpy(dtype=np.int64)
+    # Average over days that had activity, as the per-day AVG() in SQL did.
+    frame["baseline_avg"] = float(activity.mean()) if len(activity) else 0.0
+    return frame.reset_index()
+
+
+def spike_frame(counts: pd.DataFrame, key: str, today: date, min_recent: int, limit: int) -> pd.DataFrame:
+    """
+    Keys whose recent-window count is unusually high against the baseline.
+
+    Columns: <key>, recent, baseline, baseline_est (baseline scaled to the
+    recent window, floor 1) and ratio. Keeps the `limit` busiest keys with
+    recent >= min_recent; the caller applies its own ratio threshold.
+    """
+    if counts.empty:
+        return pd.DataFrame(columns=[key, "recent", "baseline", "baseline_est", "ratio"])
+
+    recent_start = today - timedelta(days=RECENT_DAYS - 1)
+    is_recent = (counts["day"] >= recent_start).to_numpy()
+    n = counts["n"].to_numpy(dtype=np.int64)
+
+    frame = pd.DataFrame({
+        key: counts[key].to_numpy(),
+        "recent": np.where(is_recent, n, 0),
+        "baseline": np.where(is_recent, 0, n),
+    }).groupby(key, sort=False).sum()
+
+    frame = frame[frame["recent"] >= min_recent].nlargest(limit, "recent")
+    frame["baseline_est"] = np.maximum(1.0, frame["baseline"] / BASELINE_DAYS * RECENT_DAYS)
+    frame["ratio"] = frame["recent"] / frame["baseline_est"]
+    return frame.reset_index()
+
+
+def frame_records(frame: pd.DataFrame) -> List[Dict]:
+    """Frame rows as dicts of plain Python values (JSON-safe)."""
+    return [
+        {k: (v.item() if isinstance(v, np.generic) else v) for k, v in row.items()}
+        for row in frame.to_dict("records")
+    ]
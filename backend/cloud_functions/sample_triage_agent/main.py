@@ -78,20 +78,22 @@ class TriageAgent:
         logger.info(f"[{AGENT_ID}] Email from {from_email}: {subject[:50]}")
 
         # Step 2: Read context from data lake
+        self.context.observe_event(event_data)
         try:
             contact = self.context.get_contact_info(from_email)
             open_tasks = self.context.get_open_tasks()
-            recent_emails = self.context.get_recent_emails(hours=24, from_email=from_email)
+            sender_activity = self.context.get_sender_activity(from_email, hours=24)
 
             logger.info(
                 f"[{AGENT_ID}] Context: contact={contact is not None}, "
-                f"open_tasks={len(open_tasks)}, recent_emails={len(recent_emails)}"
+                f"open_tasks={len(open_tasks)}, recent_emails={sender_activity['count']}, "
+                f"active_threads={len(sender_activity['thread_last_activity'])}"
             )
         except Exception as e:
             logger.error(f"Failed to read context: {e}")
             contact = None
             open_tasks = []
-            recent_emails = []
+            sender_activity = {"count": 0, "last_seen": None, "thread_last_activity": {}}
 
         # Step 3: Make decision - should we create a task?
         decision = self._make_decision(
@@ -99,7 +101,7 @@ class TriageAgent:
             subject=subject,
             contact=contact,
             open_tasks=open_tasks,
-            recent_emails=recent_emails,
+            sender_activity=sender_activity,
         )
 
         logger.info(
@@ -141,7 +143,7 @@ class TriageAgent:
         except Exception as e:
             logger.error(f"Failed to log action: {e}")
 
-    def _make_decision(self, from_email, subject, contact, open_tasks, recent_emails):
+    def _make_decision(self, from_email, subject, contact, open_tasks, sender_activity):
         """
         Decide whether to create a task for this email.
 
@@ -0,0 +1,266 @@
+"""
+Write-behind appender for Google Sheets tabs (agent_log, tasks).
+
+append() only buffers the row; a background thread coalesces everything
+buffered for a tab into one `values().append` call. Buffers are flushed:
+- when SHEETS_FLUSH_ROWS rows are pending,
+- when the oldest pending row is SHEETS_FLUSH_INTERVAL_S old,
+- on flush() and at process exit / SIGTERM.
+
+Rate-limit (429) and 5xx responses are retried with jittered exponential
+backoff. Rows that still cannot be written, or are pending when the process
+is exiting, are spilled as JSONL to SHEETS_SPILL_DIR and re-queued by the
+next appender started on the same disk. On Cloud Functions /tmp is
+instance memory and CPU is throttled between invocations, so a buffer may
+wait for the next invocation (or SIGTERM) to go out.
+
+The SIGTERM handler runs on the main thread, possibly while that thread is
+inside flush(). It therefore never waits for the write lock: if a flush is
+in progress it spills the buffer to disk, and the atexit close() that
+follows waits for the in-flight write and drains the rest.
+
+SHEETS_WRITE_BEHIND=false makes append() write synchronously.
+
+This module is copied verbatim into each function directory that uses it
+(same pattern as agent_context.py).
+
+Usage:
+    appender = get_sheets_appender()
+    appender.append(sheet_id, "agent_log!A:J", [ts, agent_id, ...])
+    appender.flush()                  # optional; before reading the tab back
+"""
+
+import atexit
+import json
+import logging
+import os
+import random
+import signal
+import threading
+import time
+import uuid
+
+from google.auth import default
+from googleapiclient.discovery import build
+
+logger = logging.getLogger(__name__)
+
+
+SHEETS_WRITE_BEHIND = os.environ.get("SHEETS_WRITE_BEHIND", "true").lower() not in ("0", "false", "no")
+SHEETS_FLUSH_ROWS = int(os.environ.get("SHEETS_FLUSH_ROWS", "200"))
+SHEETS_FLUSH_INTERVAL_S = float(os.environ.get("SHEETS_FLUSH_INTERVAL_S", "2"))
+SHEETS_MAX_RETRIES = int(os.environ.get("SHEETS_MAX_RETRIES", "6"))
+SHEETS_SPILL_DIR = os.environ.get("SHEETS_SPILL_DIR", "/tmp/openclaw-sheets-spill")
+
+RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+
+
+class SheetsAppender:
+    """Buffers rows per (spreadsheet, range) and appends them in batches."""
+
+    def __init__(self, spill_dir=SHEETS_SPILL_DIR, write_behind=SHEETS_WRITE_BEHIND):
+        self.spill_dir = spill_dir
+        self.write_behind = write_behind
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._pending = {}
+        self._callbacks = []
+        self._pending_rows = 0
+        self._oldest = None
+        self._closed = False
+        self._service = None
+        self._thread = None
+
+        self.stats = {"rows": 0, "append_calls": 0, "retries": 0, "spilled_rows": 0}
+
+        self._requeue_spill()
+        if self.write_behind:
+            self._thread = threading.Thread(target=self._run, name="sheets-appender", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+            _chain_sigterm(self._on_sigterm)
+
+    def append(self, sheet_id, range_, row, value_input_option="USER_ENTERED", on_flushed=None):
+        """Queue one row. on_flushed() runs after the batch containing it is written."""
+        if not self.write_behind:
+            self._append_rows(sheet_id, range_, value_input_option, [row])
+            if on_flushed:
+                on_flushed()
+            return
+        with self._cond:
+            self._pending.setdefault((sheet_id, range_, value_input_option), []).append(row)
+            if on_flushed:
+                self._callbacks.append(on_flushed)
+            self._pending_rows += 1
+            if self._oldest is None:
+                self._oldest = time.time()
+            if self._pending_rows >= SHEETS_FLUSH_ROWS:
+                self._cond.notify()
+
+    def flush(self, retries=SHEETS_MAX_RETRIES, blocking=True, run_callbacks=True):
+        """
+        Write everything buffered so far. Returns the number of rows written.
+
+        With blocking=False the buffer is spilled to disk instead of waiting
+        when another flush holds the write lock.
+        """
+        with self._cond:
+            pending, self._pending = self._pending, {}
+            callbacks, self._callbacks = self._callbacks, []
+            self._pending_rows = 0
+            self._oldest = None
+        if not pending:
+            return 0
+
+        if not self._flush_lock.acquire(blocking=blocking):
+            for (sheet_id, range_, value_input_option), rows in pending.items():
+                self._spill(sheet_id, range_, value_input_option, rows)
+            return 0
+
+        written = 0
+        remaining = list(pending.items())
+        try:
+            while remaining:
+                (sheet_id, range_, value_input_option), rows = remaining[0]
+                try:
+                    self._append_rows(sheet_id, range_, value_input_option, rows, retries)
+                    written += len(rows)
+                except Exception as exc:
+                    logger.error(f"Sheets append to {range_} failed for {len(rows)} rows, spilling: {exc}")
+                    self._spill(sheet_id, range_, value_input_option, rows)
+                remaining.pop(0)
+        finally:
+            # Interrupted mid-write (SystemExit from SIGTERM): keep what is left.
+            for (sheet_id, range_, value_input_option), rows in remaining:
+                self._spill(sheet_id, range_, value_input_option, rows)
+            self._flush_lock.release()
+
+        if not run_callbacks:
+            return written
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as exc:
+                logger.warning(f"Sheets flush callback failed: {exc}")
+        return written
+
+    def close(self):
+        """Final flush (one attempt per tab); anything left is spilled to disk."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        # Waits for an in-flight background write, then drains the rest.
+        self.flush(retries=0)
+
+    def _on_sigterm(self):
+        """Stop the flusher and write what is buffered without blocking on the write lock."""
+        self._closed = True
+        self.flush(retries=0, blocking=False, run_callbacks=False)
+
+    def _run(self):
+        while not self._closed:
+            with self._cond:
+                timeout = SHEETS_FLUSH_INTERVAL_S
+                if self._oldest is not None:
+                    timeout = max(0.0, self._oldest + SHEETS_FLUSH_INTERVAL_S - time.time())
+                if self._pending_rows < SHEETS_FLUSH_ROWS:
+                    self._cond.wait(timeout)
+                due = self._pending_rows >= SHEETS_FLUSH_ROWS or (
+                    self._oldest is not None and time.time() - self._oldest >= SHEETS_FLUSH_INTERVAL_S
+                )
+            if due and not self._closed:
+                self.flush()
+
+    def _append_rows(self, sheet_id, range_, value_input_option, rows, retries=SHEETS_MAX_RETRIES):
+        for attempt in range(retries + 1):
+            try:
+                if self._service is None:
+                    credentials, _ = default()
+                    self._service = build("sheets", "v4", credentials=credentials)
+                self._service.spreadsheets().values().append(
+                    spreadsheetId=sheet_id,
+                    range=range_,
+                    valueInputOption=value_input_option,
+                    body={"values": rows},
+                ).execute()
+                self.stats["rows"] += len(rows)
+                self.stats["append_calls"] += 1
+                logger.debug(f"Appended {len(rows)} rows to {range_}")
+                return
+            except Exception as exc:
+                status = getattr(getattr(exc, "resp", None), "status", None)
+                if attempt >= retries or status not in RETRYABLE_STATUSES:
+                    raise
+                self.stats["retries"] += 1
+                delay = min(60.0, 2 ** attempt) * random.uniform(0.5, 1.0)
+                logger.warning(f"Sheets append to {range_} got {status}; retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def _spill(self, sheet_id, range_, value_input_option, rows):
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            path = os.path.join(self.spill_dir, f"{int(time.time())}-{uuid.uuid4().hex[:8]}.jsonl")
+            with open(path, "w") as fh:
+                for row in rows:
+                    fh.write(json.dumps({
+                        "sheet_id": sheet_id,
+                        "range": range_,
+                        "value_input_option": value_input_option,
+                        "row": row,
+                    }, default=str) + "\n")
+            self.stats["spilled_rows"] += len(rows)
+        except Exception as exc:
+            logger.error(f"Failed to spill {len(rows)} Sheets rows for {range_}: {exc}")
+
+    def _requeue_spill(self):
+        if not self.spill_dir or not os.path.isdir(self.spill_dir):
+            return
+        requeued = 0
+        for name in sorted(os.listdir(self.spill_dir)):
+            path = os.path.join(self.spill_dir, name)
+            try:
+                with open(path) as fh:
+                    records = [json.loads(line) for line in fh if line.strip()]
+                os.remove(path)
+            except Exception as exc:
+                logger.warning(f"Skipping unreadable Sheets spill file {path}: {exc}")
+                continue
+            for rec in records:
+                key = (rec["sheet_id"], rec["range"], rec.get("value_input_option", "USER_ENTERED"))
+                self._pending.setdefault(key, []).append(rec["row"])
+                requeued += 1
+        if requeued:
+            self._pending_rows += requeued
+            self._oldest = time.time()
+            logger.info(f"Re-queued {requeued} spilled Sheets rows")
+
+
+def _chain_sigterm(handler):
+    """Run handler on SIGTERM, then whatever was installed before."""
+    try:
+        previous = signal.getsignal(signal.SIGTERM)
+
+        def on_sigterm(signum, frame):
+            handler()
+            if callable(previous):
+                previous(signum, frame)
+            elif previous != signal.SIG_IGN:
+                raise SystemExit(128 + signum)
+
+        signal.signal(signal.SIGTERM, on_sigterm)
+    except ValueError:
+        # Not the main thread; atexit still covers a normal shutdown.
+        pass
+
+
+_APPENDER = None
+_APPENDER_LOCK = threading.Lock()
+
+
+def get_sheets_appender():
+    """Process-wide appender (kept warm across invocations)."""
+    global _APPENDER
+    with _APPENDER_LOCK:
+        if _APPENDER is None:
+            _APPENDER = SheetsAppender()
+        return _APPENDER
@@ -1,18 +1,31 @@
 import base64
 import hashlib
+import io
 import json
 import logging
 import os
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Any, Dict, Iterable, List, Optional
+from typing import Any, Dict, List, Optional
 
+from google.api_core import operation as ga_operation
 from google.auth import default
 from google.cloud import bigquery, pubsub_v1
 from google.cloud import speech_v1 as speech
 from google.cloud import storage
 from googleapiclient.discovery import build
 
+try:
+    from pydub import AudioSegment
+    from pydub.silence import detect_silence
+except Exception:  # pragma: no cover
+    AudioSegment = None
+    detect_silence = None
+
+from attachment_cache import get_attachment_cache
+
 logger = logging.getLogger(__name__)
 
 
@@ -27,6 +40,26 @@ BQ_SPEECH_TABLE = os.environ.get("BQ_SPEECH_TABLE") or (
 
 GCS_STAGING_BUCKET = os.environ.get("GCS_STAGING_BUCKET")
 
+# Follow-up topic for segment operations that outlive the inline wait.
+SPEECH_PENDING_TOPIC = os.environ.get("SPEECH_PENDING_TOPIC") or (
+    f"projects/{PROJECT_ID}/topics/openclaw-speech-pending" if PROJECT_ID else None
+)
+
+# Segmentation: audio longer than the threshold is cut at silences into
+# ~target-length segments (never longer than max) that are recognized in parallel.
+SPEECH_SEGMENT_THRESHOLD_S = int(os.environ.get("SPEECH_SEGMENT_THRESHOLD_S", "180"))
+SPEECH_SEGMENT_TARGET_S = int(os.environ.get("SPEECH_SEGMENT_TARGET_S", "120"))
+SPEECH_SEGMENT_MAX_S = int(os.environ.get("SPEECH_SEGMENT_MAX_S", "240"))
+SPEECH_MIN_SILENCE_MS = int(os.environ.get("SPEECH_MIN_SILENCE_MS", "500"))
+SPEECH_MAX_PARALLEL_SEGMENTS = int(os.environ.get("SPEECH_MAX_PARALLEL_SEGMENTS", "8"))
+
+# Polling: how long the triggering invocation waits, how long each poller
+# invocation waits, and how many poller rounds before giving up.
+SPEECH_INLINE_WAIT_S = int(os.environ.get("SPEECH_INLINE_WAIT_S", "60"))
+SPEECH_POLL_WAIT_S = int(os.environ.get("SPEECH_POLL_WAIT_S", "45"))
+SPEECH_POLL_INTERVAL_S = float(os.environ.get("SPEECH_POLL_INTERVAL_S", "5"))
+SPEECH_MAX_POLL_ATTEMPTS = int(os.environ.get("SPEECH_MAX_POLL_ATTEMPTS", "40"))
+
 
 AUDIO_MIME_TYPES = {
     "audio/mpeg",
@@ -167,7 +200,8 @@ def _process_audio_artifact(
 
     if artifact["kind"] == "gmail_message":
         msg_id = artifact["message_id"]
-        for att in _iter_gmail_attachments(gmail_service, msg_id):
+        cache = get_attachment_cache(GCS_STAGING_BUCKET, storage_client=storage_client)
+        for att in cache.iter_message_attachments(gmail_service, msg_id):
             mime_type = att.get("mime_type", "")
             if mime_type not in AUDIO_MIME_TYPES:
                 continue
@@ -203,39 +237,328 @@ def _transcribe_and_persist(
     audio_bytes: bytes,
     source_label: str,
 ) -> None:
-    now = datetime.utcnow().isoformat() + "Z"
+    """
+    Split audio at silence, submit every segment concurrently, and wait only
+    SPEECH_INLINE_WAIT_S for the operations. Anything still running is handed
+    to speech_transcription_poller via SPEECH_PENDING_TOPIC.
+    """
+    segments = _split_at_silence(audio_bytes, mime_type)
+    object_base = f"openclaw/speech/{parent_event_id}/{artifact_id}-{_short_hash(audio_bytes)}"
 
+    with ThreadPoolExecutor(max_workers=SPEECH_MAX_PARALLEL_SEGMENTS) as pool:
+        futures = [
+            pool.submit(
+                _submit_segment,
+                storage_client=storage_client,
+                speech_client=speech_client,
+                object_name=f"{object_base}/seg-{i:04d}",
+                segment=seg,
+            )
+            for i, seg in enumerate(segments)
+        ]
+        submitted = [f.result() for f in futures]
+
+    if any(s is None for s in submitted):
+        logger.error(
+            f"Speech-to-Text submit failed for some segments parent_event={parent_event_id} artifact={artifact_id}"
+        )
+    submitted = [s for s in submitted if s is not None]
+    if not submitted:
+        return
+
+    job = {
+        "parent_event_id": parent_event_id,
+        "parent_source": parent_source,
+        "artifact_id": artifact_id,
+        "mime_type": mime_type,
+        "source_label": source_label,
+        "submitted_at": datetime.utcnow().isoformat() + "Z",
+        "attempt": 0,
+        "segments": [
+            {
+                "operation_name": s["operation"].operation.name,
+                "offset_s": s["offset_s"],
+                "object_name": s["object_name"],
+            }
+            for s in submitted
+        ],
+    }
+    logger.info(
+        f"Submitted {len(submitted)} speech segments parent_event={parent_event_id} artifact={artifact_id}"
+    )
+
+    operations = [s["operation"] for s in submitted]
+    if _wait_for_operations(operations, SPEECH_INLINE_WAIT_S):
+        _finish_transcription(
+            bq=bq, publisher=publisher, storage_client=storage_client, job=job, operations=operations
+        )
+    else:
+        _publish_pending_job(publisher, job)
+
+
+def speech_transcription_poller(event, context):
+    """
+    Pub/Sub Cloud Function: finish segmented transcriptions submitted by speech_transcriber.
+
+    Trigger: SPEECH_PENDING_TOPIC (default `openclaw-speech-pending`)
+    Input: job payload {parent_event_id, artifact_id, segments: [{operation_name, offset_s, object_name}], attempt, ...}
+
+    Polls the segment operations for up to SPEECH_POLL_WAIT_S. When all are done
+    the transcripts are stitched into one speech_enrichment row; otherwise the
+    job is republished with attempt + 1 (up to SPEECH_MAX_POLL_ATTEMPTS, after
+    which whatever finished is persisted). Staged segments are deleted once the
+    job is finished.
+    """
+    if not PROJECT_ID or not PUBSUB_TOPIC or not BQ_SPEECH_TABLE:
+        logger.error("Missing required configuration (PROJECT_ID, PUBSUB_TOPIC, BQ_SPEECH_TABLE)")
+        return "Missing config"
+
+    try:
+        job = json.loads(base64.b64decode(event["data"]).decode("utf-8"))
+    except Exception as exc:
+        logger.error(f"Failed to decode pending speech job: {exc}")
+        return "Bad payload"
+
+    speech_client = speech.SpeechClient()
+    operations = []
+    for seg in job.get("segments", []):
+        try:
+            operations.append(_operation_from_name(speech_client, seg["operation_name"]))
+        except Exception as exc:
+            logger.error(f"Failed to load speech operation {seg.get('operation_name')}: {exc}")
+            operations.append(None)
+
+    live = [op for op in operations if op is not None]
+    publisher = pubsub_v1.PublisherClient()
+    attempt = int(job.get("attempt", 0)) + 1
+
+    if _wait_for_operations(live, SPEECH_POLL_WAIT_S) or attempt >= SPEECH_MAX_POLL_ATTEMPTS:
+        if attempt >= SPEECH_MAX_POLL_ATTEMPTS:
+            logger.warning(
+                f"Speech job gave up waiting after {attempt} attempts parent_event={job.get('parent_event_id')}; "
+                "persisting finished segments"
+            )
+        _finish_transcription(
+            bq=bigquery.Client(),
+            publisher=publisher,
+            storage_client=storage.Client(),
+            job=job,
+            operations=operations,
+        )
+        return "OK"
+
+    job["attempt"] = attempt
+    _publish_pending_job(publisher, job)
+    return "OK"
+
+
+def _submit_segment(
+    *,
+    storage_client: storage.Client,
+    speech_client: speech.SpeechClient,
+    object_name: str,
+    segment: Dict[str, Any],
+) -> Optional[Dict[str, Any]]:
+    """Upload one segment to GCS and start long_running_recognize without waiting on it."""
     gcs_uri = _upload_to_gcs(
         storage_client=storage_client,
         bucket_name=GCS_STAGING_BUCKET,
-        object_name=f"openclaw/speech/{parent_event_id}/{artifact_id}-{_short_hash(audio_bytes)}",
-        content=audio_bytes,
-        content_type=mime_type or "application/octet-stream",
+        object_name=object_name,
+        content=segment["content"],
+        content_type=segment["content_type"],
     )
     if not gcs_uri:
-        return
+        return None
+
+    config_kwargs: Dict[str, Any] = {
+        "encoding": segment["encoding"],
+        "enable_automatic_punctuation": True,
+        "enable_word_time_offsets": True,
+        "enable_word_confidence": True,
+        "language_code": "en-US",
+    }
+    if segment.get("sample_rate_hertz"):
+        config_kwargs["sample_rate_hertz"] = segment["sample_rate_hertz"]
+        config_kwargs["audio_channel_count"] = 1
 
-    config = speech.RecognitionConfig(
-        encoding=speech.RecognitionConfig.AudioEncoding.ENCODING_UNSPECIFIED,
-        enable_automatic_punctuation=True,
-        enable_word_time_offsets=True,
-        enable_word_confidence=True,
-        language_code="en-US",
+    try:
+        operation = speech_client.long_running_recognize(
+            config=speech.RecognitionConfig(**config_kwargs),
+            audio=speech.RecognitionAudio(uri=gcs_uri),
+        )
+    except Exception as exc:
+        logger.error(f"Speech-to-Text submit failed uri={gcs_uri}: {exc}")
+        _delete_staged_segments(storage_client, [object_name])
+        return None
+
+    return {"offset_s": segment["offset_s"], "operation": operation, "object_name": object_name}
+
+
+def _split_at_silence(audio_bytes: bytes, mime_type: str) -> List[Dict[str, Any]]:
+    """
+    Split long audio into ~SPEECH_SEGMENT_TARGET_S chunks, cutting in the middle
+    of a silence and never exceeding SPEECH_SEGMENT_MAX_S. Segments are re-encoded
+    as mono 16 kHz FLAC. Short audio, or audio pydub cannot decode, is returned
+    as a single segment in its original encoding.
+    """
+    whole = [
+        {
+            "offset_s": 0.0,
+            "content": audio_bytes,
+            "content_type": mime_type or "application/octet-stream",
+            "encoding": speech.RecognitionConfig.AudioEncoding.ENCODING_UNSPECIFIED,
+        }
+    ]
+    if AudioSegment is None:
+        return whole
+
+    try:
+        audio = AudioSegment.from_file(io.BytesIO(audio_bytes))
+    except Exception as exc:
+        logger.warning(f"Audio decode failed ({mime_type}), transcribing unsplit: {exc}")
+        return whole
+
+    total_ms = len(audio)
+    if total_ms <= SPEECH_SEGMENT_THRESHOLD_S * 1000:
+        return whole
+
+    audio = audio.set_channels(1).set_frame_rate(16000)
+    silences = detect_silence(
+        audio,
+        min_silence_len=SPEECH_MIN_SILENCE_MS,
+        silence_thresh=audio.dBFS - 16,
+        seek_step=50,
     )
-    audio = speech.RecognitionAudio(uri=gcs_uri)
+    midpoints = [(start + end) // 2 for start, end in silences]
+
+    target_ms = SPEECH_SEGMENT_TARGET_S * 1000
+    max_ms = SPEECH_SEGMENT_MAX_S * 1000
+    min_ms = target_ms // 2
+
+    cuts = [0]
+    pos = 0
+    while total_ms - pos > max_ms:
+        window = [m for m in midpoints if pos + min_ms <= m <= pos + max_ms]
+        cut = min(window, key=lambda m: abs(m - (pos + target_ms))) if window else pos + max_ms
+        cuts.append(cut)
+        pos = cut
+    cuts.append(total_ms)
+
+    segments: List[Dict[str, Any]] = []
+    for start, end in zip(cuts, cuts[1:]):
+        buf = io.BytesIO()
+        audio[start:end].export(buf, format="flac")
+        segments.append(
+            {
+                "offset_s": start / 1000.0,
+                "content": buf.getvalue(),
+                "content_type": "audio/flac",
+                "encoding": speech.RecognitionConfig.AudioEncoding.FLAC,
+                "sample_rate_hertz": 16000,
+            }
+        )
 
+    logger.info(f"Split {total_ms / 1000.0:.0f}s of audio into {len(segments)} segments")
+    return segments
+
+
+def _wait_for_operations(operations: List[Any], budget_s: float) -> bool:
+    """Poll operations until all are done or budget_s elapses. Returns True when all are done."""
+    deadline = time.time() + budget_s
+    while True:
+        pending = [op for op in operations if not op.done()]
+        if not pending:
+            return True
+        if time.time() >= deadline:
+            return False
+        time.sleep(SPEECH_POLL_INTERVAL_S)
+
+
+def _operation_from_name(speech_client: speech.SpeechClient, name: str):
+    operations_client = speech_client.transport.operations_client
+    return ga_operation.from_gapic(
+        operations_client.get_operation(name),
+        operations_client,
+        speech.LongRunningRecognizeResponse,
+        metadata_type=speech.LongRunningRecognizeMetadata,
+    )
+
+
+def _publish_pending_job(publisher: pubsub_v1.PublisherClient, job: Dict[str, Any]) -> None:
     try:
-        operation = speech_client.long_running_recognize(config=config, audio=audio)
-        response = operation.result(timeout=600)
+        future = publisher.publish(SPEECH_PENDING_TOPIC, json.dumps(job).encode("utf-8"))
+        future.result(timeout=5)
+        logger.info(
+            f"Deferred speech job parent_event={job['parent_event_id']} artifact={job['artifact_id']} "
+            f"attempt={job['attempt']}"
+        )
     except Exception as exc:
-        logger.error(f"Speech-to-Text failed parent_event={parent_event_id} artifact={artifact_id}: {exc}")
-        return
+        logger.error(f"Failed to publish pending speech job parent_event={job['parent_event_id']}: {exc}")
+
+
+def _finish_transcription(
+    *,
+    bq: bigquery.Client,
+    publisher: pubsub_v1.PublisherClient,
+    storage_client: storage.Client,
+    job: Dict[str, Any],
+    operations: List[Any],
+) -> None:
+    """Persist the stitched transcript, then delete the job's staged segments (also when nothing finished)."""
+    try:
+        _persist_transcription(bq=bq, publisher=publisher, job=job, operations=operations)
+    finally:
+        _delete_staged_segments(
+            storage_client, [seg["object_name"] for seg in job["segments"] if seg.get("object_name")]
+        )
+
+
+def _persist_transcription(
+    *,
+    bq: bigquery.Client,
+    publisher: pubsub_v1.PublisherClient,
+    job: Dict[str, Any],
+    operations: List[Any],
+) -> None:
+    """Stitch segment results (shifted by their offsets) into one speech_enrichment row."""
+    parent_event_id = job["parent_event_id"]
+    parent_source = job.get("parent_source")
+    artifact_id = job["artifact_id"]
+    mime_type = job.get("mime_type", "")
+
+    text_parts: List[str] = []
+    confs: List[float] = []
+    word_rows: List[Dict[str, Any]] = []
+    duration_seconds: Optional[float] = None
+
+    for seg, op in zip(job["segments"], operations):
+        if op is None or not op.done():
+            continue
+        try:
+            response = op.result()
+        except Exception as exc:
+            logger.error(
+                f"Speech-to-Text failed parent_event={parent_event_id} artifact={artifact_id} "
+                f"offset={seg['offset_s']}: {exc}"
+            )
+            continue
+
+        seg_text, seg_confs, seg_words, seg_end = _extract_transcript(response, offset_s=seg["offset_s"])
+        if seg_text:
+            text_parts.append(seg_text)
+        confs.extend(seg_confs)
+        word_rows.extend(seg_words)
+        if seg_end is not None:
+            duration_seconds = max(duration_seconds or 0.0, seg_end)
 
-    transcript, confidence, word_rows, duration_seconds = _extract_transcript(response)
+    transcript = " ".join(text_parts).strip()
     if not transcript:
         logger.info(f"No transcript returned parent_event={parent_event_id} artifact={artifact_id}")
         return
 
+    confidence = (sum(confs) / len(confs)) if confs else None
+    now = datetime.utcnow().isoformat() + "Z"
+
     transcription_id = f"spch-{uuid.uuid4().hex[:12]}"
     row = {
         "transcription_id": transcription_id,
@@ -247,7 +570,7 @@ def _transcribe_and_persist(
         "language_code": "en-US",
         "word_timestamps": word_rows,
         "duration_seconds": duration_seconds,
-        "source": source_label,
+        "source": job.get("source_label"),
     }
 
     errors = bq.insert_rows_json(BQ_SPEECH_TABLE, [row])
@@ -285,6 +608,18 @@ def _transcribe_and_persist(
         logger.error(f"Failed to publish speech_transcribed event {synth_event_id}: {exc}")
 
 
+def _delete_staged_segments(storage_client: storage.Client, object_names: List[str]) -> None:
+    """Best-effort removal of uploaded segment objects from GCS_STAGING_BUCKET."""
+    if not object_names:
+        return
+    bucket = storage_client.bucket(GCS_STAGING_BUCKET)
+    for name in object_names:
+        try:
+            bucket.blob(name).delete()
+        except Exception as exc:
+            logger.warning(f"Failed to delete staged speech segment {name}: {exc}")
+
+
 def _upload_to_gcs(
     *,
     storage_client: storage.Client,
@@ -303,7 +638,13 @@ def _upload_to_gcs(
         return None
 
 
-def _extract_transcript(response) -> (str, Optional[float], List[Dict[str, Any]], Optional[float]):
+def _extract_transcript(
+    response, offset_s: float = 0.0
+) -> (str, List[float], List[Dict[str, Any]], Optional[float]):
+    """
+    Flatten one recognize response. Word times are shifted by offset_s so that
+    segment results line up with the original recording.
+    """
     text_parts: List[str] = []
     confs: List[float] = []
     words: List[Dict[str, Any]] = []
@@ -320,7 +661,10 @@ def _extract_transcript(response) -> (str, Optional[float], List[Dict[str, Any]]
         for w in getattr(alt, "words", []) or []:
             start = _duration_to_seconds(w.start_time)
             end = _duration_to_seconds(w.end_time)
+            if start is not None:
+                start += offset_s
             if end is not None:
+                end += offset_s
                 last_end = end
             words.append(
                 {
@@ -332,14 +676,15 @@ def _extract_transcript(response) -> (str, Optional[float], List[Dict[str, Any]]
             )
 
     transcript = " ".join([t for t in text_parts if t]).strip()
-    avg_conf = (sum(confs) / len(confs)) if confs else None
-    return transcript, avg_conf, words, last_end
+    return transcript, confs, words, last_end
 
 
 def _duration_to_seconds(duration) -> Optional[float]:
     if duration is None:
         return None
-    # duration is protobuf Duration (seconds, nanos)
+    # proto-plus surfaces Duration as datetime.timedelta; raw protobuf has (seconds, nanos)
+    if hasattr(duration, "total_seconds"):
+        return float(duration.total_seconds())
     try:
         return float(duration.seconds) + float(duration.nanos) / 1e9
     except Exception:
@@ -358,61 +703,6 @@ def _download_drive_bytes(drive_service, file_id: str) -> Optional[bytes]:
         return None
 
 
-def _iter_gmail_attachments(gmail_service, message_id: str) -> Iterable[Dict[str, Any]]:
-    try:
-        msg = (
-            gmail_service.users()
-            .messages()
-            .get(userId="me", id=message_id, format="full")
-            .execute()
-        )
-    except Exception as exc:
-        logger.error(f"Failed to fetch Gmail message {message_id}: {exc}")
-        return []
-
-    payload = msg.get("payload", {}) or {}
-    parts = payload.get("parts", []) or []
-    stack = list(parts)
-
-    while stack:
-        part = stack.pop()
-        if not isinstance(part, dict):
-            continue
-        for child in part.get("parts", []) or []:
-            stack.append(child)
-
-        body = part.get("body") or {}
-        attachment_id = body.get("attachmentId")
-        if not attachment_id:
-            continue
-
-        filename = part.get("filename") or ""
-        mime_type = part.get("mimeType") or ""
-
-        try:
-            att = (
-                gmail_service.users()
-                .messages()
-                .attachments()
-                .get(userId="me", messageId=message_id, id=attachment_id)
-                .execute()
-            )
-            data_b64 = att.get("data")
-            if not data_b64:
-                continue
-            content = base64.urlsafe_b64decode(data_b64.encode("utf-8"))
-        except Exception as exc:
-            logger.error(f"Failed to fetch attachment {attachment_id} for {message_id}: {exc}")
-            continue
-
-        yield {
-            "attachment_id": attachment_id,
-            "filename": filename,
-            "mime_type": mime_type,
-            "bytes": content,
-        }
-
-
 def _parse_payload(payload: Any) -> Dict[str, Any]:
     if payload is None:
         return {}
@@ -0,0 +1,290 @@
+"""
+Warm, indexed view of the Sheets `contacts` tab for universal_nlp_enricher.
+
+The whole tab is loaded once per instance and compiled into an Aho-Corasick
+automaton over normalized contact names and emails, so each event's text is
+scanned for every known contact in a single linear pass regardless of how
+many contacts there are.
+
+Freshness:
+- After CONTACTS_INDEX_TTL_S the index is revalidated against the sheet's
+  Drive `version`; the tab is only re-read when the spreadsheet changed.
+- If Drive is unavailable the tab is simply re-read at TTL expiry.
+- A failed reload keeps serving the previous index.
+
+Usage:
+    index = get_contacts_index(SHEET_ID)
+    index.find_in_text(raw_text)     # -> [{"contact": {...}, "match": "...", "start": i, "end": j}]
+    index.lookup(entity_name)        # -> contact dict or None (exact normalized match)
+"""
+
+import logging
+import os
+import re
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+from google.auth import default
+from googleapiclient.discovery import build
+
+logger = logging.getLogger(__name__)
+
+
+CONTACTS_RANGE = os.environ.get("CONTACTS_RANGE", "contacts!A:Z")
+CONTACTS_INDEX_TTL_S = int(os.environ.get("CONTACTS_INDEX_TTL_S", "300"))
+
+# Names shorter than this match too much ordinary text ("Al", "Jo").
+MIN_NAME_CHARS = int(os.environ.get("CONTACTS_MIN_NAME_CHARS", "4"))
+
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    """Casefold and collapse whitespace; applied to both patterns and scanned text."""
+    return _SPACE_RE.sub(" ", text.casefold()).strip()
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+class AhoCorasick:
+    """Minimal Aho-Corasick automaton over strings, matching on word boundaries."""
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        self._patterns: List[str] = []
+
+    def add(self, pattern: str) -> int:
+        """Add a pattern and return its id. Call build() after the last add()."""
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        pattern_id = len(self._patterns)
+        self._patterns.append(pattern)
+        self._out[node].append(pattern_id)
+        return pattern_id
+
+    def build(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[child] = self._goto[f].get(ch, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def iter_matches(self, text: str):
+        """Yield (pattern_id, start, end) for whole-word occurrences in text."""
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for pattern_id in self._out[node]:
+                start = i - len(self._patterns[pattern_id]) + 1
+                end = i + 1
+                if start > 0 and _is_word_char(text[start - 1]) and _is_word_char(text[start]):
+                    continue
+                if end < len(text) and _is_word_char(text[end]) and _is_word_char(text[end - 1]):
+                    continue
+                yield pattern_id, start, end
+
+
+class ContactsIndex:
+    """Contacts tab held in memory with an exact-lookup table and a multi-pattern matcher."""
+
+    def __init__(self, sheet_id: Optional[str], ttl_s: int = CONTACTS_INDEX_TTL_S):
+        self.sheet_id = sheet_id
+        self.ttl_s = ttl_s
+
+        self._sheets = None
+        self._drive = None
+        self._checked_at = 0.0
+        self._version: Optional[str] = None
+
+        self._contacts: List[Dict[str, Any]] = []
+        self._by_key: Dict[str, int] = {}
+        self._matcher: Optional[AhoCorasick] = None
+        self._pattern_contacts: List[int] = []
+
+        self.stats = {"loads": 0, "revalidations": 0, "load_failures": 0}
+
+    def __len__(self) -> int:
+        self._ensure_fresh()
+        return len(self._contacts)
+
+    def lookup(self, text: str) -> Optional[Dict[str, Any]]:
+        """Exact (normalized) match of a name or email against the contacts tab."""
+        self._ensure_fresh()
+        idx = self._by_key.get(normalize(text or ""))
+        return self._contacts[idx] if idx is not None else None
+
+    def find_in_text(self, text: str) -> List[Dict[str, Any]]:
+        """All known-contact mentions in text, leftmost-longest, non-overlapping."""
+        self._ensure_fresh()
+        if not text or self._matcher is None:
+            return []
+
+        haystack = normalize(text)
+        hits: List[Tuple[int, int, int]] = [
+            (start, end, self._pattern_contacts[pid])
+            for pid, start, end in self._matcher.iter_matches(haystack)
+        ]
+        hits.sort(key=lambda h: (h[0], -(h[1] - h[0])))
+
+        out: List[Dict[str, Any]] = []
+        last_end = -1
+        for start, end, contact_idx in hits:
+            if start < last_end:
+                continue
+            last_end = end
+            out.append(
+                {
+                    "contact": self._contacts[contact_idx],
+                    "match": haystack[start:end],
+                    "start": start,
+                    "end": end,
+                }
+            )
+        return out
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def _ensure_fresh(self) -> None:
+        if not self.sheet_id:
+            return
+        now = time.time()
+        if self._matcher is not None and now - self._checked_at < self.ttl_s:
+            return
+        self._checked_at = now
+
+        version = self._drive_version()
+        if self._matcher is not None and version is not None and version == self._version:
+            self.stats["revalidations"] += 1
+            return
+
+        try:
+            rows = self._read_rows()
+        except Exception as exc:
+            self.stats["load_failures"] += 1
+            logger.warning(f"Failed to load contacts from Sheets: {exc}")
+            return
+
+        self._rebuild(rows)
+        self._version = version
+        self.stats["loads"] += 1
+        logger.info(f"Contacts index loaded: {len(self._contacts)} contacts, version={version}")
+
+    def _drive_version(self) -> Optional[str]:
+        try:
+            if self._drive is None:
+                credentials, _ = default()
+                self._drive = build("drive", "v3", credentials=credentials, cache_discovery=False)
+            meta = self._drive.files().get(fileId=self.sheet_id, fields="version").execute()
+            return str(meta.get("version")) if meta.get("version") is not None else None
+        except Exception as exc:
+            logger.info(f"Drive version check unavailable for contacts sheet: {exc}")
+            return None
+
+    def _read_rows(self) -> List[List[Any]]:
+        if self._sheets is None:
+            credentials, _ = default()
+            self._sheets = build("sheets", "v4", credentials=credentials, cache_discovery=False)
+        resp = (
+            self._sheets.spreadsheets()
+            .values()
+            .get(spreadsheetId=self.sheet_id, range=CONTACTS_RANGE)
+            .execute()
+        )
+        return resp.get("values", []) or []
+
+    def _rebuild(self, rows: List[List[Any]]) -> None:
+        contacts: List[Dict[str, Any]] = []
+        by_key: Dict[str, int] = {}
+        matcher = AhoCorasick()
+        pattern_contacts: List[int] = []
+        seen_patterns: Dict[str, int] = {}
+
+        headers = [normalize(str(h)) for h in rows[0]] if rows else []
+        email_col = headers.index("email") if "email" in headers else None
+        name_col = headers.index("name") if "name" in headers else None
+
+        for row in rows[1:]:
+            email, name = _contact_fields(row, email_col, name_col)
+            if not email and not name:
+                continue
+
+            contact = {"email": email, "name": name}
+            idx = len(contacts)
+            contacts.append(contact)
+
+            for key in (email, name):
+                if not key:
+                    continue
+                norm = normalize(key)
+                by_key.setdefault(norm, idx)
+                if norm in seen_patterns or (key == name and len(norm) < MIN_NAME_CHARS):
+                    continue
+                seen_patterns[norm] = idx
+                matcher.add(norm)
+                pattern_contacts.append(idx)
+
+        matcher.build()
+        self._contacts = contacts
+        self._by_key = by_key
+        self._matcher = matcher
+        self._pattern_contacts = pattern_contacts
+
+
+def _contact_fields(
+    row: List[Any], email_col: Optional[int], name_col: Optional[int]
+) -> Tuple[Optional[str], Optional[str]]:
+    """Pull (email, name) from a row; falls back to sniffing cells when headers are missing."""
+
+    def cell(i: Optional[int]) -> Optional[str]:
+        if i is None or i >= len(row) or not isinstance(row[i], str):
+            return None
+        return row[i].strip() or None
+
+    email = cell(email_col)
+    name = cell(name_col)
+    if email_col is not None or name_col is not None:
+        return (email.lower() if email else None), name
+
+    for value in row:
+        if not isinstance(value, str) or not value.strip():
+            continue
+        s = value.strip()
+        if email is None and "@" in s and "." in s:
+            email = s.lower()
+        elif name is None and "@" not in s and len(s) <= 80:
+            name = s
+    return email, name
+
+
+_INDEXES: Dict[Optional[str], ContactsIndex] = {}
+
+
+def get_contacts_index(sheet_id: Optional[str]) -> ContactsIndex:
+    """Return the process-wide index for a spreadsheet (kept warm across invocations)."""
+    index = _INDEXES.get(sheet_id)
+    if index is None:
+        index = ContactsIndex(sheet_id)
+        _INDEXES[sheet_id] = index
+    return index
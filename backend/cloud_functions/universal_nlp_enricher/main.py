@@ -3,11 +3,11 @@ import json
 import logging
 import os
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Set, Tuple
+from typing import Any, Dict, List, Optional, Set
 
-from google.auth import default
 from google.cloud import bigquery, language_v1
-from googleapiclient.discovery import build
+
+from contacts_index import ContactsIndex, get_contacts_index
 
 logger = logging.getLogger(__name__)
 
@@ -55,15 +55,15 @@ def universal_nlp_enricher(event, context):
         logger.info(f"NLP enrichment already exists for event {event_id}, skipping")
         return "OK"
 
-    known_emails, known_names = _load_known_contacts()
+    contacts = get_contacts_index(SHEET_ID)
 
     enrichment = _analyze_text_with_nlp(raw_text)
     if not enrichment:
         return "OK"
 
     entities = enrichment.get("entities", [])
-    if known_emails or known_names:
-        entities = _annotate_known_contacts(entities, known_emails, known_names)
+    if len(contacts):
+        entities = _annotate_known_contacts(entities, raw_text, contacts)
 
     row = {
         "event_id": event_id,
@@ -120,67 +120,53 @@ def _extract_text(*, source: Optional[str], payload: Dict[str, Any]) -> Optional
     return "\n".join(cleaned) if cleaned else None
 
 
-def _load_known_contacts() -> Tuple[Set[str], Set[str]]:
-    """
-    Best-effort contact loading from Sheets `contacts` tab.
-    This does not block enrichment if Sheets is unavailable.
-    """
-    if not SHEET_ID:
-        return set(), set()
-
-    try:
-        credentials, _ = default()
-        service = build("sheets", "v4", credentials=credentials, cache_discovery=False)
-        resp = (
-            service.spreadsheets()
-            .values()
-            .get(spreadsheetId=SHEET_ID, range="contacts!A:Z")
-            .execute()
-        )
-        values = resp.get("values", []) or []
-        if len(values) < 2:
-            return set(), set()
-
-        emails: Set[str] = set()
-        names: Set[str] = set()
-        # Skip header row; collect strings that look like emails, and common name-ish values.
-        for row in values[1:501]:
-            for cell in row:
-                if not isinstance(cell, str):
-                    continue
-                s = cell.strip()
-                if not s:
-                    continue
-                if "@" in s and "." in s:
-                    emails.add(s.lower())
-                elif len(s) <= 80:
-                    names.add(s)
-        return emails, names
-    except Exception as exc:
-        logger.warning(f"Failed to load contacts from Sheets: {exc}")
-        return set(), set()
-
-
 def _annotate_known_contacts(
     entities: List[Dict[str, Any]],
-    known_emails: Set[str],
-    known_names: Set[str],
+    raw_text: str,
+    index: ContactsIndex,
 ) -> List[Dict[str, Any]]:
+    """
+    Flag entities that resolve to a contact, then append a KNOWN_CONTACT entity
+    for each contact mentioned in the text that NLP did not surface (e.g. bare
+    email addresses, which Cloud NLP does not extract).
+    """
+    matched: Set[int] = set()
     out: List[Dict[str, Any]] = []
     for e in entities:
         name = (e.get("name") or "").strip()
-        if not name:
-            out.append(e)
-            continue
-        is_known = (name.lower() in known_emails) or (name in known_names)
-        if is_known:
+        contact = index.lookup(name) if name else None
+        if contact is None and name:
+            hits = index.find_in_text(name)
+            contact = hits[0]["contact"] if hits else None
+        if contact is not None:
+            matched.add(id(contact))
             meta = e.get("metadata") or {}
             if isinstance(meta, dict):
                 meta = dict(meta)
                 meta["known_contact"] = True
+                if contact.get("email"):
+                    meta["contact_email"] = contact["email"]
                 e = dict(e)
                 e["metadata"] = meta
         out.append(e)
+
+    for hit in index.find_in_text(raw_text):
+        contact = hit["contact"]
+        if id(contact) in matched:
+            continue
+        matched.add(id(contact))
+        meta = {"known_contact": True}
+        if contact.get("email"):
+            meta["contact_email"] = contact["email"]
+        out.append(
+            {
+                "name": contact.get("name") or contact.get("email"),
+                "type": "KNOWN_CONTACT",
+                "salience": 0.0,
+                "metadata": meta,
+                "mentions": [{"text": hit["match"], "type": "PROPER"}],
+            }
+        )
     return out
 
 
@@ -0,0 +1,311 @@
+"""
+Shared Gmail attachment cache for OpenClaw enrichers.
+
+vision_document_ai and speech_transcriber both consume the attachments of the
+same Gmail message. The first consumer fetches the message once, stores every
+attachment content-addressed (sha256) in GCS next to a per-message manifest,
+and every later consumer reads from the manifest without calling Gmail again.
+
+Layout in GCS_STAGING_BUCKET:
+    openclaw/attachments/messages/{message_id}.json   manifest (MIME metadata)
+    openclaw/attachments/blobs/{sha256}               attachment bytes
+
+A process-local LRU bounded by total bytes sits in front of GCS so warm
+instances skip the GCS round trip as well. Attachments larger than
+ATTACHMENT_CACHE_MAX_OBJECT_BYTES are listed in the manifest but not stored;
+consumers fetch those individually from Gmail. Age-based cleanup of the GCS
+tier is left to a bucket lifecycle rule on the `openclaw/attachments/` prefix.
+
+This module is copied verbatim into each function directory that uses it
+(same pattern as agent_context.py).
+
+Usage:
+    cache = get_attachment_cache(GCS_STAGING_BUCKET)
+    for att in cache.iter_message_attachments(gmail_service, message_id):
+        att["bytes"], att["mime_type"], att["sha256"], ...
+"""
+
+import base64
+import hashlib
+import json
+import logging
+import os
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+MANIFEST_PREFIX = "openclaw/attachments/messages"
+BLOB_PREFIX = "openclaw/attachments/blobs"
+
+MAX_MEMORY_BYTES = int(os.environ.get("ATTACHMENT_CACHE_MAX_MEMORY_BYTES", str(64 * 1024 * 1024)))
+MAX_OBJECT_BYTES = int(os.environ.get("ATTACHMENT_CACHE_MAX_OBJECT_BYTES", str(25 * 1024 * 1024)))
+MAX_MANIFESTS = 256
+
+
+class AttachmentCache:
+    """Two-tier (memory LRU + GCS) content-addressed store for Gmail attachments."""
+
+    def __init__(
+        self,
+        bucket_name: Optional[str] = None,
+        storage_client=None,
+        max_memory_bytes: int = MAX_MEMORY_BYTES,
+        max_object_bytes: int = MAX_OBJECT_BYTES,
+    ):
+        self.bucket_name = bucket_name
+        self._storage_client = storage_client
+        self.max_memory_bytes = max_memory_bytes
+        self.max_object_bytes = max_object_bytes
+
+        self._blobs: "OrderedDict[str, bytes]" = OrderedDict()
+        self._blob_bytes = 0
+        self._manifests: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+
+        self.stats = {"memory_hits": 0, "gcs_hits": 0, "gmail_fetches": 0, "evictions": 0}
+
+    def iter_message_attachments(self, gmail_service, message_id: str) -> Iterable[Dict[str, Any]]:
+        """
+        Yields dicts: {attachment_id, filename, mime_type, size, sha256, bytes}
+
+        Reads the manifest from memory or GCS when another consumer already
+        filled it; otherwise fetches from Gmail and fills both tiers.
+        """
+        manifest = self._load_manifest(message_id)
+        if manifest is None:
+            self.stats["gmail_fetches"] += 1
+            yield from self._fetch_and_store(gmail_service, message_id)
+            return
+
+        for entry in manifest:
+            content = self._get_blob(entry.get("sha256"))
+            if content is None:
+                content = _fetch_attachment_bytes(gmail_service, message_id, entry.get("attachment_id"))
+                if content is None:
+                    continue
+            yield dict(entry, bytes=content)
+
+    # ------------------------------------------------------------------
+    # Gmail fill path
+    # ------------------------------------------------------------------
+
+    def _fetch_and_store(self, gmail_service, message_id: str) -> Iterable[Dict[str, Any]]:
+        try:
+            msg = (
+                gmail_service.users()
+                .messages()
+                .get(userId="me", id=message_id, format="full")
+                .execute()
+            )
+        except Exception as exc:
+            logger.error(f"Failed to fetch Gmail message {message_id}: {exc}")
+            return
+
+        manifest: List[Dict[str, Any]] = []
+        failed = 0
+        for part in _iter_attachment_parts(msg.get("payload", {}) or {}):
+            attachment_id = part["attachment_id"]
+            content = _fetch_attachment_bytes(gmail_service, message_id, attachment_id)
+            if content is None:
+                failed += 1
+                continue
+
+            sha256 = hashlib.sha256(content).hexdigest()
+            entry = {
+                "attachment_id": attachment_id,
+                "filename": part["filename"],
+                "mime_type": part["mime_type"],
+                "size": len(content),
+                "sha256": sha256,
+            }
+            manifest.append(entry)
+            self._put_blob(sha256, content, part["mime_type"])
+            yield dict(entry, bytes=content)
+
+        if failed:
+            # A partial manifest would hide the failed parts from every later
+            # consumer; leave it unwritten so the next read goes back to Gmail.
+            logger.warning(f"{failed} attachment(s) of {message_id} failed to fetch; manifest not stored")
+            return
+        self._store_manifest(message_id, manifest)
+
+    # ------------------------------------------------------------------
+    # Manifest tier
+    # ------------------------------------------------------------------
+
+    def _load_manifest(self, message_id: str) -> Optional[List[Dict[str, Any]]]:
+        if message_id in self._manifests:
+            self._manifests.move_to_end(message_id)
+            return self._manifests[message_id]
+
+        bucket = self._bucket()
+        if bucket is None:
+            return None
+
+        try:
+            blob = bucket.blob(f"{MANIFEST_PREFIX}/{message_id}.json")
+            if not blob.exists():
+                return None
+            data = json.loads(blob.download_as_bytes().decode("utf-8"))
+        except Exception as exc:
+            logger.warning(f"Attachment manifest read failed message_id={message_id}: {exc}")
+            return None
+
+        manifest = data.get("attachments", []) if isinstance(data, dict) else []
+        self._remember_manifest(message_id, manifest)
+        return manifest
+
+    def _store_manifest(self, message_id: str, manifest: List[Dict[str, Any]]) -> None:
+        self._remember_manifest(message_id, manifest)
+
+        bucket = self._bucket()
+        if bucket is None:
+            return
+
+        body = {
+            "message_id": message_id,
+            "cached_at": datetime.utcnow().isoformat() + "Z",
+            "attachments": manifest,
+        }
+        try:
+            bucket.blob(f"{MANIFEST_PREFIX}/{message_id}.json").upload_from_string(
+                json.dumps(body), content_type="application/json"
+            )
+        except Exception as exc:
+            logger.warning(f"Attachment manifest write failed message_id={message_id}: {exc}")
+
+    def _remember_manifest(self, message_id: str, manifest: List[Dict[str, Any]]) -> None:
+        self._manifests[message_id] = manifest
+        self._manifests.move_to_end(message_id)
+        while len(self._manifests) > MAX_MANIFESTS:
+            self._manifests.popitem(last=False)
+
+    # ------------------------------------------------------------------
+    # Blob tier
+    # ------------------------------------------------------------------
+
+    def _get_blob(self, sha256: Optional[str]) -> Optional[bytes]:
+        if not sha256:
+            return None
+
+        content = self._blobs.get(sha256)
+        if content is not None:
+            self._blobs.move_to_end(sha256)
+            self.stats["memory_hits"] += 1
+            return content
+
+        bucket = self._bucket()
+        if bucket is None:
+            return None
+
+        try:
+            content = bucket.blob(f"{BLOB_PREFIX}/{sha256}").download_as_bytes()
+        except Exception as exc:
+            logger.info(f"Attachment blob not in GCS sha256={sha256[:12]}: {exc}")
+            return None
+
+        self.stats["gcs_hits"] += 1
+        self._remember_blob(sha256, content)
+        return content
+
+    def _put_blob(self, sha256: str, content: bytes, mime_type: str) -> None:
+        if len(content) > self.max_object_bytes:
+            logger.info(f"Attachment sha256={sha256[:12]} exceeds cache object limit, not stored")
+            return
+
+        self._remember_blob(sha256, content)
+
+        bucket = self._bucket()
+        if bucket is None:
+            return
+
+        try:
+            blob = bucket.blob(f"{BLOB_PREFIX}/{sha256}")
+            if not blob.exists():
+                blob.upload_from_string(content, content_type=mime_type or "application/octet-stream")
+        except Exception as exc:
+            logger.warning(f"Attachment blob write failed sha256={sha256[:12]}: {exc}")
+
+    def _remember_blob(self, sha256: str, content: bytes) -> None:
+        if len(content) > self.max_memory_bytes:
+            return
+        if sha256 in self._blobs:
+            self._blobs.move_to_end(sha256)
+            return
+
+        self._blobs[sha256] = content
+        self._blob_bytes += len(content)
+        while self._blob_bytes > self.max_memory_bytes and self._blobs:
+            _, evicted = self._blobs.popitem(last=False)
+            self._blob_bytes -= len(evicted)
+            self.stats["evictions"] += 1
+
+    def _bucket(self):
+        if not self.bucket_name:
+            return None
+        if self._storage_client is None:
+            try:
+                from google.cloud import storage
+
+                self._storage_client = storage.Client()
+            except Exception as exc:
+                logger.warning(f"GCS unavailable for attachment cache: {exc}")
+                self.bucket_name = None
+                return None
+        return self._storage_client.bucket(self.bucket_name)
+
+
+_CACHES: Dict[Optional[str], AttachmentCache] = {}
+
+
+def get_attachment_cache(bucket_name: Optional[str], storage_client=None) -> AttachmentCache:
+    """Return the process-wide cache for a bucket (reused across warm invocations)."""
+    cache = _CACHES.get(bucket_name)
+    if cache is None:
+        cache = AttachmentCache(bucket_name=bucket_name, storage_client=storage_client)
+        _CACHES[bucket_name] = cache
+    return cache
+
+
+def _iter_attachment_parts(payload: Dict[str, Any]) -> Iterable[Dict[str, Any]]:
+    """Depth-first traversal over MIME parts yielding those that carry an attachmentId."""
+    stack = list(payload.get("parts", []) or [])
+    while stack:
+        part = stack.pop()
+        if not isinstance(part, dict):
+            continue
+        for child in part.get("parts", []) or []:
+            stack.append(child)
+
+        body = part.get("body") or {}
+        attachment_id = body.get("attachmentId")
+        if not attachment_id:
+            continue
+
+        yield {
+            "attachment_id": attachment_id,
+            "filename": part.get("filename") or "",
+            "mime_type": part.get("mimeType") or "",
+        }
+
+
+def _fetch_attachment_bytes(gmail_service, message_id: str, attachment_id: Optional[str]) -> Optional[bytes]:
+    if not attachment_id:
+        return None
+    try:
+        att = (
+            gmail_service.users()
+            .messages()
+            .attachments()
+            .get(userId="me", messageId=message_id, id=attachment_id)
+            .execute()
+        )
+        data_b64 = att.get("data")
+        if not data_b64:
+            return None
+        return base64.urlsafe_b64decode(data_b64.encode("utf-8"))
+    except Exception as exc:
+        logger.error(f"Failed to fetch attachment {attachment_id} for {message_id}: {exc}")
+        return None
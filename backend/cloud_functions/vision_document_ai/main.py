@@ -1,15 +1,24 @@
 import base64
 import hashlib
+import io
 import json
 import logging
 import os
+import time
 from datetime import datetime
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 from google.auth import default
-from google.cloud import bigquery, pubsub_v1, vision
+from google.cloud import bigquery, pubsub_v1, storage, vision
 from googleapiclient.discovery import build
 
+try:
+    from PIL import Image as PILImage
+except Exception:  # pragma: no cover
+    PILImage = None
+
+from attachment_cache import get_attachment_cache
+
 logger = logging.getLogger(__name__)
 
 
@@ -22,22 +31,62 @@ BQ_VISION_TABLE = os.environ.get("BQ_VISION_TABLE") or (
     f"{PROJECT_ID}.openclaw.vision_enrichment" if PROJECT_ID else None
 )
 
-# Optional: if set, used to stage larger binaries (e.g., PDFs) for async OCR later.
+# Optional: if set, used to stage PDFs/TIFFs for async OCR,
+# and as the persistent tier of the shared Gmail attachment cache.
 GCS_STAGING_BUCKET = os.environ.get("GCS_STAGING_BUCKET")
 
+# Follow-up topic for document OCR operations that outlive the inline wait.
+VISION_PENDING_TOPIC = os.environ.get("VISION_PENDING_TOPIC") or (
+    f"projects/{PROJECT_ID}/topics/openclaw-vision-pending" if PROJECT_ID else None
+)
+
 
-# MIME types to treat as images for synchronous Vision annotate_image.
+# batch_annotate_images accepts at most 16 requests per call.
+VISION_BATCH_SIZE = int(os.environ.get("VISION_BATCH_SIZE", "16"))
+# Async file OCR: pages per output shard.
+VISION_PAGES_PER_SHARD = int(os.environ.get("VISION_PAGES_PER_SHARD", "5"))
+# Polling: how long the triggering invocation waits, how long each poller
+# invocation waits, and how many poller rounds before giving up.
+VISION_INLINE_WAIT_S = int(os.environ.get("VISION_INLINE_WAIT_S", "60"))
+VISION_POLL_WAIT_S = int(os.environ.get("VISION_POLL_WAIT_S", "45"))
+VISION_POLL_INTERVAL_S = float(os.environ.get("VISION_POLL_INTERVAL_S", "3"))
+VISION_MAX_POLL_ATTEMPTS = int(os.environ.get("VISION_MAX_POLL_ATTEMPTS", "40"))
+
+
+# MIME types to treat as images for synchronous batch_annotate_images.
 IMAGE_MIME_TYPES = {
     "image/jpeg",
     "image/png",
     "image/gif",
     "image/bmp",
     "image/webp",
-    "image/tiff",
 }
 
+# Multi-page formats routed through async_batch_annotate_files.
 DOC_MIME_TYPES = {
     "application/pdf",
+    "image/tiff",
+}
+
+# Feature groups sent as separate requests, each at the resolution its features
+# need: labels/objects/colors work at ~640px, OCR wants more pixels for small text.
+FEATURE_GROUPS: Dict[str, Dict[str, Any]] = {
+    "scene": {
+        "max_side": 640,
+        "features": [
+            {"type_": vision.Feature.Type.LABEL_DETECTION, "max_results": 15},
+            {"type_": vision.Feature.Type.OBJECT_LOCALIZATION, "max_results": 15},
+            {"type_": vision.Feature.Type.IMAGE_PROPERTIES},
+            {"type_": vision.Feature.Type.SAFE_SEARCH_DETECTION},
+        ],
+    },
+    "text": {
+        "max_side": 1600,
+        "features": [
+            {"type_": vision.Feature.Type.TEXT_DETECTION},
+            {"type_": vision.Feature.Type.DOCUMENT_TEXT_DETECTION},
+        ],
+    },
 }
 
 
@@ -103,24 +152,52 @@ def vision_document_ai(event, context):
     drive_service = build("drive", "v3", credentials=credentials, cache_discovery=False)
     gmail_service = build("gmail", "v1", credentials=credentials, cache_discovery=False)
 
-    processed = 0
+    images: List[Dict[str, Any]] = []
+    documents: List[Dict[str, Any]] = []
     for art in artifacts:
         try:
-            processed += 1
-            _process_artifact(
+            for item in _collect_artifact_items(
+                drive_service=drive_service,
+                gmail_service=gmail_service,
+                artifact=art,
+            ):
+                if item["mime_type"] in DOC_MIME_TYPES:
+                    documents.append(item)
+                else:
+                    images.append(item)
+        except Exception as exc:
+            logger.error(f"Artifact download failed for {event_id}: {exc}")
+
+    if images:
+        try:
+            _annotate_images_batched(
                 bq=bq,
                 publisher=publisher,
                 vision_client=vision_client,
-                drive_service=drive_service,
-                gmail_service=gmail_service,
                 parent_event_id=event_id,
                 parent_source=source,
-                artifact=art,
+                images=images,
+            )
+        except Exception as exc:
+            logger.error(f"Image annotation failed for {event_id}: {exc}")
+
+    if documents:
+        try:
+            _annotate_documents_async(
+                bq=bq,
+                publisher=publisher,
+                vision_client=vision_client,
+                storage_client=storage.Client(),
+                parent_event_id=event_id,
+                parent_source=source,
+                documents=documents,
             )
         except Exception as exc:
-            logger.error(f"Artifact processing failed for {event_id}: {exc}")
+            logger.error(f"Document OCR failed for {event_id}: {exc}")
 
-    logger.info(f"vision_document_ai processed {processed} artifacts for {event_id}")
+    logger.info(
+        f"vision_document_ai processed {len(images)} images and {len(documents)} documents for {event_id}"
+    )
     return "OK"
 
 
@@ -142,7 +219,7 @@ def _extract_drive_artifacts(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
 def _extract_gmail_attachments(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
     """
     Gmail events currently include message_id but not attachment metadata.
-    We fetch the message and scan for image/pdf attachments.
+    We fetch the message and scan for image/pdf/tiff attachments.
     """
     message_id = payload.get("message_id")
     if not message_id:
@@ -151,38 +228,28 @@ def _extract_gmail_attachments(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
     return [{"kind": "gmail_message", "message_id": message_id}]
 
 
-def _process_artifact(
+def _collect_artifact_items(
     *,
-    bq: bigquery.Client,
-    publisher: pubsub_v1.PublisherClient,
-    vision_client: vision.ImageAnnotatorClient,
     drive_service,
     gmail_service,
-    parent_event_id: str,
-    parent_source: str,
     artifact: Dict[str, Any],
-) -> None:
+) -> List[Dict[str, Any]]:
+    """
+    Resolve an artifact into downloadable items: {artifact_id, mime_type, bytes}.
+    """
     if artifact["kind"] == "drive_file":
         file_id = artifact["file_id"]
         mime_type = artifact.get("mime_type", "")
         content = _download_drive_file_bytes(drive_service, file_id)
         if content is None:
-            return
-        _run_vision_and_persist(
-            bq=bq,
-            publisher=publisher,
-            vision_client=vision_client,
-            parent_event_id=parent_event_id,
-            parent_source=parent_source,
-            artifact_id=file_id,
-            artifact_mime=mime_type,
-            image_bytes=content,
-        )
-        return
+            return []
+        return [{"artifact_id": file_id, "mime_type": mime_type, "bytes": content}]
 
+    items: List[Dict[str, Any]] = []
     if artifact["kind"] == "gmail_message":
         msg_id = artifact["message_id"]
-        for attachment in _iter_gmail_attachments(gmail_service, msg_id):
+        cache = get_attachment_cache(GCS_STAGING_BUCKET)
+        for attachment in cache.iter_message_attachments(gmail_service, msg_id):
             att_id = attachment.get("attachment_id")
             filename = attachment.get("filename", "")
             mime_type = attachment.get("mime_type", "")
@@ -190,109 +257,150 @@ def _process_artifact(
             if not body_bytes:
                 continue
 
-            # Only process image/pdf attachments.
+            # Only process image/pdf/tiff attachments.
             if (mime_type not in IMAGE_MIME_TYPES) and (mime_type not in DOC_MIME_TYPES):
                 continue
 
             artifact_id = att_id or filename or _short_hash(body_bytes)
-            _run_vision_and_persist(
-                bq=bq,
-                publisher=publisher,
-                vision_client=vision_client,
-                parent_event_id=parent_event_id,
-                parent_source=parent_source,
-                artifact_id=artifact_id,
-                artifact_mime=mime_type,
-                image_bytes=body_bytes,
-            )
-        return
+            items.append({"artifact_id": str(artifact_id), "mime_type": mime_type, "bytes": body_bytes})
+    return items
 
 
-def _run_vision_and_persist(
+def _annotate_images_batched(
     *,
     bq: bigquery.Client,
     publisher: pubsub_v1.PublisherClient,
     vision_client: vision.ImageAnnotatorClient,
     parent_event_id: str,
     parent_source: str,
-    artifact_id: str,
-    artifact_mime: str,
-    image_bytes: bytes,
+    images: List[Dict[str, Any]],
 ) -> None:
-    # PDFs require async batch annotate in Vision; we do best-effort skip for now.
-    if artifact_mime in DOC_MIME_TYPES:
-        logger.info(
-            "Skipping PDF vision OCR (requires async_batch_annotate_files + GCS staging). "
-            f"parent_event={parent_event_id} artifact={artifact_id} bucket={GCS_STAGING_BUCKET or 'unset'}"
-        )
-        return
+    """
+    Annotate images with batch_annotate_images, VISION_BATCH_SIZE requests per call.
 
-    image = vision.Image(content=image_bytes)
-
-    response = vision_client.annotate_image(
-        {
-            "image": image,
-            "features": [
-                {"type_": vision.Feature.Type.LABEL_DETECTION, "max_results": 15},
-                {"type_": vision.Feature.Type.OBJECT_LOCALIZATION, "max_results": 15},
-                {"type_": vision.Feature.Type.IMAGE_PROPERTIES},
-                {"type_": vision.Feature.Type.SAFE_SEARCH_DETECTION},
-                # Text extraction:
-                {"type_": vision.Feature.Type.TEXT_DETECTION},
-                {"type_": vision.Feature.Type.DOCUMENT_TEXT_DETECTION},
-            ],
-        }
-    )
+    Each image becomes one request per FEATURE_GROUPS entry, downscaled to that
+    group's resolution, so label/object detection does not upload OCR-sized bytes.
+    """
+    requests: List[Tuple[int, str, Any]] = []
+    for idx, item in enumerate(images):
+        for group_name, group in FEATURE_GROUPS.items():
+            content = _downscale_image(item["bytes"], item["mime_type"], group["max_side"])
+            requests.append(
+                (
+                    idx,
+                    group_name,
+                    vision.AnnotateImageRequest(
+                        image=vision.Image(content=content),
+                        features=[vision.Feature(**f) for f in group["features"]],
+                    ),
+                )
+            )
+
+    responses: Dict[int, Dict[str, Any]] = {}
+    for start in range(0, len(requests), VISION_BATCH_SIZE):
+        chunk = requests[start : start + VISION_BATCH_SIZE]
+        try:
+            batch = vision_client.batch_annotate_images(requests=[r for _, _, r in chunk])
+        except Exception as exc:
+            logger.error(f"Vision batch annotate failed parent_event={parent_event_id}: {exc}")
+            continue
+        for (idx, group_name, _), resp in zip(chunk, batch.responses):
+            responses.setdefault(idx, {})[group_name] = resp
 
-    if response.error.message:
-        logger.error(
-            f"Vision API error parent_event={parent_event_id} artifact={artifact_id}: {response.error.message}"
+    rows: List[Dict[str, Any]] = []
+    for idx, item in enumerate(images):
+        row = _persist_image_annotations(
+            publisher=publisher,
+            parent_event_id=parent_event_id,
+            parent_source=parent_source,
+            artifact_id=item["artifact_id"],
+            artifact_mime=item["mime_type"],
+            group_responses=responses.get(idx, {}),
         )
-        return
+        if row:
+            rows.append(row)
 
-    labels = [
-        {"description": label.description, "score": label.score}
-        for label in response.label_annotations
-    ]
-    objects = [
-        {"name": obj.name, "score": obj.score}
-        for obj in response.localized_object_annotations
-    ]
+    _insert_vision_rows(bq, rows)
 
-    text_annotations = [
-        {"description": ann.description, "locale": ann.locale}
-        for ann in response.text_annotations[:10]
-    ]
 
-    dominant_colors: List[Dict[str, Any]] = []
-    if response.image_properties_annotation:
-        for color_info in (
-            response.image_properties_annotation.dominant_colors.colors[:5]
-        ):
-            dominant_colors.append(
-                {
-                    "red": color_info.color.red,
-                    "green": color_info.color.green,
-                    "blue": color_info.color.blue,
-                    "score": color_info.score,
-                    "pixel_fraction": color_info.pixel_fraction,
-                }
+def _persist_image_annotations(
+    *,
+    publisher: pubsub_v1.PublisherClient,
+    parent_event_id: str,
+    parent_source: str,
+    artifact_id: str,
+    artifact_mime: str,
+    group_responses: Dict[str, Any],
+) -> Optional[Dict[str, Any]]:
+    """Build the vision_enrichment row for one image and publish its OCR text."""
+    ok: Dict[str, Any] = {}
+    for group_name, resp in group_responses.items():
+        if resp.error.message:
+            logger.error(
+                f"Vision API error parent_event={parent_event_id} artifact={artifact_id} "
+                f"group={group_name}: {resp.error.message}"
             )
+            continue
+        ok[group_name] = resp
+
+    scene = ok.get("scene")
+    text = ok.get("text")
+    if scene is None and text is None:
+        return None
 
+    labels: List[Dict[str, Any]] = []
+    objects: List[Dict[str, Any]] = []
+    dominant_colors: List[Dict[str, Any]] = []
     safe_search: Dict[str, Any] = {}
-    if response.safe_search_annotation:
-        ss = response.safe_search_annotation
-        safe_search = {
-            "adult": ss.adult.name,
-            "violence": ss.violence.name,
-            "racy": ss.racy.name,
-            "medical": ss.medical.name,
-            "spoof": ss.spoof.name,
-        }
+
+    if scene is not None:
+        labels = [
+            {"description": label.description, "score": label.score}
+            for label in scene.label_annotations
+        ]
+        objects = [
+            {"name": obj.name, "score": obj.score}
+            for obj in scene.localized_object_annotations
+        ]
+
+        if scene.image_properties_annotation:
+            for color_info in (
+                scene.image_properties_annotation.dominant_colors.colors[:5]
+            ):
+                dominant_colors.append(
+                    {
+                        "red": color_info.color.red,
+                        "green": color_info.color.green,
+                        "blue": color_info.color.blue,
+                        "score": color_info.score,
+                        "pixel_fraction": color_info.pixel_fraction,
+                    }
+                )
+
+        if scene.safe_search_annotation:
+            ss = scene.safe_search_annotation
+            safe_search = {
+                "adult": ss.adult.name,
+                "violence": ss.violence.name,
+                "racy": ss.racy.name,
+                "medical": ss.medical.name,
+                "spoof": ss.spoof.name,
+            }
+
+    text_annotations: List[Dict[str, Any]] = []
+    extracted_text = ""
+    if text is not None:
+        text_annotations = [
+            {"description": ann.description, "locale": ann.locale}
+            for ann in text.text_annotations[:10]
+        ]
+        if text.text_annotations:
+            # First annotation usually contains full text for OCR.
+            extracted_text = text.text_annotations[0].description or ""
 
     now = datetime.utcnow().isoformat() + "Z"
 
-    # Persist to vision_enrichment (file_id is overloaded as artifact_id for Gmail attachments)
+    # file_id is overloaded as artifact_id for Gmail attachments
     vision_row = {
         "file_id": str(artifact_id),
         "event_id": parent_event_id,
@@ -304,26 +412,296 @@ def _run_vision_and_persist(
         "safe_search": safe_search,
     }
 
-    errors = bq.insert_rows_json(BQ_VISION_TABLE, [vision_row])
+    _publish_extracted_text(
+        publisher=publisher,
+        parent_event_id=parent_event_id,
+        parent_source=parent_source,
+        artifact_id=artifact_id,
+        artifact_mime=artifact_mime,
+        extracted_text=extracted_text,
+        timestamp=now,
+    )
+    return vision_row
+
+
+def _annotate_documents_async(
+    *,
+    bq: bigquery.Client,
+    publisher: pubsub_v1.PublisherClient,
+    vision_client: vision.ImageAnnotatorClient,
+    storage_client,
+    parent_event_id: str,
+    parent_source: str,
+    documents: List[Dict[str, Any]],
+) -> None:
+    """
+    OCR PDFs/TIFFs via async_batch_annotate_files.
+
+    All documents of the event go out in one async request. Vision processes
+    pages in parallel and writes JSON shards of VISION_PAGES_PER_SHARD pages to
+    GCS. The triggering invocation waits only VISION_INLINE_WAIT_S for the
+    operation; if it is still running the job is handed to vision_ocr_poller via
+    VISION_PENDING_TOPIC.
+    """
+    if not GCS_STAGING_BUCKET:
+        logger.info(
+            "Skipping document OCR (async_batch_annotate_files needs GCS_STAGING_BUCKET). "
+            f"parent_event={parent_event_id} documents={len(documents)}"
+        )
+        return
+
+    bucket = storage_client.bucket(GCS_STAGING_BUCKET)
+    staged: List[Dict[str, Any]] = []
+    file_requests = []
+    for doc in documents:
+        digest = _short_hash(doc["bytes"])
+        base = f"openclaw/vision/{parent_event_id}/{doc['artifact_id']}-{digest}"
+        try:
+            bucket.blob(f"{base}/input").upload_from_string(doc["bytes"], content_type=doc["mime_type"])
+        except Exception as exc:
+            logger.error(f"GCS staging failed parent_event={parent_event_id} artifact={doc['artifact_id']}: {exc}")
+            continue
+
+        output_prefix = f"{base}/output/"
+        staged.append(
+            {
+                "artifact_id": doc["artifact_id"],
+                "mime_type": doc["mime_type"],
+                "input_object": f"{base}/input",
+                "output_prefix": output_prefix,
+            }
+        )
+        file_requests.append(
+            vision.AsyncAnnotateFileRequest(
+                features=[vision.Feature(type_=vision.Feature.Type.DOCUMENT_TEXT_DETECTION)],
+                input_config=vision.InputConfig(
+                    gcs_source=vision.GcsSource(uri=f"gs://{GCS_STAGING_BUCKET}/{base}/input"),
+                    mime_type=doc["mime_type"],
+                ),
+                output_config=vision.OutputConfig(
+                    gcs_destination=vision.GcsDestination(uri=f"gs://{GCS_STAGING_BUCKET}/{output_prefix}"),
+                    batch_size=VISION_PAGES_PER_SHARD,
+                ),
+            )
+        )
+
+    if not file_requests:
+        return
+
+    try:
+        operation = vision_client.async_batch_annotate_files(requests=file_requests)
+    except Exception as exc:
+        logger.error(f"Vision async file annotate failed parent_event={parent_event_id}: {exc}")
+        _delete_staged_objects(bucket, staged)
+        return
+
+    job = {
+        "parent_event_id": parent_event_id,
+        "parent_source": parent_source,
+        "operation_name": operation.operation.name,
+        "submitted_at": datetime.utcnow().isoformat() + "Z",
+        "attempt": 0,
+        "documents": staged,
+    }
+    logger.info(f"Submitted {len(staged)} documents for async OCR parent_event={parent_event_id}")
+
+    if _wait_for_operation(operation, VISION_INLINE_WAIT_S):
+        _finish_documents(bq=bq, publisher=publisher, bucket=bucket, job=job)
+    else:
+        _publish_pending_job(publisher, job)
+
+
+def vision_ocr_poller(event, context):
+    """
+    Pub/Sub Cloud Function: finish document OCR submitted by vision_document_ai.
+
+    Trigger: VISION_PENDING_TOPIC (default `openclaw-vision-pending`)
+    Input: job payload {parent_event_id, operation_name, documents: [{artifact_id, input_object, output_prefix}], attempt, ...}
+
+    Polls the operation for up to VISION_POLL_WAIT_S. When it is done the output
+    shards are read into vision_enrichment rows and the staged objects deleted;
+    otherwise the job is republished with attempt + 1 (up to
+    VISION_MAX_POLL_ATTEMPTS, after which whatever shards exist are persisted).
+    """
+    if not PROJECT_ID or not PUBSUB_TOPIC or not BQ_VISION_TABLE or not GCS_STAGING_BUCKET:
+        logger.error("Missing required configuration (PROJECT_ID, PUBSUB_TOPIC, BQ_VISION_TABLE, GCS_STAGING_BUCKET)")
+        return "Missing config"
+
+    try:
+        job = json.loads(base64.b64decode(event["data"]).decode("utf-8"))
+    except Exception as exc:
+        logger.error(f"Failed to decode pending vision job: {exc}")
+        return "Bad payload"
+
+    vision_client = vision.ImageAnnotatorClient()
+    operations_client = vision_client.transport.operations_client
+    operation_name = job.get("operation_name")
+
+    def _done() -> bool:
+        try:
+            return bool(operations_client.get_operation(operation_name).done)
+        except Exception as exc:
+            logger.error(f"Failed to load vision operation {operation_name}: {exc}")
+            # An operation that cannot be loaded will not finish; stop polling.
+            return True
+
+    publisher = pubsub_v1.PublisherClient()
+    attempt = int(job.get("attempt", 0)) + 1
+    bucket = storage.Client().bucket(GCS_STAGING_BUCKET)
+
+    if _wait_until(_done, VISION_POLL_WAIT_S) or attempt >= VISION_MAX_POLL_ATTEMPTS:
+        if attempt >= VISION_MAX_POLL_ATTEMPTS:
+            logger.warning(
+                f"Vision OCR job gave up waiting after {attempt} attempts parent_event={job.get('parent_event_id')}; "
+                "persisting pages received so far"
+            )
+        _finish_documents(bq=bigquery.Client(), publisher=publisher, bucket=bucket, job=job)
+        return "OK"
+
+    job["attempt"] = attempt
+    _publish_pending_job(publisher, job)
+    return "OK"
+
+
+def _wait_for_operation(operation, budget_s: float) -> bool:
+    """Poll an operation until it is done or budget_s elapses. Returns True when done."""
+    return _wait_until(operation.done, budget_s)
+
+
+def _wait_until(is_done, budget_s: float) -> bool:
+    deadline = time.time() + budget_s
+    while True:
+        if is_done():
+            return True
+        if time.time() >= deadline:
+            return False
+        time.sleep(VISION_POLL_INTERVAL_S)
+
+
+def _publish_pending_job(publisher: pubsub_v1.PublisherClient, job: Dict[str, Any]) -> None:
+    try:
+        future = publisher.publish(VISION_PENDING_TOPIC, json.dumps(job).encode("utf-8"))
+        future.result(timeout=5)
+        logger.info(f"Deferred vision OCR job parent_event={job['parent_event_id']} attempt={job['attempt']}")
+    except Exception as exc:
+        logger.error(f"Failed to publish pending vision job parent_event={job['parent_event_id']}: {exc}")
+
+
+def _finish_documents(
+    *,
+    bq: bigquery.Client,
+    publisher: pubsub_v1.PublisherClient,
+    bucket,
+    job: Dict[str, Any],
+) -> None:
+    """Read every output shard of the job, persist one row per document, then delete the staged objects."""
+    parent_event_id = job["parent_event_id"]
+    rows: List[Dict[str, Any]] = []
+    now = datetime.utcnow().isoformat() + "Z"
+    for doc in job["documents"]:
+        doc_pages: Dict[str, Any] = {"pages": {}}
+        for blob in bucket.list_blobs(prefix=doc["output_prefix"]):
+            _collect_shard_pages(doc_pages, blob)
+        pages = [doc_pages["pages"][n] for n in sorted(doc_pages["pages"])]
+        if not pages:
+            continue
+        rows.append(
+            {
+                "file_id": str(doc["artifact_id"]),
+                "event_id": parent_event_id,
+                "timestamp": now,
+                "labels": [],
+                "objects": [],
+                "text_annotations": [
+                    {"description": p["text"][:2000], "locale": p["locale"], "page": p["page"]}
+                    for p in pages[:10]
+                ],
+                "dominant_colors": [],
+                "safe_search": {},
+            }
+        )
+        _publish_extracted_text(
+            publisher=publisher,
+            parent_event_id=parent_event_id,
+            parent_source=job["parent_source"],
+            artifact_id=doc["artifact_id"],
+            artifact_mime=doc["mime_type"],
+            extracted_text="\n".join(p["text"] for p in pages),
+            timestamp=now,
+        )
+
+    _insert_vision_rows(bq, rows)
+    _delete_staged_objects(bucket, job["documents"])
+
+
+def _delete_staged_objects(bucket, documents: List[Dict[str, Any]]) -> None:
+    """Best-effort removal of the staged inputs and output shards of each document."""
+    for doc in documents:
+        names = [doc["input_object"]]
+        try:
+            names.extend(blob.name for blob in bucket.list_blobs(prefix=doc["output_prefix"]))
+        except Exception as exc:
+            logger.warning(f"Failed to list Vision output shards {doc['output_prefix']}: {exc}")
+        for name in names:
+            try:
+                bucket.blob(name).delete()
+            except Exception as exc:
+                logger.warning(f"Failed to delete staged object {name}: {exc}")
+
+
+def _collect_shard_pages(doc: Dict[str, Any], blob) -> None:
+    """Parse one AnnotateFileResponse JSON shard into doc['pages'] keyed by page number."""
+    try:
+        shard = json.loads(blob.download_as_bytes().decode("utf-8"))
+    except Exception as exc:
+        logger.warning(f"Failed to read Vision output shard {blob.name}: {exc}")
+        return
+
+    for resp in shard.get("responses", []) or []:
+        annotation = resp.get("fullTextAnnotation") or {}
+        page_number = (resp.get("context") or {}).get("pageNumber") or len(doc["pages"]) + 1
+        locale = None
+        for page in annotation.get("pages", []) or []:
+            langs = (page.get("property") or {}).get("detectedLanguages") or []
+            if langs:
+                locale = langs[0].get("languageCode")
+                break
+        doc["pages"][int(page_number)] = {
+            "page": int(page_number),
+            "text": annotation.get("text") or "",
+            "locale": locale,
+        }
+
+
+def _insert_vision_rows(bq: bigquery.Client, rows: List[Dict[str, Any]]) -> None:
+    if not rows:
+        return
+    errors = bq.insert_rows_json(BQ_VISION_TABLE, rows)
     if errors:
-        logger.error(f"BigQuery vision insert errors artifact={artifact_id}: {errors}")
+        logger.error(f"BigQuery vision insert errors: {errors}")
     else:
-        logger.info(f"Inserted vision enrichment artifact={artifact_id}")
+        logger.info(f"Inserted {len(rows)} vision enrichment rows")
 
-    # Publish extracted text as a synthetic event for downstream NLP + embeddings.
-    extracted_text = ""
-    if response.text_annotations:
-        # First annotation usually contains full text for OCR.
-        extracted_text = response.text_annotations[0].description or ""
 
-    extracted_text = extracted_text.strip()
+def _publish_extracted_text(
+    *,
+    publisher: pubsub_v1.PublisherClient,
+    parent_event_id: str,
+    parent_source: str,
+    artifact_id: str,
+    artifact_mime: str,
+    extracted_text: str,
+    timestamp: str,
+) -> None:
+    """Publish extracted text as a synthetic event for downstream NLP + embeddings."""
+    extracted_text = (extracted_text or "").strip()
     if not extracted_text:
         return
 
     synth_event_id = f"visiontext-{parent_event_id}-{_short_hash(extracted_text.encode('utf-8'))}"
     synth_event = {
         "event_id": synth_event_id,
-        "timestamp": now,
+        "timestamp": timestamp,
         "agent_id": "vision_document_ai",
         "event_type": "vision_text_extracted",
         "source": "vision",
@@ -347,6 +725,27 @@ def _run_vision_and_persist(
         logger.error(f"Failed to publish vision_text_extracted event {synth_event_id}: {exc}")
 
 
+def _downscale_image(content: bytes, mime_type: str, max_side: int) -> bytes:
+    """Shrink an image so its longest side is at most max_side; returns input on any failure."""
+    if PILImage is None or mime_type == "image/gif":
+        return content
+    try:
+        with PILImage.open(io.BytesIO(content)) as img:
+            if max(img.size) <= max_side:
+                return content
+            img.thumbnail((max_side, max_side))
+            out = io.BytesIO()
+            if img.mode in ("RGBA", "LA", "P"):
+                img.save(out, format="PNG", optimize=True)
+            else:
+                img.convert("RGB").save(out, format="JPEG", quality=85)
+            scaled = out.getvalue()
+            return scaled if len(scaled) < len(content) else content
+    except Exception as exc:
+        logger.warning(f"Image downscale failed ({mime_type}): {exc}")
+        return content
+
+
 def _download_drive_file_bytes(drive_service, file_id: str) -> Optional[bytes]:
     try:
         request = drive_service.files().get_media(fileId=file_id)
@@ -360,68 +759,6 @@ def _download_drive_file_bytes(drive_service, file_id: str) -> Optional[bytes]:
         return None
 
 
-def _iter_gmail_attachments(gmail_service, message_id: str) -> Iterable[Dict[str, Any]]:
-    """
-    Yields dicts: {attachment_id, filename, mime_type, bytes}
-    """
-    try:
-        msg = (
-            gmail_service.users()
-            .messages()
-            .get(userId="me", id=message_id, format="full")
-            .execute()
-        )
-    except Exception as exc:
-        logger.error(f"Failed to fetch Gmail message {message_id}: {exc}")
-        return []
-
-    payload = msg.get("payload", {}) or {}
-    parts = payload.get("parts", []) or []
-
-    # Depth-first traversal over parts to find attachments.
-    stack = list(parts)
-    while stack:
-        part = stack.pop()
-        if not isinstance(part, dict):
-            continue
-
-        filename = part.get("filename") or ""
-        mime_type = part.get("mimeType") or ""
-        body = part.get("body") or {}
-        attachment_id = body.get("attachmentId")
-
-        # Recurse into multipart.
-        for child in part.get("parts", []) or []:
-            stack.append(child)
-
-        if not attachment_id:
-            continue
-
-        # Fetch attachment bytes.
-        try:
-            att = (
-                gmail_service.users()
-                .messages()
-                .attachments()
-                .get(userId="me", messageId=message_id, id=attachment_id)
-                .execute()
-            )
-            data_b64 = att.get("data")
-            if not data_b64:
-                continue
-            content = base64.urlsafe_b64decode(data_b64.encode("utf-8"))
-        except Exception as exc:
-            logger.error(f"Failed to fetch attachment {attachment_id} for {message_id}: {exc}")
-            continue
-
-        yield {
-            "attachment_id": attachment_id,
-            "filename": filename,
-            "mime_type": mime_type,
-            "bytes": content,
-        }
-
-
 def _parse_payload(payload: Any) -> Dict[str, Any]:
     if payload is None:
         return {}
@@ -13,15 +13,17 @@ echo "  Project: ${PROJECT_ID}"
 echo "============================================"
 echo ""
 
-# Step 1: Create Pub/Sub topic (idempotent)
-echo "=== Step 1/4: Ensuring Pub/Sub topic exists ==="
-if gcloud pubsub topics describe "${PUBSUB_TOPIC}" --project="${PROJECT_ID}" &>/dev/null; then
-  echo "  Topic '${PUBSUB_TOPIC}' already exists."
-else
-  echo "  Creating topic '${PUBSUB_TOPIC}'..."
-  gcloud pubsub topics create "${PUBSUB_TOPIC}" --project="${PROJECT_ID}"
-  echo "  Topic created."
-fi
+# Step 1: Create Pub/Sub topics (idempotent)
+echo "=== Step 1/4: Ensuring Pub/Sub topics exist ==="
+for topic in "${PUBSUB_TOPIC}" "openclaw-speech-pending" "openclaw-vision-pending"; do
+  if gcloud pubsub topics describe "${topic}" --project="${PROJECT_ID}" &>/dev/null; then
+    echo "  Topic '${topic}' already exists."
+  else
+    echo "  Creating topic '${topic}'..."
+    gcloud pubsub topics create "${topic}" --project="${PROJECT_ID}"
+    echo "  Topic created."
+  fi
+done
 echo ""
 
 # Step 2: Deploy BigQuery schemas
@@ -44,7 +46,7 @@ echo "  Deployment complete!"
 echo "============================================"
 echo ""
 echo "Deployed resources:"
-echo "  - Pub/Sub topic: ${PUBSUB_TOPIC}"
+echo "  - Pub/Sub topics: ${PUBSUB_TOPIC}, openclaw-speech-pending, openclaw-vision-pending"
 echo "  - BigQuery dataset: openclaw"
 echo "  - Cloud Functions: gmail_ingester, gmail_enricher, event_router,"
 echo "    drive_watcher, calendar_ingestor, orchestrator, sample_triage_agent"
@@ -38,7 +38,7 @@ deploy_pubsub_function() {
   local name="$1"
   local entry_point="$2"
   local topic="$3"
-  local source_dir="${CF_DIR}/${name}"
+  local source_dir="${CF_DIR}/${4:-${name}}"
 
   echo "  Deploying ${name} (Pub/Sub: ${topic}, entry: ${entry_point})..."
   gcloud functions deploy "${name}" \
@@ -67,6 +67,8 @@ deploy_pubsub_function "orchestrator"    "orchestrate_event"   "${PUBSUB_TOPIC}"
 
 # Phase 4-5: Moonshot functions
 deploy_pubsub_function "speech_transcriber"  "speech_transcriber"  "${PUBSUB_TOPIC}"
+deploy_pubsub_function "speech_transcription_poller"  "speech_transcription_poller"  "openclaw-speech-pending"  "speech_transcriber"
+deploy_pubsub_function "vision_ocr_poller"  "vision_ocr_poller"  "openclaw-vision-pending"  "vision_document_ai"
 deploy_pubsub_function "geo_enricher"        "geo_enricher"        "${PUBSUB_TOPIC}"
 deploy_http_function   "pattern_predictor"   "pattern_predictor"
 deploy_http_function   "auto_organizer"      "auto_organizer"
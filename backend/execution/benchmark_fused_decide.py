@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Benchmark: two-call (analyze, then decide) vs fused analyze+decide
+
+Replays a sample of recent events through both orchestrator paths with the
+same context and reports latency, tokens, estimated cost and how often the
+two paths choose the same action. Result rows are captured in memory, not
+written to BigQuery, and the response cache is bypassed.
+
+NLP enrichment is skipped on both paths (it is identical either way).
+
+Usage:
+  python3 execution/benchmark_fused_decide.py --source gmail --sample 25
+
+Requirements:
+  - Application Default Credentials configured (gcloud auth application-default login)
+  - GOOGLE_PROJECT_ID or PROJECT_ID and GOOGLE_SHEET_ID or SHEET_ID set in environment
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+from google.cloud import bigquery
+
+from openclaw_orchestrator import OpenClawOrchestrator
+
+# USD per 1M tokens; defaults match gemini-2.0-flash list pricing.
+INPUT_COST_PER_M = float(os.environ.get("GEMINI_INPUT_COST_PER_M", "0.10"))
+OUTPUT_COST_PER_M = float(os.environ.get("GEMINI_OUTPUT_COST_PER_M", "0.40"))
+
+
+class CaptureWriter:
+    """Collects rows instead of inserting them."""
+
+    def __init__(self):
+        self.rows = {}
+
+    def insert_rows_json(self, table, rows):
+        self.rows.setdefault(table.rsplit(".", 1)[-1], []).extend(rows)
+        return []
+
+    def take(self, table):
+        return self.rows.pop(table, [])
+
+
+def sample_events(client, project_id, source, sample):
+    query = f"""
+    SELECT event_id, timestamp, event_type, source, TO_JSON_STRING(payload) AS payload
+    FROM `{project_id}.openclaw.events`
+    WHERE source = @source
+      AND timestamp > TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL 30 DAY)
+    ORDER BY RAND()
+    LIMIT @limit
+    """
+    job_config = bigquery.QueryJobConfig(
+        query_parameters=[
+            bigquery.ScalarQueryParameter("source", "STRING", source),
+            bigquery.ScalarQueryParameter("limit", "INT64", sample),
+        ]
+    )
+    events = []
+    for row in client.query(query, job_config=job_config):
+        events.append(
+            {
+                "event_id": row.event_id,
+                "timestamp": row.timestamp.isoformat() if row.timestamp else None,
+                "event_type": row.event_type,
+                "source": row.source,
+                "payload": json.loads(row.payload) if row.payload else {},
+            }
+        )
+    return events
+
+
+def summarize(name, latencies, analysis_rows):
+    tokens_in = sum(r.get("token_count_input") or 0 for r in analysis_rows)
+    tokens_out = sum(r.get("token_count_output") or 0 for r in analysis_rows)
+    cost = tokens_in / 1e6 * INPUT_COST_PER_M + tokens_out / 1e6 * OUTPUT_COST_PER_M
+    n = max(len(latencies), 1)
+    p95 = sorted(latencies)[int(0.95 * (len(latencies) - 1))] if latencies else 0
+    print(f"{name}:")
+    print(f"  Gemini calls:       {len(analysis_rows)}")
+    print(f"  Latency p50 / p95:  {statistics.median(latencies) if latencies else 0:.0f} / {p95:.0f} ms")
+    print(f"  Tokens in / out:    {tokens_in / n:.0f} / {tokens_out / n:.0f} per event")
+    print(f"  Est. cost:          ${cost / n * 1000:.4f} per 1k events")
+    return cost
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare two-call and fused analyze+decide")
+    parser.add_argument("--source", default="gmail")
+    parser.add_argument("--sample", type=int, default=25)
+    parser.add_argument("--region", default=os.environ.get("VERTEX_REGION", "us-central1"))
+    args = parser.parse_args()
+
+    project_id = os.environ.get("GOOGLE_PROJECT_ID") or os.environ.get("PROJECT_ID")
+    sheet_id = os.environ.get("GOOGLE_SHEET_ID") or os.environ.get("SHEET_ID")
+    if not project_id or not sheet_id:
+        print("ERROR: project and sheet IDs must be set in environment", file=sys.stderr)
+        return 1
+
+    events = sample_events(bigquery.Client(project=project_id), project_id, args.source, args.sample)
+    if not events:
+        print(f"No recent {args.source} events to sample")
+        return 0
+
+    writer = CaptureWriter()
+    orchestrator = OpenClawOrchestrator(project_id, sheet_id, region=args.region, writer=writer)
+    orchestrator.analyzer.cache = None
+    orchestrator._snapshot = orchestrator._load_context_snapshot()
+
+    two_call_ms, fused_ms = [], []
+    two_call_rows, fused_rows = [], []
+    agree = 0
+
+    for event in events:
+        enrichment = {}
+        workload = orchestrator._fetch_workload_context()
+        sender = orchestrator._fetch_sender_context(event)
+
+        t0 = time.perf_counter()
+        analysis = orchestrator._stage_analyze(event, enrichment)
+        two_call = orchestrator._stage_decide(event, enrichment, analysis, workload, sender)
+        two_call_ms.append((time.perf_counter() - t0) * 1000)
+        two_call_rows += writer.take("ai_analysis")
+
+        t0 = time.perf_counter()
+        _, fused = orchestrator._stage_analyze_decide(event, enrichment, workload, sender)
+        fused_ms.append((time.perf_counter() - t0) * 1000)
+        fused_rows += writer.take("ai_analysis")
+
+        agree += two_call.get("chosen_action") == fused.get("chosen_action")
+
+    print(f"Sampled {len(events)} {args.source} events")
+    print()
+    two_call_cost = summarize("Two-call (analyze + decide)", two_call_ms, two_call_rows)
+    fused_cost = summarize("Fused (triage_decide)", fused_ms, fused_rows)
+    print()
+    if two_call_ms and two_call_cost:
+        print(f"Latency p50 change:  {statistics.median(fused_ms) / statistics.median(two_call_ms) - 1:+.0%}")
+        print(f"Cost change:         {fused_cost / two_call_cost - 1:+.0%}")
+    print(f"Action agreement:    {agree}/{len(events)}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark: untrimmed vs token-budgeted Gemini prompts
+
+Runs a sample of recent events through GeminiAnalyzer.analyze_event twice,
+once with the full-dump prompt layout (PROMPT_BUDGET_ENABLED off) and once
+with the budgeted layout, and reports average input tokens and latency.
+Result rows are captured in memory, not written to BigQuery, and the
+response cache is bypassed.
+
+For live traffic the same comparison is in `openclaw.ai_prompt_stats`.
+
+Usage:
+  python3 execution/benchmark_prompt_budget.py --source gmail --type triage --sample 25
+
+Requirements:
+  - Application Default Credentials configured (gcloud auth application-default login)
+  - GOOGLE_PROJECT_ID or PROJECT_ID set in environment
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+
+from google.cloud import bigquery
+
+import prompt_builder
+from benchmark_fused_decide import CaptureWriter, sample_events
+from vertex_ai import GeminiAnalyzer
+
+
+def run(analyzer, writer, events, analysis_type, budgeted):
+    prompt_builder.PROMPT_BUDGET_ENABLED = budgeted
+    for event in events:
+        analyzer.analyze_event(event, analysis_type=analysis_type)
+    return [r for r in writer.take("ai_analysis") if not r.get("error")]
+
+
+def summarize(name, rows):
+    tokens = [r["token_count_input"] for r in rows]
+    latencies = [r["latency_ms"] for r in rows]
+    print(f"{name}:")
+    print(f"  Calls:              {len(rows)}")
+    print(f"  Avg input tokens:   {statistics.mean(tokens) if tokens else 0:.0f}")
+    print(f"  Latency p50:        {statistics.median(latencies) if latencies else 0:.0f} ms")
+    return (statistics.mean(tokens) if tokens else 0), (statistics.median(latencies) if latencies else 0)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare untrimmed and token-budgeted prompts")
+    parser.add_argument("--source", default="gmail")
+    parser.add_argument("--type", dest="analysis_type", default="triage")
+    parser.add_argument("--sample", type=int, default=25)
+    parser.add_argument("--region", default=os.environ.get("VERTEX_REGION", "us-central1"))
+    args = parser.parse_args()
+
+    project_id = os.environ.get("GOOGLE_PROJECT_ID") or os.environ.get("PROJECT_ID")
+    if not project_id:
+        print("ERROR: GOOGLE_PROJECT_ID or PROJECT_ID must be set", file=sys.stderr)
+        return 1
+
+    events = sample_events(bigquery.Client(project=project_id), project_id, args.source, args.sample)
+    if not events:
+        print(f"No recent {args.source} events to sample")
+        return 0
+
+    writer = CaptureWriter()
+    analyzer = GeminiAnalyzer(project_id, region=args.region, writer=writer, cache=False)
+
+    print(f"Sampled {len(events)} {args.source} events, analysis type {args.analysis_type}")
+    print()
+    before = summarize("Untrimmed (full-v0)", run(analyzer, writer, events, args.analysis_type, False))
+    after = summarize("Budgeted (budgeted-v1)", run(analyzer, writer, events, args.analysis_type, True))
+    print()
+    if before[0] and before[1]:
+        print(f"Input tokens change: {after[0] / before[0] - 1:+.0%}")
+        print(f"Latency p50 change:  {after[1] / before[1] - 1:+.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,17 +1,118 @@
-import json
 import os
-import uuid
-from datetime import datetime, timedelta
+import time
+from datetime import datetime
 from collections import Counter, defaultdict
 import logging
 
 from google.cloud import bigquery
 
+from observation_store import get_observation_store
+
 logger = logging.getLogger(__name__)
 
 PROJECT_ID = os.environ.get("PROJECT_ID") or os.environ.get("GOOGLE_PROJECT_ID")
 OBSERVATIONS_TABLE = f"{PROJECT_ID}.openclaw.observations"
 
+# How stale calendar_features_daily may get before a detector refreshes it,
+# and how far back the first refresh (empty table) backfills.
+CALENDAR_FEATURES_REFRESH_S = int(os.environ.get("CALENDAR_FEATURES_REFRESH_S", "900"))
+CALENDAR_FEATURES_BACKFILL_DAYS = int(os.environ.get("CALENDAR_FEATURES_BACKFILL_DAYS", "90"))
+
+# Recompute every day that has calendar events newer than the watermark (minus
+# a day, to pick up late-arriving rows). Each run only scans those partitions
+# and replaces those days' feature rows in one transaction, so reruns are
+# idempotent and concurrent refreshes cannot double-count.
+FEATURES_REFRESH_SCRIPT = """
+DECLARE watermark TIMESTAMP DEFAULT (
+  SELECT MAX(last_seen) FROM `{features}` WHERE feature = 'day_summary'
+);
+DECLARE touched ARRAY<DATE> DEFAULT (
+  SELECT ARRAY_AGG(DISTINCT DATE(timestamp))
+  FROM `{events}`
+  WHERE source = 'calendar'
+    AND timestamp > IFNULL(
+      TIMESTAMP_SUB(watermark, INTERVAL 1 DAY),
+      TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL {backfill_days} DAY)
+    )
+);
+
+IF ARRAY_LENGTH(touched) > 0 THEN
+  BEGIN TRANSACTION;
+  DELETE FROM `{features}` WHERE day IN UNNEST(touched);
+
+  INSERT INTO `{features}` (
+    day, feature, day_of_week, hour_of_day, recurring_id, title, organizer,
+    attendee_email, attendee_name, event_count, timed_count, all_day_count,
+    recurring_count, virtual_count, attendee_count_sum, attendee_count_n,
+    start_times, start_ts, organizers, first_seen, last_seen, refreshed_at
+  )
+  WITH raw AS (
+    SELECT
+      event_id,
+      timestamp,
+      DATE(timestamp) AS day,
+      JSON_VALUE(payload, '$.change_type') != 'deleted' AS live,
+      JSON_VALUE(payload, '$.title') AS title,
+      JSON_VALUE(payload, '$.recurring_event_id') AS recurring_id,
+      JSON_VALUE(payload, '$.organizer_email') AS organizer,
+      JSON_VALUE(payload, '$.start_time') AS start_time,
+      SAFE.PARSE_TIMESTAMP('%Y-%m-%dT%H:%M:%S',
+        SPLIT(JSON_VALUE(payload, '$.start_time'), '+')[OFFSET(0)]) AS start_ts,
+      JSON_VALUE(payload, '$.all_day') AS all_day,
+      JSON_VALUE(payload, '$.meeting_link') AS meeting_link,
+      SAFE_CAST(JSON_VALUE(payload, '$.attendee_count') AS INT64) AS attendee_count,
+      JSON_QUERY_ARRAY(payload, '$.attendees') AS attendees
+    FROM `{events}`
+    WHERE source = 'calendar'
+      AND DATE(timestamp) IN UNNEST(touched)
+  ),
+  cal AS (
+    SELECT * FROM raw WHERE live
+  )
+  SELECT
+    day, 'occupancy', EXTRACT(DAYOFWEEK FROM start_ts), EXTRACT(HOUR FROM start_ts),
+    NULL, NULL, NULL, NULL, NULL, COUNT(*), NULL, NULL, NULL, NULL, NULL, NULL,
+    NULL, NULL, NULL, MIN(timestamp), MAX(timestamp), CURRENT_TIMESTAMP()
+  FROM cal
+  WHERE all_day = 'false' AND start_ts IS NOT NULL
+  GROUP BY day, 3, 4
+  UNION ALL
+  SELECT
+    day, 'series', NULL, NULL, recurring_id, title, organizer, NULL, NULL,
+    COUNT(*), NULL, NULL, NULL, NULL, SUM(attendee_count), COUNT(attendee_count),
+    ARRAY_AGG(start_time IGNORE NULLS ORDER BY timestamp),
+    ARRAY_AGG(start_ts IGNORE NULLS ORDER BY timestamp),
+    NULL, MIN(timestamp), MAX(timestamp), CURRENT_TIMESTAMP()
+  FROM cal
+  GROUP BY day, recurring_id, title, organizer
+  UNION ALL
+  SELECT
+    day, 'attendee', NULL, NULL, NULL, NULL, NULL,
+    JSON_VALUE(a, '$.email'), JSON_VALUE(a, '$.display_name'),
+    COUNT(DISTINCT event_id), NULL, NULL, NULL, NULL, NULL, NULL,
+    NULL, NULL, NULL, MIN(timestamp), MAX(timestamp), CURRENT_TIMESTAMP()
+  FROM cal, UNNEST(attendees) AS a
+  WHERE JSON_VALUE(a, '$.self') = 'false'
+  GROUP BY day, 8, 9
+  UNION ALL
+  SELECT
+    day, 'day_summary', NULL, NULL, NULL, NULL, NULL, NULL, NULL,
+    COUNTIF(live),
+    COUNTIF(live AND all_day = 'false'),
+    COUNTIF(live AND all_day = 'true'),
+    COUNTIF(live AND IFNULL(recurring_id, '') != ''),
+    COUNTIF(live AND IFNULL(meeting_link, '') != ''),
+    SUM(IF(live, attendee_count, NULL)),
+    COUNTIF(live AND attendee_count IS NOT NULL),
+    NULL, NULL,
+    ARRAY_AGG(DISTINCT IF(live, organizer, NULL) IGNORE NULLS),
+    MIN(timestamp), MAX(timestamp), CURRENT_TIMESTAMP()
+  FROM raw
+  GROUP BY day;
+  COMMIT TRANSACTION;
+END IF;
+"""
+
 
 class CalendarPatternDetector:
     """Analyzes calendar event history in BigQuery to detect patterns and anomalies."""
@@ -20,49 +121,66 @@ class CalendarPatternDetector:
         self.project_id = project_id or PROJECT_ID
         self.bq = bigquery.Client()
         self.observations_table = f"{self.project_id}.openclaw.observations"
+        self.features_table = f"{self.project_id}.openclaw.calendar_features_daily"
+        self._features_refreshed_at = 0.0
+        self.observations = get_observation_store(self.project_id, self.bq)
 
     def _query(self, sql, params=None):
         """Execute a BigQuery query with optional parameters."""
         job_config = bigquery.QueryJobConfig(query_parameters=params or [])
         return list(self.bq.query(sql, job_config=job_config))
 
+    def refresh_features(self, force=False):
+        """Fold calendar events newer than the feature watermark into calendar_features_daily."""
+        if not force and time.time() - self._features_refreshed_at < CALENDAR_FEATURES_REFRESH_S:
+            return
+        script = FEATURES_REFRESH_SCRIPT.format(
+            features=self.features_table,
+            events=f"{self.project_id}.openclaw.events",
+            backfill_days=CALENDAR_FEATURES_BACKFILL_DAYS,
+        )
+        try:
+            self.bq.query(script).result()
+            self._features_refreshed_at = time.time()
+            logger.info("Refreshed calendar features")
+        except Exception as exc:
+            logger.error(f"Calendar feature refresh failed, reading existing features: {exc}")
+
     def _store_observation(self, entity_type, entity_id, observation_type, value, confidence=0.8, ttl_days=30):
-        """Store a pattern observation in BigQuery."""
-        row = {
-            "observation_id": f"cal-obs-{uuid.uuid4().hex[:12]}",
-            "timestamp": datetime.utcnow().isoformat() + "Z",
-            "agent_id": "calendar_pattern_detector",
-            "entity_type": entity_type,
-            "entity_id": entity_id,
-            "observation_type": observation_type,
-            "value": json.dumps(value),
-            "confidence": confidence,
-            "expires_at": (datetime.utcnow() + timedelta(days=ttl_days)).isoformat() + "Z",
-        }
-        errors = self.bq.insert_rows_json(self.observations_table, [row])
-        if errors:
-            logger.error(f"Failed to store observation: {errors}")
-        return row["observation_id"]
+        """Queue a pattern observation; written to BigQuery on the next flush."""
+        return self.observations.put(
+            "calendar_pattern_detector", entity_type, entity_id, observation_type,
+            value, confidence=confidence, ttl_days=ttl_days,
+        )
+
+    def _cached_observation(self, entity_type, entity_id, observation_type, max_age_s, window_days):
+        """Value of an unexpired observation no older than max_age_s over the same window, else None."""
+        if max_age_s is None:
+            return None
+        obs = self.observations.get(entity_type, entity_id, observation_type, max_age_s=max_age_s)
+        if obs and isinstance(obs["value"], dict) and obs["value"].get("window_days") == window_days:
+            return obs["value"]
+        return None
 
     def detect_recurring_meetings(self, days=30):
         """Detect recurring meeting patterns from calendar event history."""
+        self.refresh_features()
         query = """
         SELECT
-          JSON_VALUE(payload, '$.title') as title,
-          JSON_VALUE(payload, '$.recurring_event_id') as recurring_id,
-          JSON_VALUE(payload, '$.organizer_email') as organizer,
-          COUNT(*) as occurrence_count,
-          ARRAY_AGG(JSON_VALUE(payload, '$.start_time') ORDER BY timestamp LIMIT 10) as start_times,
-          AVG(CAST(JSON_VALUE(payload, '$.attendee_count') AS INT64)) as avg_attendees
-        FROM `{project}.openclaw.events`
-        WHERE source = 'calendar'
-          AND JSON_VALUE(payload, '$.change_type') != 'deleted'
-          AND timestamp > TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL @days DAY)
+          title,
+          recurring_id,
+          organizer,
+          SUM(event_count) as occurrence_count,
+          ARRAY_CONCAT_AGG(start_times ORDER BY day) as start_times,
+          SAFE_DIVIDE(SUM(attendee_count_sum), SUM(attendee_count_n)) as avg_attendees
+        FROM `{features}`
+        WHERE feature = 'series'
+          AND day >= DATE(TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL @days DAY))
         GROUP BY title, recurring_id, organizer
-        HAVING COUNT(*) >= 2
+        HAVING SUM(event_count) >= 2
         ORDER BY occurrence_count DESC
         LIMIT 50
-        """.format(project=self.project_id)
+        """.format(features=self.features_table)
 
         rows = self._query(query, [
             bigquery.ScalarQueryParameter("days", "INT64", days),
@@ -76,7 +194,7 @@ class CalendarPatternDetector:
                 "organizer": row.organizer,
                 "occurrence_count": row.occurrence_count,
                 "avg_attendees": round(row.avg_attendees or 0, 1),
-                "sample_times": list(row.start_times or []),
+                "sample_times": list(row.start_times or [])[:10],
             }
             patterns.append(pattern)
 
@@ -89,26 +207,52 @@ class CalendarPatternDetector:
                 confidence=min(0.5 + row.occurrence_count * 0.1, 0.99),
             )
 
+        self.observations.flush()
         logger.info(f"Detected {len(patterns)} recurring meeting patterns")
         return patterns
 
-    def detect_busy_free_patterns(self, days=14):
-        """Analyze busy/free time patterns by day of week and hour."""
+    def detect_busy_free_patterns(self, days=14, max_age_s=None):
+        """
+        Analyze busy/free time patterns by day of week and hour.
+
+        With max_age_s, a stored pattern for the same window that is younger
+        than that is returned without querying.
+        """
+        cached = self._cached_observation(
+            "calendar_schedule", "weekly_pattern", "busy_free_pattern", max_age_s, days,
+        )
+        if cached is not None:
+            return cached
+
+        result = self._busy_free(days)
+
+        self._store_observation(
+            entity_type="calendar_schedule",
+            entity_id="weekly_pattern",
+            observation_type="busy_free_pattern",
+            value=result,
+            confidence=0.7 if result["total_meetings"] > 10 else 0.4,
+            ttl_days=7,
+        )
+        self.observations.flush()
+
+        logger.info(f"Detected busy/free patterns from {result['total_meetings']} meetings")
+        return result
+
+    def _busy_free(self, days):
+        """Day-of-week x hour occupancy with the busiest and free business-hour slots."""
+        self.refresh_features()
         query = """
         SELECT
-          EXTRACT(DAYOFWEEK FROM PARSE_TIMESTAMP('%Y-%m-%dT%H:%M:%S',
-            SPLIT(JSON_VALUE(payload, '$.start_time'), '+')[OFFSET(0)])) as day_of_week,
-          EXTRACT(HOUR FROM PARSE_TIMESTAMP('%Y-%m-%dT%H:%M:%S',
-            SPLIT(JSON_VALUE(payload, '$.start_time'), '+')[OFFSET(0)])) as hour_of_day,
-          COUNT(*) as meeting_count
-        FROM `{project}.openclaw.events`
-        WHERE source = 'calendar'
-          AND JSON_VALUE(payload, '$.change_type') != 'deleted'
-          AND JSON_VALUE(payload, '$.all_day') = 'false'
-          AND timestamp > TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL @days DAY)
+          day_of_week,
+          hour_of_day,
+          SUM(event_count) as meeting_count
+        FROM `{features}`
+        WHERE feature = 'occupancy'
+          AND day >= DATE(TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL @days DAY))
         GROUP BY day_of_week, hour_of_day
         ORDER BY day_of_week, hour_of_day
-        """.format(project=self.project_id)
+        """.format(features=self.features_table)
 
         rows = self._query(query, [
             bigquery.ScalarQueryParameter("days", "INT64", days),
@@ -136,50 +280,32 @@ class CalendarPatternDetector:
                 elif count == 0:
                     free_slots.append(slot)
 
-        result = {
+        return {
+            "window_days": days,
             "total_meetings": total_meetings,
             "busy_slots": sorted(busy_slots, key=lambda s: -s["meeting_count"])[:10],
             "free_slots": free_slots[:10],
             "heatmap": {str(k): dict(v) for k, v in heatmap.items()},
         }
 
-        self._store_observation(
-            entity_type="calendar_schedule",
-            entity_id="weekly_pattern",
-            observation_type="busy_free_pattern",
-            value=result,
-            confidence=0.7 if total_meetings > 10 else 0.4,
-            ttl_days=7,
-        )
-
-        logger.info(f"Detected busy/free patterns from {total_meetings} meetings")
-        return result
-
     def detect_meeting_frequency_by_contact(self, days=30):
         """Analyze meeting frequency grouped by attendee contact."""
+        self.refresh_features()
         query = """
         SELECT
-          attendee.email as contact_email,
-          attendee.display_name as contact_name,
-          COUNT(DISTINCT e.event_id) as meeting_count,
-          MIN(e.timestamp) as first_meeting,
-          MAX(e.timestamp) as last_meeting
-        FROM `{project}.openclaw.events` e,
-        UNNEST(JSON_QUERY_ARRAY(payload, '$.attendees')) as raw_attendee
-        CROSS JOIN UNNEST([STRUCT(
-          JSON_VALUE(raw_attendee, '$.email') as email,
-          JSON_VALUE(raw_attendee, '$.display_name') as display_name,
-          JSON_VALUE(raw_attendee, '$.self') as is_self
-        )]) as attendee
-        WHERE e.source = 'calendar'
-          AND JSON_VALUE(payload, '$.change_type') != 'deleted'
-          AND attendee.is_self = 'false'
-          AND e.timestamp > TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL @days DAY)
+          attendee_email as contact_email,
+          attendee_name as contact_name,
+          SUM(event_count) as meeting_count,
+          MIN(first_seen) as first_meeting,
+          MAX(last_seen) as last_meeting
+        FROM `{features}`
+        WHERE feature = 'attendee'
+          AND day >= DATE(TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL @days DAY))
         GROUP BY contact_email, contact_name
-        HAVING COUNT(DISTINCT e.event_id) >= 2
+        HAVING SUM(event_count) >= 2
         ORDER BY meeting_count DESC
         LIMIT 30
-        """.format(project=self.project_id)
+        """.format(features=self.features_table)
 
         rows = self._query(query, [
             bigquery.ScalarQueryParameter("days", "INT64", days),
@@ -204,12 +330,20 @@ class CalendarPatternDetector:
                 confidence=0.85,
             )
 
+        self.observations.flush()
         logger.info(f"Detected meeting frequency for {len(contacts)} contacts")
         return contacts
 
     def suggest_optimal_meeting_times(self, duration_minutes=30, days_ahead=5):
         """Suggest optimal meeting times based on historical free slots."""
-        busy_free = self.detect_busy_free_patterns(days=14)
+        # Reuse a busy/free pattern stored after this process last refreshed the
+        # features; otherwise read the occupancy features (without storing a new
+        # pattern). Before any successful refresh nothing is reused.
+        self.refresh_features()
+        since_refresh = time.time() - self._features_refreshed_at if self._features_refreshed_at else None
+        busy_free = self._cached_observation(
+            "calendar_schedule", "weekly_pattern", "busy_free_pattern", since_refresh, 14,
+        ) or self._busy_free(days=14)
         free_slots = busy_free.get("free_slots", [])
 
         day_order = {"Monday": 0, "Tuesday": 1, "Wednesday": 2, "Thursday": 3, "Friday": 4}
@@ -238,11 +372,18 @@ class CalendarPatternDetector:
                 ttl_days=7,
             )
 
+        self.observations.flush()
         logger.info(f"Generated {len(suggestions)} optimal time suggestions")
         return suggestions[:10]
 
-    def detect_anomalies(self, days=7):
+    def detect_anomalies(self, days=7, max_age_s=None):
         """Detect scheduling anomalies: off-hours meetings, double-bookings, recurring gaps."""
+        cached = self._cached_observation(
+            "calendar_schedule", "anomalies", "scheduling_anomaly", max_age_s, days,
+        )
+        if cached is not None:
+            return cached["anomalies"]
+
         anomalies = []
 
         # 1. Off-hours meetings
@@ -335,37 +476,40 @@ class CalendarPatternDetector:
                 entity_type="calendar_schedule",
                 entity_id="anomalies",
                 observation_type="scheduling_anomaly",
-                value={"anomalies": anomalies, "detection_window_days": days},
+                value={"anomalies": anomalies, "detection_window_days": days, "window_days": days},
                 confidence=0.75,
                 ttl_days=7,
             )
 
+        self.observations.flush()
         logger.info(f"Detected {len(anomalies)} scheduling anomalies")
         return anomalies
 
-    def detect_recurring_gaps(self, days=30):
+    def detect_recurring_gaps(self, days=30, max_age_s=None):
         """Detect gaps in recurring meeting series (missed instances)."""
+        cached = self._cached_observation(
+            "calendar_meeting", "recurring_gaps", "recurring_series_gap", max_age_s, days,
+        )
+        if cached is not None:
+            return cached["gaps"]
+
+        self.refresh_features()
         query = """
         SELECT
-          JSON_VALUE(payload, '$.recurring_event_id') as recurring_id,
-          JSON_VALUE(payload, '$.title') as title,
-          COUNT(*) as instance_count,
-          ARRAY_AGG(
-            PARSE_TIMESTAMP('%Y-%m-%dT%H:%M:%S',
-              SPLIT(JSON_VALUE(payload, '$.start_time'), '+')[OFFSET(0)])
-            ORDER BY timestamp
-          ) as instance_times
-        FROM `{project}.openclaw.events`
-        WHERE source = 'calendar'
-          AND JSON_VALUE(payload, '$.recurring_event_id') IS NOT NULL
-          AND JSON_VALUE(payload, '$.recurring_event_id') != ''
-          AND JSON_VALUE(payload, '$.change_type') != 'deleted'
-          AND timestamp > TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL @days DAY)
+          recurring_id,
+          title,
+          SUM(event_count) as instance_count,
+          ARRAY_CONCAT_AGG(start_ts ORDER BY day) as instance_times
+        FROM `{features}`
+        WHERE feature = 'series'
+          AND recurring_id IS NOT NULL
+          AND recurring_id != ''
+          AND day >= DATE(TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL @days DAY))
         GROUP BY recurring_id, title
-        HAVING COUNT(*) >= 3
+        HAVING SUM(event_count) >= 3
         ORDER BY instance_count DESC
         LIMIT 20
-        """.format(project=self.project_id)
+        """.format(features=self.features_table)
 
         rows = self._query(query, [
             bigquery.ScalarQueryParameter("days", "INT64", days),
@@ -399,16 +543,18 @@ class CalendarPatternDetector:
                 entity_type="calendar_meeting",
                 entity_id="recurring_gaps",
                 observation_type="recurring_series_gap",
-                value={"gaps": gaps},
+                value={"gaps": gaps, "window_days": days},
                 confidence=0.7,
                 ttl_days=14,
             )
 
+        self.observations.flush()
         logger.info(f"Detected {len(gaps)} gaps in recurring series")
         return gaps
 
     def run_all_detections(self, days=30):
         """Run all pattern detections and return combined results."""
+        self.refresh_features(force=True)
         results = {
             "recurring_meetings": self.detect_recurring_meetings(days=days),
             "busy_free_patterns": self.detect_busy_free_patterns(days=min(days, 14)),
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+OpenClaw Event Backlog Drainer
+
+Runs the orchestrator pipeline over `openclaw.events WHERE processed = FALSE`
+in batches (OpenClawOrchestrator.process_events), then marks the events
+that succeeded processed. Failed events stay unprocessed and are picked up
+by the next run.
+
+Events are read in (timestamp, event_id) order behind a cursor, so a batch
+whose processed-flag update fails (e.g. rows still in the streaming buffer)
+is not picked up again in the same run.
+
+Usage:
+  python3 execution/drain_events.py --batch-size 500 --concurrency 8
+  python3 execution/drain_events.py --max-events 100 --dry-run
+
+Requirements:
+  - Application Default Credentials configured (gcloud auth application-default login)
+  - GOOGLE_PROJECT_ID or PROJECT_ID and GOOGLE_SHEET_ID or SHEET_ID set in environment
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+from google.cloud import bigquery
+
+from openclaw_orchestrator import BATCH_CONCURRENCY, OpenClawOrchestrator
+
+# Same loop guards as the orchestrator Cloud Function.
+SKIP_SOURCES = ("orchestrator",)
+SKIP_EVENT_TYPES = ("action_taken",)
+
+
+def fetch_batch(client, project_id, batch_size, cursor):
+    query = f"""
+    SELECT event_id, timestamp, agent_id, event_type, source, TO_JSON_STRING(payload) AS payload
+    FROM `{project_id}.openclaw.events`
+    WHERE processed = FALSE
+      AND IFNULL(source, "") NOT IN UNNEST(@skip_sources)
+      AND IFNULL(event_type, "") NOT IN UNNEST(@skip_event_types)
+      AND (
+        @cursor_ts IS NULL
+        OR timestamp > @cursor_ts
+        OR (timestamp = @cursor_ts AND event_id > @cursor_id)
+      )
+    ORDER BY timestamp, event_id
+    LIMIT @limit
+    """
+    job_config = bigquery.QueryJobConfig(
+        query_parameters=[
+            bigquery.ArrayQueryParameter("skip_sources", "STRING", list(SKIP_SOURCES)),
+            bigquery.ArrayQueryParameter("skip_event_types", "STRING", list(SKIP_EVENT_TYPES)),
+            bigquery.ScalarQueryParameter("cursor_ts", "TIMESTAMP", cursor[0]),
+            bigquery.ScalarQueryParameter("cursor_id", "STRING", cursor[1]),
+            bigquery.ScalarQueryParameter("limit", "INT64", batch_size),
+        ]
+    )
+    return list(client.query(query, job_config=job_config))
+
+
+def to_event(row):
+    payload = row.payload
+    try:
+        payload = json.loads(payload) if payload else {}
+    except (TypeError, json.JSONDecodeError):
+        pass
+    return {
+        "event_id": row.event_id,
+        "timestamp": row.timestamp.isoformat() if row.timestamp else None,
+        "agent_id": row.agent_id,
+        "event_type": row.event_type,
+        "source": row.source,
+        "payload": payload,
+    }
+
+
+def mark_processed(client, project_id, event_ids):
+    query = f"""
+    UPDATE `{project_id}.openclaw.events`
+    SET processed = TRUE
+    WHERE event_id IN UNNEST(@event_ids)
+    """
+    job_config = bigquery.QueryJobConfig(
+        query_parameters=[bigquery.ArrayQueryParameter("event_ids", "STRING", event_ids)]
+    )
+    try:
+        client.query(query, job_config=job_config).result()
+        return True
+    except Exception as exc:
+        print(f"  ✗ Failed to mark {len(event_ids)} events processed: {exc}", file=sys.stderr)
+        return False
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Drain unprocessed OpenClaw events through the orchestrator")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY)
+    parser.add_argument("--max-events", type=int, default=0, help="Stop after this many events (0 = all)")
+    parser.add_argument("--region", default=os.environ.get("VERTEX_REGION", "us-central1"))
+    parser.add_argument("--dry-run", action="store_true", help="Only count what would be processed")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    project_id = os.environ.get("GOOGLE_PROJECT_ID") or os.environ.get("PROJECT_ID")
+    sheet_id = os.environ.get("GOOGLE_SHEET_ID") or os.environ.get("SHEET_ID")
+    if not project_id or not sheet_id:
+        print("ERROR: project and sheet IDs must be set in environment", file=sys.stderr)
+        return 1
+
+    client = bigquery.Client(project=project_id)
+    orchestrator = None if args.dry_run else OpenClawOrchestrator(project_id, sheet_id, region=args.region)
+
+    cursor = (None, None)
+    total = 0
+    failed = 0
+    started = time.perf_counter()
+
+    while True:
+        batch_size = args.batch_size
+        if args.max_events:
+            batch_size = min(batch_size, args.max_events - total)
+            if batch_size <= 0:
+                break
+
+        rows = fetch_batch(client, project_id, batch_size, cursor)
+        if not rows:
+            break
+        cursor = (rows[-1].timestamp, rows[-1].event_id)
+        total += len(rows)
+
+        if args.dry_run:
+            print(f"Would process {len(rows)} events (through {cursor[0]})")
+            continue
+
+        summary = orchestrator.process_events([to_event(r) for r in rows], max_concurrency=args.concurrency)
+        failed += summary["failed_count"]
+        print(
+            f"✓ Batch of {summary['event_count']}: {summary['failed_count']} failed, "
+            f"{summary['rows_written']} rows written, {summary['events_per_sec']} events/sec"
+        )
+        cache = summary.get("llm_cache") or {}
+        if cache:
+            print(
+                f"  LLM cache: hit rate {cache['hit_rate']:.0%}, saved "
+                f"{cache['saved_input_tokens']} input / {cache['saved_output_tokens']} output tokens"
+            )
+        # Results come back in event order; only successes leave the backlog.
+        succeeded = [
+            row.event_id
+            for row, result in zip(rows, summary["results"])
+            if not result.get("error")
+        ]
+        if succeeded:
+            mark_processed(client, project_id, succeeded)
+
+    elapsed = time.perf_counter() - started
+    rate = round(total / elapsed, 2) if elapsed > 0 else 0
+    print()
+    print(f"Drained {total} events ({failed} failed) in {elapsed:.1f}s — {rate} events/sec")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,214 @@
+"""
+Gemini response cache shared by GeminiAnalyzer and gmail_enricher.
+
+Keys are sha256(model_id, sha256(prompt), generation config), so a retried
+Pub/Sub delivery or a reprocessing run of the same event reuses the earlier
+response instead of paying for a new call. Any change to the model, the
+prompt text or the generation settings is a different key; prompts embed the
+event's time, sender and recipients, so copies of one message sent to
+different people do not share an entry.
+
+The LRU and stats are shared by the batch workers and guarded by a lock;
+GCS reads and writes happen outside it.
+
+Tier 1 is a process-local LRU; tier 2 is one JSON object per key under
+`openclaw/llm-cache/` in LLM_CACHE_BUCKET (falls back to GCS_STAGING_BUCKET).
+Without a bucket the cache is memory-only. Entries expire per analysis type
+(ANALYSIS_TTL_S); types with a TTL of 0 are never cached.
+
+This module is copied verbatim into each function directory that uses it
+(same pattern as agent_context.py).
+
+Usage:
+    cache = get_llm_cache()
+    key = cache.key(model_id, prompt, generation_config)
+    hit = cache.get(key)               # -> {"text", "input_tokens", "output_tokens"} or None
+    cache.put(key, {...}, analysis_type="triage")
+    cache.report()                     # hit rate + tokens saved
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+CACHE_PREFIX = "openclaw/llm-cache"
+
+LLM_CACHE_ENABLED = os.environ.get("LLM_CACHE_ENABLED", "true").lower() not in ("0", "false", "no")
+LLM_CACHE_BUCKET = os.environ.get("LLM_CACHE_BUCKET") or os.environ.get("GCS_STAGING_BUCKET")
+LLM_CACHE_MAX_ENTRIES = int(os.environ.get("LLM_CACHE_MAX_ENTRIES", "2048"))
+LLM_CACHE_DEFAULT_TTL_S = int(os.environ.get("LLM_CACHE_DEFAULT_TTL_S", str(7 * 24 * 3600)))
+
+# Content-only analyses keep for weeks; decisions embed live context
+# (workload, sender) so they are only reused across quick retries.
+ANALYSIS_TTL_S = {
+    "triage": 7 * 24 * 3600,
+    "summarize": 30 * 24 * 3600,
+    "classify": 30 * 24 * 3600,
+    "extract": 30 * 24 * 3600,
+    "gmail_enrichment": 30 * 24 * 3600,
+    "decide": 3600,
+    "triage_decide": 3600,
+}
+ANALYSIS_TTL_S.update(json.loads(os.environ.get("LLM_CACHE_TTL_OVERRIDES", "{}") or "{}"))
+
+
+class LLMResponseCache:
+    """In-process LRU in front of a GCS key-value tier, with per-analysis-type TTLs."""
+
+    def __init__(
+        self,
+        bucket_name: Optional[str] = None,
+        storage_client=None,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+    ):
+        self.bucket_name = bucket_name
+        self._storage_client = storage_client
+        self.max_entries = max_entries
+
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {
+            "memory_hits": 0,
+            "gcs_hits": 0,
+            "misses": 0,
+            "saved_input_tokens": 0,
+            "saved_output_tokens": 0,
+        }
+
+    @staticmethod
+    def key(model_id: str, prompt: str, generation_config: Dict[str, Any]) -> str:
+        prompt_sha = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        material = json.dumps(
+            {"model": model_id, "prompt": prompt_sha, "config": generation_config},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def ttl_for(analysis_type: Optional[str]) -> int:
+        return int(ANALYSIS_TTL_S.get(analysis_type, LLM_CACHE_DEFAULT_TTL_S))
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry["expires_at"] > now:
+                    self._entries.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return self._count_saved(entry["value"])
+                self._entries.pop(key, None)
+
+        stored = self._read_gcs(key)
+        if stored is not None and stored.get("expires_at", 0) > now:
+            self._remember(key, stored["expires_at"], stored["value"])
+            with self._lock:
+                self.stats["gcs_hits"] += 1
+                return self._count_saved(stored["value"])
+
+        with self._lock:
+            self.stats["misses"] += 1
+        return None
+
+    def put(self, key: str, value: Dict[str, Any], analysis_type: Optional[str] = None) -> None:
+        ttl = self.ttl_for(analysis_type)
+        if ttl <= 0:
+            return
+        expires_at = time.time() + ttl
+        self._remember(key, expires_at, value)
+        self._write_gcs(key, expires_at, value, analysis_type)
+
+    def hit_rate(self) -> float:
+        with self._lock:
+            stats = dict(self.stats)
+        hits = stats["memory_hits"] + stats["gcs_hits"]
+        total = hits + stats["misses"]
+        return hits / total if total else 0.0
+
+    def report(self) -> Dict[str, Any]:
+        hit_rate = self.hit_rate()
+        with self._lock:
+            return dict(self.stats, hit_rate=round(hit_rate, 3))
+
+    def _count_saved(self, value: Dict[str, Any]) -> Dict[str, Any]:
+        """Caller holds self._lock."""
+        self.stats["saved_input_tokens"] += int(value.get("input_tokens") or 0)
+        self.stats["saved_output_tokens"] += int(value.get("output_tokens") or 0)
+        return value
+
+    def _remember(self, key: str, expires_at: float, value: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = {"expires_at": expires_at, "value": value}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _read_gcs(self, key: str) -> Optional[Dict[str, Any]]:
+        bucket = self._bucket()
+        if bucket is None:
+            return None
+        try:
+            blob = bucket.blob(f"{CACHE_PREFIX}/{key}.json")
+            if not blob.exists():
+                return None
+            data = json.loads(blob.download_as_bytes().decode("utf-8"))
+        except Exception as exc:
+            logger.warning(f"LLM cache read failed key={key[:12]}: {exc}")
+            return None
+        return data if isinstance(data, dict) and "value" in data else None
+
+    def _write_gcs(
+        self, key: str, expires_at: float, value: Dict[str, Any], analysis_type: Optional[str]
+    ) -> None:
+        bucket = self._bucket()
+        if bucket is None:
+            return
+        body = {
+            "analysis_type": analysis_type,
+            "cached_at": time.time(),
+            "expires_at": expires_at,
+            "value": value,
+        }
+        try:
+            bucket.blob(f"{CACHE_PREFIX}/{key}.json").upload_from_string(
+                json.dumps(body, default=str), content_type="application/json"
+            )
+        except Exception as exc:
+            logger.warning(f"LLM cache write failed key={key[:12]}: {exc}")
+
+    def _bucket(self):
+        if not self.bucket_name:
+            return None
+        if self._storage_client is None:
+            try:
+                from google.cloud import storage
+
+                self._storage_client = storage.Client()
+            except Exception as exc:
+                logger.warning(f"GCS unavailable for LLM cache: {exc}")
+                self.bucket_name = None
+                return None
+        return self._storage_client.bucket(self.bucket_name)
+
+
+_CACHE: Optional[LLMResponseCache] = None
+
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """Process-wide cache (kept across warm invocations); None when LLM_CACHE_ENABLED is off."""
+    global _CACHE
+    if not LLM_CACHE_ENABLED:
+        return None
+    if _CACHE is None:
+        _CACHE = LLMResponseCache(bucket_name=LLM_CACHE_BUCKET)
+    return _CACHE
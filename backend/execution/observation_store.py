@@ -0,0 +1,216 @@
+"""
+Batched writer and read-through cache for `openclaw.observations`.
+
+put() buffers the row and caches it under (entity_type, entity_id,
+observation_type); flush() writes the buffer with one insert per
+OBSERVATION_FLUSH_ROWS rows. get() answers from the cache while the entry
+is unexpired (and, with max_age_s, recent enough), otherwise reads the
+newest unexpired row from BigQuery and caches that. Misses are remembered
+for OBSERVATION_MISS_TTL_S so repeated lookups of absent keys do not each
+run a query.
+
+The cache, the buffer and the stats are shared by every caller in the
+process and only touched under one lock; BigQuery calls happen outside it.
+
+Usage:
+    store = get_observation_store(project_id)
+    store.put("calendar_pattern_detector", "contact", email, "meeting_frequency", value, confidence=0.85, ttl_days=30)
+    store.flush()
+    obs = store.get("contact", email, "meeting_frequency")   # -> dict or None
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from google.cloud import bigquery
+
+logger = logging.getLogger(__name__)
+
+
+OBSERVATION_FLUSH_ROWS = int(os.environ.get("OBSERVATION_FLUSH_ROWS", "500"))
+OBSERVATION_MISS_TTL_S = int(os.environ.get("OBSERVATION_MISS_TTL_S", "60"))
+OBSERVATION_MAX_ENTRIES = int(os.environ.get("OBSERVATION_MAX_ENTRIES", "50000"))
+# Read-through lookups only scan this many days of partitions (longest TTL in use).
+OBSERVATION_LOOKBACK_DAYS = int(os.environ.get("OBSERVATION_LOOKBACK_DAYS", "31"))
+
+
+class ObservationStore:
+    """Buffered observation sink with an expires_at-aware read cache."""
+
+    def __init__(self, project_id, bq=None):
+        self.project_id = project_id
+        self.bq = bq or bigquery.Client()
+        self.table = f"{project_id}.openclaw.observations"
+        self._lock = threading.Lock()
+        self._pending = []
+        self._cache = {}
+        self._misses = {}
+        self.stats = {"hits": 0, "misses": 0, "queries": 0, "rows_written": 0, "insert_calls": 0}
+
+    def put(self, agent_id, entity_type, entity_id, observation_type, value, confidence=0.8, ttl_days=30):
+        """Buffer an observation and make it visible to get() immediately. Returns its ID."""
+        now = datetime.utcnow()
+        expires = now + timedelta(days=ttl_days)
+        row = {
+            "observation_id": f"{agent_id.split('_')[0][:3]}-obs-{uuid.uuid4().hex[:12]}",
+            "timestamp": now.isoformat() + "Z",
+            "agent_id": agent_id,
+            "entity_type": entity_type,
+            "entity_id": entity_id,
+            "observation_type": observation_type,
+            "value": json.dumps(value),
+            "confidence": confidence,
+            "expires_at": expires.isoformat() + "Z",
+        }
+        key = (entity_type, entity_id, observation_type)
+        entry = {
+            "observation_id": row["observation_id"],
+            "timestamp": time.time(),
+            "expires_at": time.time() + ttl_days * 86400,
+            "value": value,
+            "confidence": confidence,
+        }
+        with self._lock:
+            self._pending.append(row)
+            self._remember(key, entry)
+            self._misses.pop(key, None)
+            should_flush = len(self._pending) >= OBSERVATION_FLUSH_ROWS
+        if should_flush:
+            self.flush()
+        return row["observation_id"]
+
+    def flush(self):
+        """Write buffered observations. Returns the number of rows written."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        written = 0
+        for i in range(0, len(pending), OBSERVATION_FLUSH_ROWS):
+            chunk = pending[i : i + OBSERVATION_FLUSH_ROWS]
+            try:
+                errors = self.bq.insert_rows_json(self.table, chunk)
+                with self._lock:
+                    self.stats["insert_calls"] += 1
+                if errors:
+                    logger.error(f"Failed to store observations: {errors}")
+                else:
+                    written += len(chunk)
+            except Exception as exc:
+                logger.error(f"Failed to store {len(chunk)} observations: {exc}")
+        with self._lock:
+            self.stats["rows_written"] += written
+        return written
+
+    def get(self, entity_type, entity_id, observation_type, max_age_s=None):
+        """
+        Newest unexpired observation for the key, or None.
+
+        Returns dict with observation_id, value, confidence, timestamp and
+        expires_at (epoch seconds). max_age_s additionally rejects entries
+        written longer ago than that.
+        """
+        key = (entity_type, entity_id, observation_type)
+        now = time.time()
+
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None or entry["expires_at"] <= now:
+                entry = None
+                if self._misses.get(key, 0.0) > now:
+                    self.stats["misses"] += 1
+                    return None
+
+        if entry is None:
+            entry = self._read(key)
+            with self._lock:
+                if entry is None:
+                    self._misses[key] = now + OBSERVATION_MISS_TTL_S
+                    self.stats["misses"] += 1
+                    return None
+                self._remember(key, entry)
+
+        with self._lock:
+            if max_age_s is not None and now - entry["timestamp"] > max_age_s:
+                self.stats["misses"] += 1
+                return None
+            self.stats["hits"] += 1
+        return entry
+
+    def _read(self, key):
+        entity_type, entity_id, observation_type = key
+        query = f"""
+        SELECT
+          observation_id,
+          timestamp,
+          TO_JSON_STRING(value) AS value,
+          confidence,
+          expires_at
+        FROM `{self.table}`
+        WHERE entity_type = @entity_type
+          AND entity_id = @entity_id
+          AND observation_type = @observation_type
+          AND expires_at > CURRENT_TIMESTAMP()
+          AND timestamp > TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL @lookback_days DAY)
+        ORDER BY timestamp DESC
+        LIMIT 1
+        """
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[
+                bigquery.ScalarQueryParameter("entity_type", "STRING", entity_type),
+                bigquery.ScalarQueryParameter("entity_id", "STRING", entity_id),
+                bigquery.ScalarQueryParameter("observation_type", "STRING", observation_type),
+                bigquery.ScalarQueryParameter("lookback_days", "INT64", OBSERVATION_LOOKBACK_DAYS),
+            ]
+        )
+        with self._lock:
+            self.stats["queries"] += 1
+        try:
+            rows = list(self.bq.query(query, job_config=job_config))
+        except Exception as exc:
+            logger.warning(f"Observation lookup failed for {key}: {exc}")
+            return None
+        if not rows:
+            return None
+        row = rows[0]
+        value = json.loads(row.value) if row.value else None
+        # Rows written by _store_observation hold a JSON-encoded string.
+        if isinstance(value, str):
+            try:
+                value = json.loads(value)
+            except json.JSONDecodeError:
+                pass
+        return {
+            "observation_id": row.observation_id,
+            "timestamp": row.timestamp.timestamp(),
+            "expires_at": row.expires_at.timestamp(),
+            "value": value,
+            "confidence": row.confidence,
+        }
+
+    def _remember(self, key, entry):
+        """Caller holds self._lock."""
+        current = self._cache.get(key)
+        if current is not None and current["timestamp"] > entry["timestamp"]:
+            return
+        self._cache[key] = entry
+        if len(self._cache) > OBSERVATION_MAX_ENTRIES:
+            now = time.time()
+            for k in [k for k, e in self._cache.items() if e["expires_at"] <= now]:
+                del self._cache[k]
+            while len(self._cache) > OBSERVATION_MAX_ENTRIES:
+                del self._cache[next(iter(self._cache))]
+
+
+_STORES = {}
+
+
+def get_observation_store(project_id, bq=None):
+    """Process-wide store per project (cache kept warm across invocations)."""
+    store = _STORES.get(project_id)
+    if store is None:
+        store = _STORES[project_id] = ObservationStore(project_id, bq)
+    return store
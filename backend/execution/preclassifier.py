@@ -0,0 +1,205 @@
+"""
+Deterministic pre-classifier for the orchestrator fast path.
+
+Decides obvious events locally so they skip Cloud NLP and Gemini:
+- Rules over Gmail labels, sender address and subject (newsletters and
+  promotions, receipts, calendar auto-notifications, no-reply senders).
+- Sender reputation from past `ai_decisions`: a sender whose recent
+  decisions were overwhelmingly one low-stakes action gets that action.
+
+Only low-stakes actions (archive / ignore) are ever returned, so a wrong
+call costs a missed label, never a missed task. The orchestrator bypasses
+the LLM only when confidence >= PRECLASSIFY_MIN_CONFIDENCE and still sends
+a PRECLASSIFY_SHADOW_RATE sample through the full pipeline to measure
+agreement.
+
+The reputation map is held per project at module level, so the orchestrator
+built for each invocation reuses it and the lookback query runs at most once
+per REPUTATION_TTL_S per process.
+
+Usage:
+    pre = PreClassifier(project_id, bq)
+    verdict = pre.classify(event_data)   # -> {"action", "confidence", "reason"} or None
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from email.utils import parseaddr
+
+from google.cloud import bigquery
+
+logger = logging.getLogger(__name__)
+
+
+PRECLASSIFY_MIN_CONFIDENCE = float(os.environ.get("PRECLASSIFY_MIN_CONFIDENCE", "0.95"))
+PRECLASSIFY_SHADOW_RATE = float(os.environ.get("PRECLASSIFY_SHADOW_RATE", "0.05"))
+REPUTATION_TTL_S = int(os.environ.get("PRECLASSIFY_REPUTATION_TTL_S", "3600"))
+REPUTATION_LOOKBACK_DAYS = int(os.environ.get("PRECLASSIFY_REPUTATION_DAYS", "90"))
+REPUTATION_MIN_DECISIONS = int(os.environ.get("PRECLASSIFY_REPUTATION_MIN_DECISIONS", "5"))
+
+LOW_STAKES_ACTIONS = ("archive", "ignore")
+
+BULK_LABELS = {
+    "CATEGORY_PROMOTIONS": 0.97,
+    "CATEGORY_SOCIAL": 0.96,
+    "CATEGORY_FORUMS": 0.9,
+    "CATEGORY_UPDATES": 0.85,
+    "SPAM": 0.99,
+}
+
+CALENDAR_SENDERS = ("calendar-notification@google.com",)
+CALENDAR_SUBJECT_RE = re.compile(
+    r"^(invitation|updated invitation|accepted|declined|tentatively accepted|canceled event)"
+    r"( with note)?:",
+    re.IGNORECASE,
+)
+NO_REPLY_RE = re.compile(r"^(no-?reply|do-?not-?reply|notifications?|mailer-daemon|news(letter)?)[@+.]", re.I)
+RECEIPT_SUBJECT_RE = re.compile(
+    r"\b(your (order|receipt|payment)|order confirmation|receipt for|payment received|"
+    r"has shipped|out for delivery|delivered:)\b",
+    re.IGNORECASE,
+)
+NEWSLETTER_BODY_RE = re.compile(r"\b(unsubscribe|manage (your )?preferences|view (it )?in (your )?browser)\b", re.I)
+
+# project_id -> (loaded_at, {sender: (action, share, total)}); shared by all instances.
+_REPUTATION = {}
+_REPUTATION_LOCK = threading.Lock()
+
+
+class PreClassifier:
+    """Rules + sender reputation; returns a low-stakes verdict or None."""
+
+    def __init__(self, project_id, bq=None):
+        self.project_id = project_id
+        self.bq = bq
+
+    def classify(self, event_data):
+        if event_data.get("source") != "gmail":
+            return None
+
+        payload = _parse_payload(event_data.get("payload"))
+        sender = parseaddr(payload.get("from") or "")[1].lower()
+        subject = (payload.get("subject") or "").strip()
+        labels = payload.get("labels") or []
+        if isinstance(labels, str):
+            labels = [labels]
+
+        # A starred/important message is never fast-pathed.
+        if "IMPORTANT" in labels or "STARRED" in labels:
+            return None
+
+        verdicts = []
+
+        if sender in CALENDAR_SENDERS or CALENDAR_SUBJECT_RE.match(subject):
+            verdicts.append(("archive", 0.98, "calendar auto-notification"))
+
+        for label in labels:
+            if label in BULK_LABELS:
+                verdicts.append(("archive", BULK_LABELS[label], f"gmail label {label}"))
+
+        no_reply = bool(NO_REPLY_RE.match(sender))
+        if RECEIPT_SUBJECT_RE.search(subject) and no_reply:
+            verdicts.append(("archive", 0.96, "automated receipt/shipping notice"))
+
+        body = f"{payload.get('snippet') or ''}\n{payload.get('body_text') or ''}"
+        if no_reply and NEWSLETTER_BODY_RE.search(body):
+            verdicts.append(("archive", 0.95, "no-reply sender with unsubscribe footer"))
+        elif no_reply:
+            verdicts.append(("archive", 0.8, "no-reply sender"))
+
+        reputation = self._sender_reputation(sender)
+        if reputation:
+            verdicts.append(reputation)
+
+        if not verdicts:
+            return None
+        action, confidence, reason = max(verdicts, key=lambda v: v[1])
+        return {"action": action, "confidence": confidence, "reason": reason, "sender": sender}
+
+    def _sender_reputation(self, sender):
+        if not sender:
+            return None
+        stats = self._refresh_reputation().get(sender)
+        if not stats:
+            return None
+        action, share, total = stats
+        if action not in LOW_STAKES_ACTIONS or total < REPUTATION_MIN_DECISIONS:
+            return None
+        # Shrink toward uncertainty for small samples: n/(n+1) of the observed share.
+        confidence = share * total / (total + 1)
+        return (action, round(confidence, 3), f"sender history: {action} in {share:.0%} of {total}")
+
+    def _refresh_reputation(self):
+        """The project's sender reputation map, reloaded at most once per REPUTATION_TTL_S."""
+        loaded_at, reputation = _REPUTATION.get(self.project_id, (0.0, {}))
+        if self.bq is None or time.time() - loaded_at < REPUTATION_TTL_S:
+            return reputation
+        with _REPUTATION_LOCK:
+            loaded_at, reputation = _REPUTATION.get(self.project_id, (0.0, {}))
+            if time.time() - loaded_at < REPUTATION_TTL_S:
+                return reputation
+            # Stamp before loading so a failed load is not retried on every event.
+            _REPUTATION[self.project_id] = (time.time(), reputation)
+            try:
+                reputation = self._load_reputation()
+                _REPUTATION[self.project_id] = (time.time(), reputation)
+                logger.info(f"Pre-classifier loaded reputation for {len(reputation)} senders")
+            except Exception as exc:
+                logger.warning(f"Pre-classifier reputation load failed: {exc}")
+            return reputation
+
+    def _load_reputation(self):
+        """sender -> (dominant action, its share, total decisions) over the lookback window."""
+        query = f"""
+        WITH decided AS (
+          SELECT
+            LOWER(REGEXP_EXTRACT(JSON_VALUE(e.payload, '$.from'), r'[^<\\s]+@[^>\\s]+')) AS sender,
+            d.chosen_action
+          FROM `{self.project_id}.openclaw.ai_decisions` d
+          JOIN `{self.project_id}.openclaw.events` e ON e.event_id = d.trigger_event_id
+          WHERE d.timestamp > TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL @days DAY)
+            AND e.source = 'gmail'
+            -- LLM decisions only; fast-path decisions would feed back into themselves.
+            AND d.analysis_id IS NOT NULL
+        ),
+        counts AS (
+          SELECT sender, chosen_action, COUNT(*) AS n
+          FROM decided
+          WHERE sender IS NOT NULL
+          GROUP BY sender, chosen_action
+        )
+        SELECT
+          sender,
+          ARRAY_AGG(chosen_action ORDER BY n DESC LIMIT 1)[OFFSET(0)] AS top_action,
+          MAX(n) / SUM(n) AS share,
+          SUM(n) AS total
+        FROM counts
+        GROUP BY sender
+        HAVING SUM(n) >= @min_decisions
+        """
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[
+                bigquery.ScalarQueryParameter("days", "INT64", REPUTATION_LOOKBACK_DAYS),
+                bigquery.ScalarQueryParameter("min_decisions", "INT64", REPUTATION_MIN_DECISIONS),
+            ]
+        )
+        return {
+            row.sender: (row.top_action, float(row.share), int(row.total))
+            for row in self.bq.query(query, job_config=job_config)
+        }
+
+
+def _parse_payload(payload):
+    if isinstance(payload, dict):
+        return payload
+    if isinstance(payload, str):
+        try:
+            parsed = json.loads(payload)
+            return parsed if isinstance(parsed, dict) else {}
+        except json.JSONDecodeError:
+            return {}
+    return {}
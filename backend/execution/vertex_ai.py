@@ -13,8 +13,11 @@ import hashlib
 import json
 import logging
 import os
+import random
+import threading
 import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 from google.cloud import bigquery
@@ -22,6 +25,9 @@ from google.auth import default
 import vertexai
 from vertexai.generative_models import GenerativeModel, GenerationConfig
 
+from llm_cache import get_llm_cache
+from prompt_builder import build_prompt, format_event_full
+
 logger = logging.getLogger(__name__)
 
 credentials, _ = default()
@@ -29,6 +35,20 @@ credentials, _ = default()
 # Default model - configurable via config sheet
 DEFAULT_MODEL = "gemini-2.0-flash"
 
+# analyze_batch(): AIMD in-flight limit bounds, retry budget on 429, and an
+# optional requests/min ceiling (the project's Gemini quota).
+BATCH_INITIAL_IN_FLIGHT = int(os.environ.get("GEMINI_BATCH_INITIAL_IN_FLIGHT", "4"))
+BATCH_MAX_IN_FLIGHT = int(os.environ.get("GEMINI_BATCH_MAX_IN_FLIGHT", "32"))
+BATCH_MAX_RETRIES = int(os.environ.get("GEMINI_BATCH_MAX_RETRIES", "5"))
+GEMINI_QUOTA_RPM = int(os.environ.get("GEMINI_QUOTA_RPM", "0"))
+BATCH_INSERT_CHUNK_ROWS = 500
+
+GENERATION_CONFIG = {
+    "temperature": 0.2,
+    "max_output_tokens": 2048,
+    "response_mime_type": "application/json",
+}
+
 # Analysis type prompts
 ANALYSIS_PROMPTS = {
     "triage": (
@@ -63,19 +83,38 @@ ANALYSIS_PROMPTS = {
         "Respond in JSON format with keys: recommended_action, priority, "
         "reasoning, confidence (0-1), alternatives (list of other options)."
     ),
+    "triage_decide": (
+        "You are a triage assistant for incoming events (email, calendar, files). "
+        "Analyze this event and, using the "
+        "context provided (sender importance, current workload, NLP signals), "
+        "recommend an action. Determine:\n"
+        "1. Priority (P0-P4)\n"
+        "2. Category (action_required, fyi, spam, newsletter, personal, work)\n"
+        "3. Key entities (people, orgs, dates, amounts)\n"
+        "4. Brief summary (1-2 sentences)\n"
+        "5. Recommended action (reply, forward, archive, create_task, ignore)\n\n"
+        "Respond in JSON format with keys: priority, category, entities, summary, "
+        "recommended_action, reasoning, confidence (0-1), alternatives (list of other options)."
+    ),
 }
 
 
 class GeminiAnalyzer:
     """Analyze events using Vertex AI Gemini and store results in BigQuery."""
 
-    def __init__(self, project_id, sheet_id=None, region="us-central1"):
+    def __init__(self, project_id, sheet_id=None, region="us-central1", writer=None, cache=None):
         self.project_id = project_id
         self.sheet_id = sheet_id
         self.region = region
         self.bq = bigquery.Client()
+        # Anything with insert_rows_json(); lets callers buffer result rows.
+        self.writer = writer or self.bq
+        # Response cache keyed by model + prompt + generation config (False disables).
+        self.cache = get_llm_cache() if cache is None else (cache or None)
+        self._models = {}
         self.ai_table = f"{project_id}.openclaw.ai_analysis"
         self.decision_table = f"{project_id}.openclaw.ai_decisions"
+        self.executions_table = f"{project_id}.openclaw.ai_decision_executions"
 
         vertexai.init(project=project_id, location=region)
 
@@ -102,56 +141,78 @@ class GeminiAnalyzer:
         Returns:
             dict with analysis_id, output_structured, confidence, etc.
         """
+        row, result, _ = self._run_analysis(
+            event_data, analysis_type, agent_id, model_id, custom_prompt, context
+        )
+        self._write_analysis_rows([row])
+        return result
+
+    def _run_analysis(self, event_data, analysis_type, agent_id, model_id, custom_prompt, context):
+        """Call Gemini (or the cache) for one event. Returns (ai_analysis row, result, exception)."""
         model_id = model_id or DEFAULT_MODEL
         event_id = event_data.get("event_id", "unknown")
         analysis_id = f"ai-{uuid.uuid4().hex[:12]}"
 
         # Build prompt
         system_prompt = custom_prompt or ANALYSIS_PROMPTS.get(analysis_type, ANALYSIS_PROMPTS["summarize"])
-        event_text = self._format_event_for_prompt(event_data)
-
-        full_prompt = f"{system_prompt}\n\n---\nEvent Data:\n{event_text}"
-        if context:
-            full_prompt += f"\n\nAdditional Context:\n{json.dumps(context, indent=2, default=str)}"
+        full_prompt, prompt_version = build_prompt(system_prompt, event_data, analysis_type, context)
 
         prompt_hash = hashlib.sha256(full_prompt.encode()).hexdigest()[:16]
 
         # Call Gemini
         start_time = time.time()
         error_msg = None
+        failure = None
         raw_output = ""
         structured_output = {}
         confidence = 0.0
         input_tokens = 0
         output_tokens = 0
+        cache_key = self.cache.key(model_id, full_prompt, GENERATION_CONFIG) if self.cache else None
+        cached = None
 
         try:
-            model = GenerativeModel(model_id)
-            response = model.generate_content(
-                full_prompt,
-                generation_config=GenerationConfig(
-                    temperature=0.2,
-                    max_output_tokens=2048,
-                    response_mime_type="application/json",
-                ),
-            )
-
-            raw_output = response.text
-            structured_output = self._parse_json_response(raw_output)
-            confidence = structured_output.get("confidence", 0.5)
-
-            if hasattr(response, "usage_metadata") and response.usage_metadata:
-                input_tokens = getattr(response.usage_metadata, "prompt_token_count", 0)
-                output_tokens = getattr(response.usage_metadata, "candidates_token_count", 0)
+            if cache_key:
+                try:
+                    cached = self.cache.get(cache_key)
+                except Exception as exc:
+                    # A broken cache must not cost the analysis; fall back to the model.
+                    logger.warning(f"LLM cache lookup failed for {event_id}: {exc}")
+
+            if cached is not None:
+                # No tokens spent on a hit; the saving is tracked in cache stats.
+                raw_output = cached["text"]
+                structured_output = self._parse_json_response(raw_output)
+                confidence = structured_output.get("confidence", 0.5)
+            else:
+                response = self._model(model_id).generate_content(
+                    full_prompt,
+                    generation_config=GenerationConfig(**GENERATION_CONFIG),
+                )
+
+                raw_output = response.text
+                structured_output = self._parse_json_response(raw_output)
+                confidence = structured_output.get("confidence", 0.5)
+
+                if hasattr(response, "usage_metadata") and response.usage_metadata:
+                    input_tokens = getattr(response.usage_metadata, "prompt_token_count", 0)
+                    output_tokens = getattr(response.usage_metadata, "candidates_token_count", 0)
+
+                if cache_key and raw_output and "raw_response" not in structured_output:
+                    self.cache.put(
+                        cache_key,
+                        {"text": raw_output, "input_tokens": input_tokens, "output_tokens": output_tokens},
+                        analysis_type=analysis_type,
+                    )
 
         except Exception as exc:
             error_msg = str(exc)
+            failure = exc
             logger.error(f"Gemini analysis failed for {event_id}: {exc}")
 
         latency_ms = int((time.time() - start_time) * 1000)
 
-        # Store result in BigQuery
-        result = {
+        row = {
             "analysis_id": analysis_id,
             "event_id": event_id,
             "timestamp": datetime.utcnow().isoformat() + "Z",
@@ -159,7 +220,8 @@ class GeminiAnalyzer:
             "model_id": model_id,
             "analysis_type": analysis_type,
             "prompt_hash": prompt_hash,
-            "input_summary": event_text[:500],
+            "prompt_version": prompt_version,
+            "input_summary": format_event_full(event_data)[:500],
             "output_raw": raw_output[:5000],
             "output_structured": json.dumps(structured_output),
             "confidence": confidence,
@@ -167,16 +229,10 @@ class GeminiAnalyzer:
             "token_count_output": output_tokens,
             "latency_ms": latency_ms,
             "error": error_msg,
+            "cache_hit": cached is not None,
         }
 
-        try:
-            errors = self.bq.insert_rows_json(self.ai_table, [result])
-            if errors:
-                logger.error(f"BigQuery insert errors for analysis {analysis_id}: {errors}")
-        except Exception as bq_exc:
-            logger.error(f"Failed to write analysis to BigQuery: {bq_exc}")
-
-        return {
+        return row, {
             "analysis_id": analysis_id,
             "event_id": event_id,
             "analysis_type": analysis_type,
@@ -184,20 +240,80 @@ class GeminiAnalyzer:
             "confidence": confidence,
             "latency_ms": latency_ms,
             "error": error_msg,
-        }
-
-    def analyze_batch(self, events, analysis_type="triage", agent_id=None):
+            "cache_hit": cached is not None,
+        }, failure
+
+    def _model(self, model_id):
+        """Reuse one GenerativeModel handle per model ID."""
+        model = self._models.get(model_id)
+        if model is None:
+            model = self._models.setdefault(model_id, GenerativeModel(model_id))
+        return model
+
+    def _write_analysis_rows(self, rows):
+        for i in range(0, len(rows), BATCH_INSERT_CHUNK_ROWS):
+            chunk = rows[i : i + BATCH_INSERT_CHUNK_ROWS]
+            try:
+                errors = self.writer.insert_rows_json(self.ai_table, chunk)
+                if errors:
+                    logger.error(f"BigQuery insert errors for {len(chunk)} analyses: {errors}")
+            except Exception as bq_exc:
+                logger.error(f"Failed to write analysis to BigQuery: {bq_exc}")
+
+    def analyze_batch(
+        self,
+        events,
+        analysis_type="triage",
+        agent_id=None,
+        max_in_flight=None,
+        quota_rpm=None,
+    ):
         """
-        Analyze multiple events. Returns list of results.
+        Analyze multiple events concurrently. Returns results in input order.
 
-        For large batches, consider using this with async patterns.
+        Requests run under an AIMD limit: the number in flight grows by about
+        one per round of successes and halves on 429 / RESOURCE_EXHAUSTED,
+        with throttled requests retried after a jittered backoff. quota_rpm
+        (default GEMINI_QUOTA_RPM) additionally paces request starts. All
+        ai_analysis rows are written in bulk at the end.
         """
-        results = []
-        for event in events:
-            result = self.analyze_event(
-                event, analysis_type=analysis_type, agent_id=agent_id
-            )
-            results.append(result)
+        events = list(events)
+        limiter = _AIMDLimiter(
+            initial=BATCH_INITIAL_IN_FLIGHT,
+            maximum=max_in_flight or BATCH_MAX_IN_FLIGHT,
+            rpm=GEMINI_QUOTA_RPM if quota_rpm is None else quota_rpm,
+        )
+        rows = [None] * len(events)
+        results = [None] * len(events)
+        started = time.time()
+
+        def run(index):
+            for attempt in range(BATCH_MAX_RETRIES + 1):
+                with limiter.slot():
+                    row, result, failure = self._run_analysis(
+                        events[index], analysis_type, agent_id, None, None, None
+                    )
+                if failure is not None and _is_rate_limited(failure) and attempt < BATCH_MAX_RETRIES:
+                    limiter.on_throttle()
+                    time.sleep(min(30.0, 2 ** attempt) * random.uniform(0.5, 1.0))
+                    continue
+                if failure is None:
+                    limiter.on_success()
+                rows[index] = row
+                results[index] = result
+                return
+
+        with ThreadPoolExecutor(max_workers=limiter.maximum) as pool:
+            list(pool.map(run, range(len(events))))
+
+        self._write_analysis_rows(rows)
+
+        elapsed = time.time() - started
+        logger.info(
+            f"analyze_batch: {len(events)} events in {elapsed:.1f}s "
+            f"({len(events) / elapsed * 60 if elapsed else 0:.0f} req/min), "
+            f"throttled {limiter.throttles}x, final in-flight limit {limiter.limit:.1f}"
+        )
         return results
 
     def make_decision(
@@ -229,6 +345,35 @@ class GeminiAnalyzer:
             context=context,
         )
 
+        return self.record_decision(event_data, context, agent_id, decision_type, analysis)
+
+    def analyze_and_decide(
+        self,
+        event_data,
+        context,
+        agent_id=None,
+        decision_type="action",
+    ):
+        """
+        Triage and decide in one Gemini call (the "triage_decide" prompt).
+
+        Writes the same ai_analysis and ai_decisions rows as analyze_event()
+        followed by make_decision(), from a single response.
+
+        Returns:
+            (analysis, decision) shaped like analyze_event() and make_decision()
+        """
+        analysis = self.analyze_event(
+            event_data,
+            analysis_type="triage_decide",
+            agent_id=agent_id,
+            context=context,
+        )
+        decision = self.record_decision(event_data, context, agent_id, decision_type, analysis)
+        return analysis, decision
+
+    def record_decision(self, event_data, context, agent_id, decision_type, analysis):
+        """Write an ai_decisions row from an analyze_event()-shaped result (analysis_id may be None)."""
         decision_id = f"dec-{uuid.uuid4().hex[:12]}"
         output = analysis.get("output_structured", {})
 
@@ -251,7 +396,7 @@ class GeminiAnalyzer:
 
         # Store decision in BigQuery
         try:
-            errors = self.bq.insert_rows_json(self.decision_table, [decision])
+            errors = self.writer.insert_rows_json(self.decision_table, [decision])
             if errors:
                 logger.error(f"BigQuery insert errors for decision {decision_id}: {errors}")
         except Exception as bq_exc:
@@ -268,28 +413,32 @@ class GeminiAnalyzer:
         }
 
     def mark_decision_executed(self, decision_id, result_summary):
-        """Update a decision row to mark it as executed."""
-        query = """
-        UPDATE `{project}.openclaw.ai_decisions`
-        SET executed = TRUE,
-            execution_result = @result,
-            execution_timestamp = CURRENT_TIMESTAMP()
-        WHERE decision_id = @decision_id
-        """.format(project=self.project_id)
-
-        job_config = bigquery.QueryJobConfig(
-            query_parameters=[
-                bigquery.ScalarQueryParameter("decision_id", "STRING", decision_id),
-                bigquery.ScalarQueryParameter("result", "STRING", result_summary),
-            ]
-        )
+        """
+        Record that a decision was executed.
 
+        Appends to ai_decision_executions through the writer instead of
+        updating the ai_decisions row: a DML UPDATE takes seconds, counts
+        against table DML quotas and fails while the decision is still in
+        the streaming buffer. `openclaw.ai_decisions_current` joins the two.
+        """
+        row = {
+            "decision_id": decision_id,
+            "execution_timestamp": datetime.utcnow().isoformat() + "Z",
+            "execution_result": result_summary,
+        }
         try:
-            self.bq.query(query, job_config=job_config).result()
-            logger.info(f"Marked decision {decision_id} as executed")
+            errors = self.writer.insert_rows_json(self.executions_table, [row])
+            if errors:
+                logger.error(f"BigQuery insert errors for execution of {decision_id}: {errors}")
+            else:
+                logger.info(f"Marked decision {decision_id} as executed")
         except Exception as exc:
             logger.error(f"Failed to mark decision {decision_id} as executed: {exc}")
 
+    def cache_report(self):
+        """Hit rate and tokens saved by the response cache in this process."""
+        return self.cache.report() if self.cache else {}
+
     def get_recent_analyses(self, event_id=None, analysis_type=None, limit=20):
         """Query recent AI analyses from BigQuery."""
         conditions = ["timestamp > TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL 7 DAY)"]
@@ -318,42 +467,6 @@ class GeminiAnalyzer:
         job_config = bigquery.QueryJobConfig(query_parameters=params)
         return list(self.bq.query(query, job_config=job_config))
 
-    def _format_event_for_prompt(self, event_data):
-        """Format event data into readable text for the LLM prompt."""
-        parts = []
-
-        source = event_data.get("source", "unknown")
-        event_type = event_data.get("event_type", "unknown")
-        parts.append(f"Source: {source}")
-        parts.append(f"Type: {event_type}")
-
-        timestamp = event_data.get("timestamp")
-        if timestamp:
-            parts.append(f"Time: {timestamp}")
-
-        payload = event_data.get("payload")
-        if payload:
-            if isinstance(payload, str):
-                try:
-                    payload = json.loads(payload)
-                except json.JSONDecodeError:
-                    parts.append(f"Content: {payload[:1000]}")
-                    return "\n".join(parts)
-
-            if isinstance(payload, dict):
-                for key in ["subject", "from", "to", "snippet", "body", "body_text",
-                            "text", "content", "title", "description"]:
-                    value = payload.get(key)
-                    if value:
-                        parts.append(f"{key.title()}: {str(value)[:500]}")
-
-                # Include labels if present
-                labels = payload.get("labels")
-                if labels:
-                    parts.append(f"Labels: {', '.join(labels) if isinstance(labels, list) else labels}")
-
-        return "\n".join(parts)
-
     def _parse_json_response(self, raw_text):
         """Parse JSON from Gemini response, handling common formatting issues."""
         if not raw_text:
@@ -373,3 +486,68 @@ class GeminiAnalyzer:
         except json.JSONDecodeError:
             logger.warning(f"Failed to parse Gemini JSON response, returning raw text")
             return {"raw_response": raw_text, "confidence": 0.3}
+
+
+class _AIMDLimiter:
+    """In-flight request limit with additive increase / multiplicative decrease."""
+
+    def __init__(self, initial, maximum, rpm=0):
+        self.maximum = max(1, maximum)
+        self.limit = float(min(max(1, initial), self.maximum))
+        self.in_flight = 0
+        self.throttles = 0
+        self._min_interval = 60.0 / rpm if rpm else 0.0
+        self._next_start = 0.0
+        self._cond = threading.Condition()
+
+    def slot(self):
+        return _LimiterSlot(self)
+
+    def acquire(self):
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+            # Pace starts under the requests/min ceiling.
+            now = time.monotonic()
+            start_at = max(now, self._next_start)
+            self._next_start = start_at + self._min_interval
+        if start_at > now:
+            time.sleep(start_at - now)
+
+    def release(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def on_success(self):
+        with self._cond:
+            self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+
+    def on_throttle(self):
+        with self._cond:
+            self.throttles += 1
+            self.limit = max(1.0, self.limit / 2)
+
+
+class _LimiterSlot:
+    def __init__(self, limiter):
+        self.limiter = limiter
+
+    def __enter__(self):
+        self.limiter.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.limiter.release()
+        return False
+
+
+def _is_rate_limited(exc):
+    text = str(exc)
+    return (
+        type(exc).__name__ in ("ResourceExhausted", "TooManyRequests")
+        or "429" in text
+        or "RESOURCE_EXHAUSTED" in text
+    )
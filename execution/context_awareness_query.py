@@ -10,12 +10,16 @@ Queries Second Brain data lake for:
 Then performs semantic search and lead analysis.
 """
 
+import argparse
 import json
 import os
 import re
-from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
-from collections import defaultdict
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, Optional, Set, Tuple
+from collections import defaultdict, deque
 
 from google.auth import default
 from google.cloud import bigquery
@@ -24,6 +28,18 @@ from googleapiclient.discovery import build
 # Configuration
 PROJECT_ID = os.getenv('PROJECT_ID', 'killuacode')
 SHEET_ID = os.getenv('GOOGLE_SHEET_ID', '15-3fveXfHSKyTXmQ3x344ie4p9rbtTZGaNl-GLQ8Eac')
+TASKS_RANGE = 'Tasks!A:L'
+CONTACTS_RANGE = 'Contacts!A:D'
+LOOKBACK_DAYS = int(os.getenv('CONTEXT_LOOKBACK_DAYS', '7'))
+EMAIL_LIMIT = 100
+ANALYSIS_LIMIT = 50
+
+REPORT_PATH = os.getenv('CONTEXT_REPORT_PATH', '/Users/maryobrien/second-brain/context_awareness_report.json')
+# Incremental mode (--incremental): saved snapshot, aggregates and watermarks.
+STATE_PATH = os.getenv('CONTEXT_STATE_PATH', os.path.join(os.path.dirname(REPORT_PATH), 'context_awareness_state.json'))
+# Re-read this far behind the watermark so late-arriving rows are not missed;
+# rows already held are skipped by ID.
+WATERMARK_OVERLAP = timedelta(minutes=int(os.getenv('CONTEXT_WATERMARK_OVERLAP_MIN', '60')))
 
 # Keywords for semantic search
 SEARCH_KEYWORDS = [
@@ -46,8 +62,11 @@ PIPELINE_ESTIMATES = {
 }
 
 
-def get_clients():
-    """Initialize BigQuery and Sheets clients with explicit scopes."""
+def get_clients(inventory: bool = False):
+    """Initialize BigQuery and Sheets clients with explicit scopes.
+
+    With inventory=True, also print the openclaw tables and their row counts.
+    """
     SCOPES = [
         'https://www.googleapis.com/auth/cloud-platform',
         'https://www.googleapis.com/auth/spreadsheets.readonly',
@@ -67,35 +86,43 @@ def get_clients():
     
     bq = bigquery.Client(project=project_id, credentials=credentials)
     sheets = build('sheets', 'v4', credentials=credentials)
-    
-    # Debug BigQuery
+
+    if inventory:
+        print_table_inventory(bq, project_id)
+
+    return bq, sheets
+
+
+def print_table_inventory(bq: bigquery.Client, project_id: str) -> None:
+    """Diagnostic: list datasets and openclaw row counts (one metadata query)."""
     try:
         datasets = list(bq.list_datasets())
         print(f"      ✓ Datasets found: {[d.dataset_id for d in datasets]}")
-        
-        # Check all tables in openclaw
-        dataset_ref = bq.dataset('openclaw')
-        tables = list(bq.list_tables(dataset_ref))
-        if tables:
+
+        rows = list(bq.query(
+            f"SELECT table_id, row_count FROM `{project_id}.openclaw.__TABLES__` ORDER BY table_id"
+        ).result())
+        if rows:
             print(f"      ✓ Tables in openclaw:")
-            for table in tables:
-                t_ref = f"{project_id}.openclaw.{table.table_id}"
-                try:
-                    t = bq.get_table(t_ref)
-                    print(f"        - {table.table_id}: {t.num_rows} rows")
-                except:
-                    print(f"        - {table.table_id}: (error getting row count)")
+            for row in rows:
+                print(f"        - {row.table_id}: {row.row_count} rows")
         else:
             print(f"      ✓ No tables found in openclaw dataset")
 
     except Exception as e:
         print(f"      ⚠️ Error listing datasets/tables: {e}")
 
-    return bq, sheets
+
+def _since_filter(since: Optional[datetime]):
+    """(SQL clause, query params) restricting rows to timestamp > since."""
+    if since is None:
+        return "", []
+    return "AND timestamp > @since", [bigquery.ScalarQueryParameter('since', 'TIMESTAMP', since)]
 
 
-def fetch_recent_emails(bq: bigquery.Client, days: int = 7) -> List[Dict]:
-    """Fetch recent emails from BigQuery."""
+def fetch_recent_emails(bq: bigquery.Client, days: int = 7, since: Optional[datetime] = None) -> List[Dict]:
+    """Fetch recent emails from BigQuery, optionally only those newer than `since`."""
+    since_clause, params = _since_filter(since)
     query = f"""
     SELECT
       event_id,
@@ -109,11 +136,13 @@ def fetch_recent_emails(bq: bigquery.Client, days: int = 7) -> List[Dict]:
     FROM `{PROJECT_ID}.openclaw.events`
     WHERE source = 'gmail'
       AND timestamp > TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL {days} DAY)
+      {since_clause}
     ORDER BY timestamp DESC
-    LIMIT 100
+    LIMIT {EMAIL_LIMIT}
     """
 
-    rows = list(bq.query(query).result())
+    job_config = bigquery.QueryJobConfig(query_parameters=params)
+    rows = list(bq.query(query, job_config=job_config).result())
     emails = []
     for row in rows:
         emails.append({
@@ -129,8 +158,9 @@ def fetch_recent_emails(bq: bigquery.Client, days: int = 7) -> List[Dict]:
     return emails
 
 
-def fetch_recent_ai_analysis(bq: bigquery.Client, days: int = 7) -> List[Dict]:
-    """Fetch recent AI analyses from BigQuery."""
+def fetch_recent_ai_analysis(bq: bigquery.Client, days: int = 7, since: Optional[datetime] = None) -> List[Dict]:
+    """Fetch recent AI analyses from BigQuery, optionally only those newer than `since`."""
+    since_clause, params = _since_filter(since)
     query = f"""
     SELECT
       analysis_id,
@@ -140,11 +170,13 @@ def fetch_recent_ai_analysis(bq: bigquery.Client, days: int = 7) -> List[Dict]:
       confidence
     FROM `{PROJECT_ID}.openclaw.ai_analysis`
     WHERE timestamp > TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL {days} DAY)
+      {since_clause}
     ORDER BY timestamp DESC
-    LIMIT 50
+    LIMIT {ANALYSIS_LIMIT}
     """
 
-    rows = list(bq.query(query).result())
+    job_config = bigquery.QueryJobConfig(query_parameters=params)
+    rows = list(bq.query(query, job_config=job_config).result())
     analyses = []
     for row in rows:
         analyses.append({
@@ -157,158 +189,453 @@ def fetch_recent_ai_analysis(bq: bigquery.Client, days: int = 7) -> List[Dict]:
     return analyses
 
 
-def fetch_open_tasks(sheets) -> List[Dict]:
-    """Fetch open tasks from Google Sheets."""
-    try:
-        result = sheets.spreadsheets().values().get(
-            spreadsheetId=SHEET_ID,
-            range='Tasks!A:L'
-        ).execute()
+def _sheet_records(rows: List[List[str]]) -> List[Dict]:
+    """Header row + data rows -> dicts, padding short rows."""
+    if not rows or len(rows) < 2:
+        return []
+    headers = rows[0]
+    return [dict(zip(headers, row + [''] * (len(headers) - len(row)))) for row in rows[1:]]
+
 
-        rows = result.get('values', [])
-        if not rows or len(rows) < 2:
-            return []
+def _open_tasks(rows: List[List[str]]) -> List[Dict]:
+    # Filter for open tasks
+    return [
+        task for task in _sheet_records(rows)
+        if task.get('status', '').lower() not in ['done', 'completed', 'closed', 'cancelled', '']
+    ]
 
-        headers = rows[0]
-        tasks = []
 
-        for row in rows[1:]:
-            # Pad row to match headers length
-            row = row + [''] * (len(headers) - len(row))
-            task = dict(zip(headers, row))
+def fetch_sheet_tabs(sheets) -> Tuple[List[Dict], List[Dict]]:
+    """Open tasks and contacts from one Sheets batchGet."""
+    result = sheets.spreadsheets().values().batchGet(
+        spreadsheetId=SHEET_ID,
+        ranges=[TASKS_RANGE, CONTACTS_RANGE]
+    ).execute()
+    value_ranges = result.get('valueRanges', [])
+    tasks_rows = value_ranges[0].get('values', []) if len(value_ranges) > 0 else []
+    contacts_rows = value_ranges[1].get('values', []) if len(value_ranges) > 1 else []
+    return _open_tasks(tasks_rows), _sheet_records(contacts_rows)
+
+
+@dataclass
+class DataLakeSnapshot:
+    """What one report run reads from BigQuery and Sheets."""
+    loaded_at: str
+    days: int
+    emails: List[Dict] = field(default_factory=list)
+    analyses: List[Dict] = field(default_factory=list)
+    tasks: List[Dict] = field(default_factory=list)
+    contacts: List[Dict] = field(default_factory=list)
+    # Wall time per source ('emails', 'analyses', 'sheets') and failed sources.
+    timings_ms: Dict[str, int] = field(default_factory=dict)
+    errors: Dict[str, str] = field(default_factory=dict)
+
+
+def load_snapshot(
+    bq: bigquery.Client,
+    sheets,
+    days: int = LOOKBACK_DAYS,
+    email_since: Optional[datetime] = None,
+    analysis_since: Optional[datetime] = None,
+) -> DataLakeSnapshot:
+    """
+    Run the two BigQuery reads and the Sheets read concurrently.
 
-            # Filter for open tasks
-            status = task.get('status', '').lower()
-            if status not in ['done', 'completed', 'closed', 'cancelled', '']:
-                tasks.append(task)
+    With email_since / analysis_since only rows newer than those are read
+    (the incremental report's delta); tasks and contacts are always read whole.
 
-        return tasks
-    except Exception as e:
-        print(f"Error fetching tasks: {e}")
-        return []
+    The Sheets client is only used from one worker (both tabs come from one
+    batchGet), so no googleapiclient object is shared across threads. A
+    failed source is recorded in `errors` and leaves its lists empty.
+    """
+    snapshot = DataLakeSnapshot(loaded_at=datetime.now().isoformat(), days=days)
+    sources = {
+        'emails': lambda: fetch_recent_emails(bq, days=days, since=email_since),
+        'analyses': lambda: fetch_recent_ai_analysis(bq, days=days, since=analysis_since),
+        'sheets': lambda: fetch_sheet_tabs(sheets),
+    }
 
+    def timed(name):
+        start = time.perf_counter()
+        try:
+            return sources[name]()
+        finally:
+            snapshot.timings_ms[name] = int((time.perf_counter() - start) * 1000)
+
+    with ThreadPoolExecutor(max_workers=len(sources)) as pool:
+        futures = {name: pool.submit(timed, name) for name in sources}
+        for name, future in futures.items():
+            try:
+                result = future.result()
+            except Exception as e:
+                snapshot.errors[name] = str(e)
+                continue
+            if name == 'sheets':
+                snapshot.tasks, snapshot.contacts = result
+            else:
+                setattr(snapshot, name, result)
 
-def fetch_contacts(sheets) -> List[Dict]:
-    """Fetch contacts from Google Sheets."""
-    try:
-        result = sheets.spreadsheets().values().get(
-            spreadsheetId=SHEET_ID,
-            range='Contacts!A:D'
-        ).execute()
+    return snapshot
 
-        rows = result.get('values', [])
-        if not rows or len(rows) < 2:
-            return []
 
-        headers = rows[0]
-        contacts = []
+class KeywordMatcher:
+    """Aho-Corasick automaton over lowercased keywords (substring match, like `in`).
 
-        for row in rows[1:]:
-            row = row + [''] * (len(headers) - len(row))
-            contacts.append(dict(zip(headers, row)))
+    Built once; find() reports every keyword occurring in a text in a single
+    pass over it, however many keywords there are.
+    """
 
-        return contacts
-    except Exception as e:
-        print(f"Error fetching contacts: {e}")
-        return []
+    def __init__(self, keywords: List[str]):
+        self.keywords = [k for k in dict.fromkeys(keywords) if k]
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[tuple] = [()]
+
+        for keyword in self.keywords:
+            node = 0
+            for ch in keyword.lower():
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                node = nxt
+            self._out[node] += (keyword,)
+
+        # Fold the failure links into a full transition table so find() makes
+        # exactly one dict lookup per character.
+        self._delta: List[Dict[str, int]] = [dict(self._goto[0])]
+        self._delta.extend({} for _ in self._goto[1:])
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            self._delta[node] = {**self._delta[self._fail[node]], **self._goto[node]}
+            for ch, child in self._goto[node].items():
+                if node:
+                    self._fail[child] = self._delta[self._fail[node]].get(ch, 0)
+                self._out[child] += self._out[self._fail[child]]
+                queue.append(child)
+
+    def find(self, text: Optional[str]) -> Set[str]:
+        """Keywords (original spelling) that occur anywhere in text, case-insensitively."""
+        found = set()
+        node = 0
+        delta, out = self._delta, self._out
+        for ch in (text or '').lower():
+            node = delta[node].get(ch, 0)
+            if out[node]:
+                found.update(out[node])
+        return found
+
+
+# Compiled once; shared by semantic search and lead identification.
+KEYWORD_MATCHER = KeywordMatcher(SEARCH_KEYWORDS + LEAD_NAMES)
+
+
+def _thread_id(email: Dict) -> str:
+    return email.get('thread_id') or email.get('event_id')
 
 
 def semantic_search(emails: List[Dict], keywords: List[str]) -> Dict[str, List[Dict]]:
     """Perform semantic search across emails for keywords."""
-    results = defaultdict(list)
+    matcher = KEYWORD_MATCHER
+    if not set(keywords) <= set(matcher.keywords):
+        matcher = KeywordMatcher(keywords)
+    order = {k: i for i, k in enumerate(keywords)}
 
+    results = defaultdict(list)
+    seen = defaultdict(set)
     for email in emails:
-        text = f"{email.get('subject', '')} {email.get('snippet', '')} {email.get('from', '')}".lower()
-
-        for keyword in keywords:
-            if keyword.lower() in text:
-                # Check if we already have this email for another keyword
-                already_added = any(
-                    email['event_id'] == existing['event_id']
-                    for existing in results[keyword]
-                )
-                if not already_added:
-                    results[keyword].append(email)
+        text = f"{email.get('subject') or ''} {email.get('snippet') or ''} {email.get('from') or ''}"
+        for keyword in sorted(matcher.find(text) & order.keys(), key=order.get):
+            # The same email may come back more than once; list it once per keyword.
+            if email['event_id'] not in seen[keyword]:
+                seen[keyword].add(email['event_id'])
+                results[keyword].append(email)
 
     return dict(results)
 
 
-def identify_leads(emails: List[Dict], contacts: List[Dict]) -> List[Dict]:
-    """Identify leads from emails and contacts."""
-    leads = []
-    now = datetime.now()
+def _parse_ts(value: Optional[str]) -> Optional[datetime]:
+    """ISO timestamp -> aware UTC datetime (naive values are taken as UTC)."""
+    if not value:
+        return None
+    ts = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
 
-    # Create contact lookup
-    contact_lookup = {}
-    for contact in contacts:
-        name = contact.get('name', '')
-        email_addr = contact.get('email', '')
-        if name:
-            contact_lookup[name.lower()] = contact
-        if email_addr:
-            contact_lookup[email_addr.lower()] = contact
 
-    # Group emails by thread/conversation
-    threads = defaultdict(list)
-    for email in emails:
-        thread_id = email.get('thread_id') or email.get('event_id')
-        threads[thread_id].append(email)
+def _newest_first(items: List[Dict]) -> List[Dict]:
+    return sorted(items, key=lambda x: _parse_ts(x.get('timestamp')) or datetime.min.replace(tzinfo=timezone.utc), reverse=True)
 
-    # Analyze each thread for leads
-    processed_threads = set()
-    for email in emails:
-        thread_id = email.get('thread_id') or email.get('event_id')
-        if thread_id in processed_threads:
-            continue
-        processed_threads.add(thread_id)
 
+class LeadTracker:
+    """
+    Emails grouped into per-thread aggregates, updated one email at a time.
+
+    A thread keeps its newest email (whose subject/from decide whether it is
+    a lead), its email count, latest activity and per-keyword email counts.
+    Adding or evicting an email only touches its own thread, and each
+    email's text is scanned once on the way in, so building the tracker is
+    linear in total email text and a delta costs only the new emails.
+    """
+
+    def __init__(self):
+        self.emails: Dict[str, Dict] = {}
+        self.threads: Dict[str, Dict] = {}
+
+    def add(self, email: Dict) -> bool:
+        """Add an email; False if it is already held."""
+        event_id = email.get('event_id')
+        if event_id in self.emails:
+            return False
+        self.emails[event_id] = email
+
+        thread = self.threads.setdefault(_thread_id(email), {
+            'first': None,
+            'email_count': 0,
+            'last_activity': None,
+            'keywords': {},
+            'lead_name': None,
+            'header_keywords': [],
+        })
+        thread['email_count'] += 1
+        for keyword in self._keywords(email):
+            thread['keywords'][keyword] = thread['keywords'].get(keyword, 0) + 1
+
+        ts = _parse_ts(email.get('timestamp'))
+        if ts and (thread['last_activity'] is None or ts > _parse_ts(thread['last_activity'])):
+            thread['last_activity'] = email['timestamp']
+
+        # The newest email stands for the thread (the first one in newest-first order).
+        first = self.emails.get(thread['first'])
+        first_ts = _parse_ts(first.get('timestamp')) if first else None
+        if first is None or (ts and (first_ts is None or ts > first_ts)):
+            self._set_first(thread, email)
+        return True
+
+    def remove(self, event_id: str) -> None:
+        email = self.emails.pop(event_id, None)
+        if email is None:
+            return
+        thread_id = _thread_id(email)
+        thread = self.threads[thread_id]
+        thread['email_count'] -= 1
+        if thread['email_count'] == 0:
+            del self.threads[thread_id]
+        elif thread['first'] == event_id or thread['last_activity'] == email.get('timestamp'):
+            # Evictions take the oldest emails, so this only happens on ties.
+            self._rebuild_thread(thread_id)
+        else:
+            for keyword in self._keywords(email):
+                thread['keywords'][keyword] -= 1
+                if not thread['keywords'][keyword]:
+                    del thread['keywords'][keyword]
+
+    def prune(self, cutoff: datetime, limit: int) -> List[str]:
+        """Evict emails older than cutoff and all but the `limit` newest; return their IDs."""
+        keep = [
+            e for e in _newest_first(list(self.emails.values()))
+            if (_parse_ts(e.get('timestamp')) or cutoff) > cutoff
+        ][:limit]
+        keep_ids = {e.get('event_id') for e in keep}
+        evicted = [event_id for event_id in self.emails if event_id not in keep_ids]
+        for event_id in evicted:
+            self.remove(event_id)
+        return evicted
+
+    def newest_emails(self) -> List[Dict]:
+        return _newest_first(list(self.emails.values()))
+
+    def leads(self, now: datetime) -> List[Dict]:
+        """Current leads, highest pipeline value first."""
+        leads = [
+            self._lead(thread_id, thread, now)
+            for thread_id, thread in self.threads.items()
+            if thread['lead_name']
+        ]
+        # Most recently active first among equals, as in newest-first email order.
+        return sorted(leads, key=lambda x: (
+            -x['pipeline_value'],
+            x['days_since_activity'],
+            -_parse_ts(x['last_activity']).timestamp(),
+            str(x['thread_id']),
+        ))
+
+    def _lead(self, thread_id: str, thread: Dict, now: datetime) -> Dict:
+        email = self.emails[thread['first']]
+        lead_name = thread['lead_name']
+        last_activity = _parse_ts(thread['last_activity']) or now
+        days_since_activity = (now - last_activity).days
+
+        # Determine pipeline value
+        hits = set(thread['header_keywords']) | thread['keywords'].keys()
+        keywords_found = [k for k in SEARCH_KEYWORDS if k in hits]
+        pipeline_value = max(
+            [PIPELINE_ESTIMATES.get(lead_name, 50000)]
+            + [PIPELINE_ESTIMATES.get(k, 0) for k in keywords_found]
+        )
+
+        return {
+            'name': lead_name,
+            'email': email.get('from', ''),
+            'subject': email.get('subject', ''),
+            'last_activity': last_activity.isoformat(),
+            'days_since_activity': days_since_activity,
+            'is_stale': days_since_activity >= 3,
+            'thread_id': thread_id,
+            'email_count': thread['email_count'],
+            'pipeline_value': pipeline_value,
+            'keywords_found': keywords_found
+        }
+
+    def _set_first(self, thread: Dict, email: Dict) -> None:
+        thread['first'] = email.get('event_id')
         # Check for lead names in subject/from
-        subject = email.get('subject', '')
-        from_addr = email.get('from', '')
-        text = f"{subject} {from_addr}".lower()
-
-        for lead_name in LEAD_NAMES:
-            if lead_name.lower() in text:
-                thread_emails = threads[thread_id]
-                last_activity = max(
-                    datetime.fromisoformat(e['timestamp'].replace('Z', '+00:00'))
-                    for e in thread_emails if e.get('timestamp')
-                ) if thread_emails else now
-
-                days_since_activity = (now - last_activity).days
-                is_stale = days_since_activity >= 3
-
-                # Determine pipeline value
-                pipeline_value = PIPELINE_ESTIMATES.get(lead_name, 50000)
-                for keyword in SEARCH_KEYWORDS:
-                    if keyword.lower() in text or any(
-                        keyword.lower() in (e.get('subject', '') + e.get('snippet', '')).lower()
-                        for e in thread_emails
-                    ):
-                        pipeline_value = max(pipeline_value, PIPELINE_ESTIMATES.get(keyword, 0))
-
-                lead_info = {
-                    'name': lead_name,
-                    'email': from_addr,
-                    'subject': subject,
-                    'last_activity': last_activity.isoformat(),
-                    'days_since_activity': days_since_activity,
-                    'is_stale': is_stale,
-                    'thread_id': thread_id,
-                    'email_count': len(thread_emails),
-                    'pipeline_value': pipeline_value,
-                    'keywords_found': [
-                        k for k in SEARCH_KEYWORDS
-                        if k.lower() in text or any(
-                            k.lower() in (e.get('subject', '') + e.get('snippet', '')).lower()
-                            for e in thread_emails
-                        )
-                    ]
-                }
-                leads.append(lead_info)
-                break
-
-    return sorted(leads, key=lambda x: (-x['pipeline_value'], x['days_since_activity']))
+        hits = KEYWORD_MATCHER.find(f"{email.get('subject') or ''} {email.get('from') or ''}")
+        thread['lead_name'] = next((name for name in LEAD_NAMES if name in hits), None)
+        thread['header_keywords'] = sorted(hits)
+
+    def _rebuild_thread(self, thread_id: str) -> None:
+        members = [e for e in self.emails.values() if _thread_id(e) == thread_id]
+        for email in members:
+            del self.emails[email.get('event_id')]
+        del self.threads[thread_id]
+        for email in _newest_first(members):
+            self.add(email)
+
+    @staticmethod
+    def _keywords(email: Dict) -> Set[str]:
+        return KEYWORD_MATCHER.find(f"{email.get('subject') or ''}\n{email.get('snippet') or ''}")
+
+
+def diff_leads(previous: List[Dict], current: List[Dict]) -> Dict[str, List[Dict]]:
+    """Leads that appeared, changed, went stale or dropped out between two runs."""
+    before = {lead['thread_id']: lead for lead in previous}
+    after = {lead['thread_id']: lead for lead in current}
+    tracked = ('email_count', 'last_activity', 'pipeline_value', 'keywords_found', 'subject')
+
+    changes = {'new_leads': [], 'updated_leads': [], 'newly_stale': [], 'dropped_leads': []}
+    for thread_id, lead in after.items():
+        old = before.get(thread_id)
+        if old is None:
+            changes['new_leads'].append(lead)
+            continue
+        if any(lead.get(k) != old.get(k) for k in tracked):
+            changes['updated_leads'].append(lead)
+        if lead['is_stale'] and not old.get('is_stale'):
+            changes['newly_stale'].append(lead)
+    changes['dropped_leads'] = [lead for thread_id, lead in before.items() if thread_id not in after]
+    return changes
+
+
+class ReportState:
+    """
+    What an incremental report carries between runs: the emails and analyses
+    inside the lookback window, the lead tracker's thread aggregates, the
+    last run's leads and the newest timestamp seen per source.
+    """
+
+    VERSION = 1
+
+    def __init__(self, days: int = LOOKBACK_DAYS):
+        self.days = days
+        self.saved_at: Optional[str] = None
+        self.email_watermark: Optional[str] = None
+        self.analysis_watermark: Optional[str] = None
+        self.tracker = LeadTracker()
+        self.analyses: Dict[str, Dict] = {}
+        self.leads: List[Dict] = []
+
+    @classmethod
+    def load(cls, path: str, days: int) -> Optional['ReportState']:
+        """Saved state, or None if there is none usable for this lookback."""
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"      ⚠️ Ignoring unreadable report state {path}: {e}")
+            return None
+        if data.get('version') != cls.VERSION or data.get('days') != days:
+            return None
+
+        state = cls(days)
+        state.saved_at = data.get('saved_at')
+        state.email_watermark = data.get('email_watermark')
+        state.analysis_watermark = data.get('analysis_watermark')
+        state.tracker.emails = {e['event_id']: e for e in data.get('emails', [])}
+        state.tracker.threads = data.get('threads', {})
+        state.analyses = {a['analysis_id']: a for a in data.get('analyses', [])}
+        state.leads = data.get('leads', [])
+        return state
+
+    def save(self, path: str) -> None:
+        data = {
+            'version': self.VERSION,
+            'days': self.days,
+            'saved_at': self.saved_at,
+            'email_watermark': self.email_watermark,
+            'analysis_watermark': self.analysis_watermark,
+            'emails': self.tracker.newest_emails(),
+            'threads': self.tracker.threads,
+            'analyses': self.newest_analyses(),
+            'leads': self.leads,
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, default=str)
+        os.replace(tmp_path, path)
+
+    def since(self, watermark: Optional[str]) -> Optional[datetime]:
+        """Lower bound for the next delta read of a source."""
+        ts = _parse_ts(watermark)
+        return ts - WATERMARK_OVERLAP if ts else None
+
+    def newest_analyses(self) -> List[Dict]:
+        return _newest_first(list(self.analyses.values()))
+
+    def apply(self, snapshot: DataLakeSnapshot, now: datetime) -> Dict[str, Any]:
+        """Fold a (delta) snapshot in, evict what left the window, and return the changes."""
+        new_emails = [e for e in snapshot.emails if self.tracker.add(e)]
+        new_analyses = [a for a in snapshot.analyses if a['analysis_id'] not in self.analyses]
+        for analysis in new_analyses:
+            self.analyses[analysis['analysis_id']] = analysis
+
+        cutoff = now - timedelta(days=self.days)
+        evicted = self.tracker.prune(cutoff, EMAIL_LIMIT)
+        kept = {
+            a['analysis_id'] for a in self.newest_analyses()[:ANALYSIS_LIMIT]
+            if (_parse_ts(a.get('timestamp')) or cutoff) > cutoff
+        }
+        self.analyses = {k: v for k, v in self.analyses.items() if k in kept}
+
+        self.email_watermark = _max_timestamp(self.email_watermark, new_emails)
+        self.analysis_watermark = _max_timestamp(self.analysis_watermark, new_analyses)
+
+        leads = self.tracker.leads(now)
+        changes = {
+            'since': self.saved_at,
+            'new_emails': _newest_first(new_emails),
+            'new_analyses': _newest_first(new_analyses),
+            'evicted_email_count': len(evicted),
+        }
+        changes.update(diff_leads(self.leads, leads))
+
+        self.leads = leads
+        self.saved_at = now.isoformat()
+        return changes
+
+
+def _max_timestamp(current: Optional[str], rows: List[Dict]) -> Optional[str]:
+    best, best_ts = current, _parse_ts(current)
+    for row in rows:
+        ts = _parse_ts(row.get('timestamp'))
+        if ts and (best_ts is None or ts > best_ts):
+            best, best_ts = row['timestamp'], ts
+    return best
 
 
 def generate_follow_up_message(lead: Dict) -> str:
@@ -338,38 +665,57 @@ def generate_follow_up_message(lead: Dict) -> str:
     return message
 
 
-def main():
+def main(argv: Optional[List[str]] = None):
     """Main execution."""
+    parser = argparse.ArgumentParser(description='Context awareness report over the Second Brain data lake.')
+    parser.add_argument('--inventory', action='store_true',
+                        help='also list BigQuery datasets and openclaw table row counts')
+    parser.add_argument('--incremental', action='store_true',
+                        help=f'read only rows newer than the saved watermarks and update the saved state ({STATE_PATH})')
+    parser.add_argument('--full', action='store_true',
+                        help='with --incremental, ignore the saved state and recompute from the whole lookback window')
+    args = parser.parse_args(argv)
+    if args.full and not args.incremental:
+        parser.error('--full only applies with --incremental (without it every run is a full recompute)')
+
     print("=" * 80)
     print("CONTEXT AWARENESS - SECOND BRAIN DATA LAKE QUERY")
     print("=" * 80)
     print()
 
     # Initialize clients
-    print("[1/5] Initializing BigQuery and Sheets clients...")
-    bq, sheets = get_clients()
+    print("[1/2] Initializing BigQuery and Sheets clients...")
+    bq, sheets = get_clients(inventory=args.inventory)
     print("      ✓ Clients initialized")
     print()
 
-    # Fetch data
-    print("[2/5] Fetching recent emails (last 7 days)...")
-    emails = fetch_recent_emails(bq, days=7)
-    print(f"      ✓ Found {len(emails)} emails")
-    print()
-
-    print("[3/5] Fetching open tasks...")
-    tasks = fetch_open_tasks(sheets)
-    print(f"      ✓ Found {len(tasks)} open tasks")
-    print()
-
-    print("[4/5] Fetching contacts...")
-    contacts = fetch_contacts(sheets)
-    print(f"      ✓ Found {len(contacts)} contacts")
-    print()
+    # Saved state from the last incremental run; a full recompute starts empty
+    # but still reports changes against the last saved leads.
+    previous = ReportState.load(STATE_PATH, LOOKBACK_DAYS) if args.incremental else None
+    if previous is not None and not args.full:
+        state = previous
+    else:
+        state = ReportState(LOOKBACK_DAYS)
+        if previous is not None:
+            state.saved_at, state.leads = previous.saved_at, previous.leads
+    is_delta = state.email_watermark is not None or state.analysis_watermark is not None
 
-    print("[5/5] Fetching recent AI analyses...")
-    analyses = fetch_recent_ai_analysis(bq, days=7)
-    print(f"      ✓ Found {len(analyses)} analyses")
+    # Fetch data
+    scope = f"since {state.saved_at}" if is_delta else f"last {LOOKBACK_DAYS} days"
+    print(f"[2/2] Loading emails, AI analyses ({scope}), open tasks and contacts...")
+    snapshot = load_snapshot(
+        bq, sheets, days=LOOKBACK_DAYS,
+        email_since=state.since(state.email_watermark),
+        analysis_since=state.since(state.analysis_watermark),
+    )
+    changes = state.apply(snapshot, datetime.now(timezone.utc))
+    emails, analyses = state.tracker.newest_emails(), state.newest_analyses()
+    tasks, contacts = snapshot.tasks, snapshot.contacts
+    print(f"      ✓ Found {len(snapshot.emails)} emails ({snapshot.timings_ms.get('emails', 0)} ms)")
+    print(f"      ✓ Found {len(snapshot.analyses)} analyses ({snapshot.timings_ms.get('analyses', 0)} ms)")
+    print(f"      ✓ Found {len(tasks)} open tasks, {len(contacts)} contacts ({snapshot.timings_ms.get('sheets', 0)} ms)")
+    for source, error in snapshot.errors.items():
+        print(f"      ⚠️ Error loading {source}: {error}")
     print()
 
     # Semantic search
@@ -393,7 +739,7 @@ def main():
     print("-" * 80)
     print()
 
-    leads = identify_leads(emails, contacts)
+    leads = state.leads
 
     if not leads:
         print("No leads identified from recent email activity.")
@@ -441,6 +787,20 @@ def main():
                 print(f"   \"{generate_follow_up_message(lead)}\"")
                 print()
 
+    if previous is not None:
+        print("-" * 80)
+        print(f"CHANGES SINCE LAST RUN ({changes['since']})")
+        print("-" * 80)
+        print()
+        print(f"New emails: {len(changes['new_emails'])}")
+        print(f"New AI analyses: {len(changes['new_analyses'])}")
+        for label, key in (("New leads", 'new_leads'), ("Updated leads", 'updated_leads'),
+                           ("Newly stale leads", 'newly_stale'), ("Dropped leads", 'dropped_leads')):
+            print(f"{label}: {len(changes[key])}")
+            for lead in changes[key][:5]:
+                print(f"  - {lead['name']}: {lead['subject'][:60]} ({lead['email_count']} emails, ${lead['pipeline_value']:,})")
+        print()
+
     # Summary statistics
     print("-" * 80)
     print("SUMMARY STATISTICS")
@@ -479,6 +839,8 @@ def main():
             'total_pipeline_value': total_pipeline,
             'stale_pipeline_value': stale_pipeline
         },
+        'load_timings_ms': snapshot.timings_ms,
+        'load_errors': snapshot.errors,
         'emails': emails[:10],  # Top 10 for reference
         'tasks': tasks[:10],
         'contacts': contacts[:10],
@@ -486,13 +848,21 @@ def main():
         'search_results': search_results,
         'leads': leads
     }
+    if previous is not None:
+        output['changes'] = changes
 
     # Save to file
-    output_path = '/Users/maryobrien/second-brain/context_awareness_report.json'
-    with open(output_path, 'w') as f:
+    with open(REPORT_PATH, 'w') as f:
         json.dump(output, f, indent=2, default=str)
 
-    print(f"Full report saved to: {output_path}")
+    print(f"Full report saved to: {REPORT_PATH}")
+    if args.incremental:
+        # A rebuild whose reads failed would drop everything held; keep the old state.
+        if not is_delta and ('emails' in snapshot.errors or 'analyses' in snapshot.errors):
+            print("State not saved (load errors); next run recomputes again")
+        else:
+            state.save(STATE_PATH)
+            print(f"Incremental state saved to: {STATE_PATH}")
     print()
     print("=" * 80)
 
@@ -43,11 +43,14 @@ openclaw.ai_analysis (analysis_id STRING, event_id STRING, timestamp TIMESTAMP,
 
 openclaw.ai_decisions (decision_id STRING, timestamp TIMESTAMP, agent_id STRING, trigger_event_id STRING, analysis_id STRING, decision_type STRING, input_context JSON, reasoning STRING, chosen_action STRING, alternatives JSON, confidence FLOAT64, executed BOOL, execution_result STRING, execution_timestamp TIMESTAMP)
 
+openclaw.ai_decision_executions (decision_id STRING, execution_timestamp TIMESTAMP, execution_result STRING)
+  - Append-only; the latest row per decision_id is its executed state. Prefer the ai_decisions_current view over ai_decisions.executed
+
 openclaw.embeddings (embedding_id STRING, event_id STRING, timestamp TIMESTAMP, source STRING, content_hash STRING, content_preview STRING, embedding ARRAY<FLOAT64>, model_id STRING, dimensions INT64)
 
 openclaw.semantic_links (link_id STRING, timestamp TIMESTAMP, source_event_id STRING, target_event_id STRING, similarity_score FLOAT64, link_type STRING, metadata JSON)
 
-Views: openclaw.critical_actions, openclaw.decision_audit, openclaw.valid_observations, openclaw.recent_events, openclaw.recent_ai_analysis, openclaw.ai_decision_audit, openclaw.recent_embeddings, openclaw.strong_semantic_links
+Views: openclaw.critical_actions, openclaw.decision_audit, openclaw.valid_observations, openclaw.recent_events, openclaw.recent_ai_analysis, openclaw.ai_decision_audit, openclaw.ai_decisions_current, openclaw.recent_embeddings, openclaw.strong_semantic_links
 
 Rules:
 - Always use BigQuery Standard SQL (not legacy SQL)